@@ -1,28 +1,768 @@
-import unittest
-import assignment_eleven as ae
-
-
-class TestAE(unittest.TestCase):
-
-    def test_invalid_inputs(self):
-        air_bnb = ae.DataSet()
-        with self.assertRaises(air_bnb.EmptyDatasetError):
-            air_bnb._cross_table_statistics("Staten Island", "Luxury Suite")
-        air_bnb.load_file()
-        with self.assertRaises(air_bnb.NoMatchingItems):
-            air_bnb._cross_table_statistics("Staten Island", "Luxury Suite")
-        with self.assertRaises(KeyError):
-            ae.currency_converter(100, "Galactic Credit Standard", "USD")
-
-    def test_return_values(self):
-        self.assertEqual(1.96, ae.currency_converter(1.26, "EUR", "CAD"))
-        self.assertEqual(6.00, ae.currency_converter(8.40, "CAD", "USD"))
-        self.assertEqual(4.00, ae.currency_converter(5, "USD", "GBP"))
-
-    def test_num_lines(self):
-        air_bnb = ae.DataSet()
-        self.assertEqual(48895, air_bnb.load_file())
-
-
-if __name__ == "__main__":
-    unittest.main()
+import contextlib
+import csv
+import http.client
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import assignment_eleven as ae
+import benchmark
+
+
+class TestAE(unittest.TestCase):
+
+    def test_invalid_inputs(self):
+        air_bnb = ae.DataSet()
+        with self.assertRaises(air_bnb.EmptyDatasetError):
+            air_bnb._cross_table_statistics("Staten Island", "Luxury Suite")
+        air_bnb.load_file()
+        with self.assertRaises(air_bnb.NoMatchingItems):
+            air_bnb._cross_table_statistics("Staten Island", "Luxury Suite")
+        with self.assertRaises(KeyError):
+            ae.currency_converter(100, "Galactic Credit Standard", "USD")
+
+    def test_return_values(self):
+        self.assertEqual(1.96, ae.currency_converter(1.26, "EUR", "CAD"))
+        self.assertEqual(6.00, ae.currency_converter(8.40, "CAD", "USD"))
+        self.assertEqual(4.00, ae.currency_converter(5, "USD", "GBP"))
+        self.assertEqual([4.0, None, 8.0],
+                         ae.convert_values([5, None, 10], "USD", "GBP"))
+        self.assertEqual("$ 12.50 ", ae.format_price(12.5, "USD", 6))
+        self.assertEqual("NZ$ 3.00", ae.format_price(3, "NZD", 6))
+
+    def test_num_lines(self):
+        air_bnb = ae.DataSet()
+        self.assertEqual(48895, air_bnb.load_file())
+
+    def test_column_store(self):
+        store = ae.ColumnStore()
+        for i in range(300):
+            store.append(f"Location {i}", "Private room", float(i))
+        location = ae.DataSet.Categories.LOCATION
+        self.assertEqual(300, len(store))
+        self.assertEqual('H', store.codes[location].typecode)
+        self.assertEqual(299, store.codes[location][299])
+        self.assertEqual("Location 299", store.code_labels[location][299])
+        self.assertEqual(299.0, store.prices[299])
+
+    def test_cell_aggregates(self):
+        store = ae.ColumnStore()
+        for location, price in (("Bronx", 10.0), ("Bronx", 30.0),
+                                ("Queens", 5.0)):
+            store.append(location, "Private room", price)
+        cells = store.cell_aggregates()
+        self.assertEqual(2, len(cells))
+        self.assertEqual((10.0, 20.0, 30.0), cells[(0, 0)].statistics())
+        merged = ae.CellAggregate()
+        for cell in cells.values():
+            merged.merge(cell)
+        self.assertEqual((5.0, 15.0, 30.0), merged.statistics())
+
+    def test_toggle_updates_field_statistics(self):
+        air_bnb = ae.DataSet()
+        air_bnb.load_file()
+        location = ae.DataSet.Categories.LOCATION
+        property_type = ae.DataSet.Categories.PROPERTY_TYPE
+        before = air_bnb._table_statistics(property_type, "Brooklyn")
+        air_bnb.toggle_active_label(property_type, "Shared room")
+        self.assertNotEqual(
+            before, air_bnb._table_statistics(property_type, "Brooklyn"))
+        air_bnb.toggle_active_label(property_type, "Shared room")
+        after = air_bnb._table_statistics(property_type, "Brooklyn")
+        for expected, actual in zip(before, after):
+            self.assertAlmostEqual(expected, actual)
+        for label in air_bnb.get_labels(location):
+            air_bnb.toggle_active_label(location, label)
+        self.assertIsNone(
+            air_bnb._table_statistics(location, "Private room"))
+
+    def test_sort_labels(self):
+        labels = ["Queens", "Bronx", "Manhattan", "Brooklyn"]
+        self.assertEqual(["Bronx", "Brooklyn", "Manhattan", "Queens"],
+                         ae.DataSet.sort_labels(labels))
+        self.assertEqual(["Manhattan", "Brooklyn"],
+                         ae.DataSet.sort_labels(labels, key=len,
+                                                descending=True, limit=2))
+        air_bnb = ae.DataSet()
+        air_bnb.load_file()
+        top = air_bnb.top_cells(ae.DataSet.Stats.AVG, k=3)
+        self.assertEqual(3, len(top))
+        self.assertEqual(sorted(top, key=lambda cell: -cell[2]), top)
+
+    def test_streaming_load(self):
+        air_bnb = ae.DataSet()
+        streamed = ae.DataSet()
+        progress = []
+        self.assertEqual(air_bnb.load_file(), streamed.load_file(
+            streaming=True, chunk_size=10000,
+            progress=lambda rows, position: progress.append(rows)))
+        self.assertEqual(0, len(streamed._data.prices))
+        self.assertEqual(len(air_bnb._data), progress[-1])
+        for location in air_bnb.get_labels(ae.DataSet.Categories.LOCATION):
+            self.assertEqual(
+                air_bnb._cross_table_statistics(location, "Private room"),
+                streamed._cross_table_statistics(location, "Private room"))
+        with self.assertRaisesRegex(ValueError, "streaming"):
+            streamed.query_cross_table(ae.DataSet.Stats.AVG,
+                                       price_range=(None, 100))
+
+    def test_parallel_load(self):
+        air_bnb = ae.DataSet()
+        parallel = ae.DataSet()
+        self.assertEqual(air_bnb.load_file(), parallel.load_file(workers=3,
+                                                          snapshot=False))
+        self.assertEqual(air_bnb._data.prices, parallel._data.prices)
+        location = ae.DataSet.Categories.LOCATION
+        self.assertEqual(air_bnb._data.codes[location],
+                         parallel._data.codes[location])
+        self.assertEqual(
+            air_bnb._cross_table_statistics("Queens", "Shared room"),
+            parallel._cross_table_statistics("Queens", "Shared room"))
+
+    def test_snapshot_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "listings.csv")
+            shutil.copyfile(ae.filename, source)
+            parsed = ae.DataSet()
+            lines = parsed.load_file(source)
+            self.assertTrue(os.path.exists(ae.snapshot_path(source)))
+            mapped = ae.DataSet()
+            self.assertEqual(lines, mapped.load_file(source))
+            self.assertIsInstance(mapped._data.prices, memoryview)
+            self.assertEqual(parsed._data.prices, mapped._data.prices)
+            self.assertEqual(parsed._data.price_index(),
+                             mapped._data._price_index)
+            with open(source, "a", newline="") as file:
+                file.write("0,Queens,Private room,55\r\n")
+            self.assertEqual(lines + 1, mapped.load_file(source))
+            self.assertNotIsInstance(mapped._data.prices, memoryview)
+
+    def test_scanner_quoted_fields(self):
+        contents = (b'id,neighbourhood_group,room_type,price,name\r\n'
+                    b'1,Bronx,Private room,50,"Cozy, quiet\r\nroom"\r\n'
+                    b'2,"Staten, ""Island""","Shared\nroom",70.5,Loft\r\n'
+                    b'3,Bronx,Private room,30,"A ""big"" one"')
+        store = ae.ColumnStore()
+        for location_codes, property_codes, prices, position in \
+                ae.scan_listing_chunks(contents, store):
+            store.extend_coded(location_codes, property_codes, prices)
+        location = ae.DataSet.Categories.LOCATION
+        property_type = ae.DataSet.Categories.PROPERTY_TYPE
+        self.assertEqual([50.0, 70.5, 30.0], list(store.prices))
+        self.assertEqual(["Bronx", 'Staten, "Island"'],
+                         store.code_labels[location])
+        self.assertEqual(["Private room", "Shared\nroom"],
+                         store.code_labels[property_type])
+        self.assertEqual([0, 1, 0], list(store.codes[location]))
+
+    def test_quantile_sketch(self):
+        exact = ae.QuantileSketch()
+        exact.extend([40.0, 10.0, 30.0, 20.0])
+        self.assertTrue(exact.is_exact())
+        self.assertEqual(25.0, exact.quantile(.5))
+        self.assertEqual(40.0, exact.quantile(1))
+        merged = ae.QuantileSketch()
+        for start in range(0, 10000, 1000):
+            part = ae.QuantileSketch()
+            part.extend(float(price) for price in range(start, start + 1000))
+            merged.merge(part)
+        self.assertFalse(merged.is_exact())
+        self.assertEqual(10000, merged.count)
+        self.assertAlmostEqual(5000, merged.quantile(.5), delta=50)
+        self.assertAlmostEqual(9900, merged.quantile(.99), delta=20)
+
+    def test_append_file(self):
+        air_bnb = ae.DataSet()
+        lines = air_bnb.load_file()
+        location = ae.DataSet.Categories.LOCATION
+        before = air_bnb._table_statistics(location, "Private room")
+        delta = io.StringIO("id,neighbourhood_group,room_type,price\n"
+                            "1,Hoboken,Private room,20000\n"
+                            "2,Hoboken,Private room,10000\n")
+        self.assertEqual(2, air_bnb.append_file(delta))
+        self.assertEqual(lines + 2, len(air_bnb._data))
+        self.assertIn("Hoboken", air_bnb.get_active_labels(location))
+        self.assertEqual((10000.0, 15000.0, 20000.0),
+                         air_bnb._cross_table_statistics("Hoboken",
+                                                         "Private room"))
+        after = air_bnb._table_statistics(location, "Private room")
+        self.assertEqual(20000.0, after[2])
+        self.assertGreater(after[1], before[1])
+
+        previous = air_bnb._data
+        air_bnb.append_file(io.StringIO(
+            "id,neighbourhood_group,room_type,price\n"
+            "3,Hoboken,Shared room,50\n"))
+        self.assertIs(previous.prices, air_bnb._data.prices)
+        self.assertEqual(lines + 3, len(air_bnb._data.prices))
+        previous._cells = None
+        self.assertEqual(lines + 2, sum(
+            cell.count for cell in previous.cell_aggregates().values()))
+        stale = previous.copy()
+        self.assertIsNot(previous.prices, stale.prices)
+        self.assertEqual(lines + 2, len(stale.prices))
+
+    def test_generate_listings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first = os.path.join(directory, "first.csv")
+            second = os.path.join(directory, "second.csv")
+            benchmark.generate_listings(first, 500, locations=300)
+            benchmark.generate_listings(second, 500, locations=300)
+            with open(first, "rb") as file_one, open(second, "rb") as file_two:
+                self.assertEqual(file_one.read(), file_two.read())
+            air_bnb = ae.DataSet()
+            self.assertEqual(500, air_bnb.load_file(first))
+            self.assertIn("Borough 300", benchmark.make_labels(
+                benchmark.boroughs, 300, "Borough"))
+
+    def test_instrumentation(self):
+        air_bnb = ae.DataSet()
+        self.assertIsNone(air_bnb.instrumentation_stats())
+        air_bnb.enable_instrumentation()
+        lines = air_bnb.load_file(snapshot=False)
+        air_bnb._cross_table_statistics("Bronx", "Private room")
+        air_bnb._cross_table_statistics("Queens", "Private room")
+        stats = air_bnb.instrumentation_stats()
+        self.assertEqual(1, stats["timers"]["load_file"]["calls"])
+        self.assertEqual(2, stats["counters"]["cells_computed"])
+        self.assertEqual(lines, stats["counters"]["rows_loaded"])
+        self.assertEqual(1, stats["counters"]["cell_cache_hits"])
+        air_bnb.display_field_table(ae.DataSet.Categories.LOCATION,
+                                    file=io.StringIO())
+        stats = air_bnb.instrumentation_stats()
+        self.assertEqual(1, stats["timers"]["display_field_table"]["calls"])
+        self.assertEqual(1, stats["timers"]["query_field_table"]["calls"])
+        air_bnb.disable_instrumentation()
+        self.assertIsNone(air_bnb.instrumentation_stats())
+
+    def test_query_api(self):
+        air_bnb = ae.DataSet()
+        with self.assertRaises(ae.DataSet.EmptyDatasetError):
+            air_bnb.query_field_table(ae.DataSet.Categories.LOCATION)
+        air_bnb.load_file()
+        location = ae.DataSet.Categories.LOCATION
+        property_type = ae.DataSet.Categories.PROPERTY_TYPE
+        table = air_bnb.query_field_table(
+            location, filters={property_type: ["Private room"]})
+        self.assertEqual(len(air_bnb.get_labels(location)),
+                         len(table["rows"]))
+        self.assertEqual(["Private room"], table["filters"])
+        # The session filters are left as they were.
+        self.assertEqual(3, len(air_bnb.get_active_labels(property_type)))
+        air_bnb.toggle_active_label(property_type, "Entire home/apt")
+        air_bnb.toggle_active_label(property_type, "Shared room")
+        self.assertEqual(table, air_bnb.query_field_table(location))
+        cross = air_bnb.query_cross_table(
+            ae.DataSet.Stats.AVG, filters={location: ["Bronx"]})
+        self.assertEqual(1, len(cross["rows"]))
+        self.assertAlmostEqual(
+            air_bnb._cross_table_statistics("Bronx", "Private room")[1],
+            cross["rows"][0][1 + cross["columns"].index("Private room")])
+        results = list(ae.run_batch(air_bnb, [
+            {"type": "labels", "category": "PROPERTY_TYPE"},
+            {"type": "cross_table", "filters": {"LOCATION": ["Nowhere"]}},
+            {"type": "cross_table", "price_range": 5},
+            {"type": "labels"}]))
+        self.assertEqual(["Private room"], results[0]["result"]["active"])
+        self.assertIn("error", results[1])
+        self.assertIn("error", results[2])
+        self.assertIn("result", results[3])
+
+    def test_renderers(self):
+        air_bnb = ae.DataSet()
+        air_bnb.load_file()
+        stat = ae.DataSet.Stats.AVG
+        printed = io.StringIO()
+        with contextlib.redirect_stdout(printed):
+            air_bnb.display_cross_table(stat)
+        written = io.StringIO()
+        air_bnb.display_cross_table(stat, file=written,
+                                    renderer=ae.TextRenderer(True))
+        self.assertEqual(printed.getvalue(), written.getvalue())
+
+        table = air_bnb.query_cross_table(stat)
+        as_csv = io.StringIO()
+        ae.CSVRenderer().render(table, as_csv)
+        lines = list(csv.reader(io.StringIO(as_csv.getvalue())))
+        self.assertEqual(table["header"], lines[0])
+        self.assertEqual(len(table["rows"]), len(lines) - 1)
+        as_json = io.StringIO()
+        ae.JSONRenderer(stream_rows=True).render(table, as_json)
+        self.assertEqual(json.loads(json.dumps(table)),
+                         json.loads(as_json.getvalue()))
+
+    def test_bitmap_selection(self):
+        location = ae.DataSet.Categories.LOCATION
+        property_type = ae.DataSet.Categories.PROPERTY_TYPE
+        store = ae.ColumnStore()
+        store.extend([("Bronx", "Private room", 50.0),
+                      ("Queens", "Shared room", 70.0)])
+        bronx = store.label_codes[location]["Bronx"]
+        self.assertEqual(1, store.label_bitmaps(location)[bronx])
+        store.extend([("Bronx", "Shared room", 90.0),
+                      ("Harlem", "Private room", 30.0)])
+        self.assertEqual(len(store.code_labels[location]),
+                         len(store.label_bitmaps(location)))
+        shared = store.label_codes[property_type]["Shared room"]
+        selection = store.select({location: {bronx},
+                                  property_type: {shared}})
+        self.assertEqual(0b101, store.label_bitmaps(location)[bronx])
+        self.assertEqual([2], list(store.selected_rows(selection)))
+        self.assertEqual([90.0], list(store.selected_prices(selection)))
+        wide = ae.ColumnStore._label_bitmaps(ae.array('H', [300, 1, 300]),
+                                             302)
+        self.assertEqual([0, 0b10, 0b101, 0],
+                         [wide[0], wide[1], wide[300], wide[301]])
+
+        air_bnb = ae.DataSet()
+        air_bnb.load_file()
+        filters = {location: ["Bronx", "Queens"],
+                   property_type: ["Private room"]}
+        selected = air_bnb.query_selection(filters=filters)["rows"][0]
+        expected = ae.CellAggregate()
+        for name in filters[location]:
+            statistics = air_bnb._cross_table_statistics(name,
+                                                         "Private room")
+            count = len(list(air_bnb._data.selected_prices(
+                air_bnb.select_rows({location: [name],
+                                     property_type: ["Private room"]}))))
+            expected.merge(ae.CellAggregate(
+                count, statistics[1] * count, statistics[0], statistics[2]))
+        self.assertEqual(expected.count, selected[0])
+        for value, wanted in zip(selected[1:], expected.statistics()):
+            self.assertAlmostEqual(wanted, value)
+
+    def test_data_cube(self):
+        dimension = ae.Dimension("minimum_nights", [1, 7, 30])
+        self.assertEqual(["<1", "1-7", "7-30", "30+"], dimension.labels)
+        self.assertEqual("7-30", dimension.label("7"))
+        self.assertEqual("N/A", dimension.label(""))
+
+        air_bnb = ae.DataSet()
+        with self.assertRaises(ValueError):
+            air_bnb.load_file(dimensions=ae.make_dimensions(["host"]))
+        air_bnb.load_file(dimensions=ae.make_dimensions(
+            ["neighbourhood_group", "room_type", "minimum_nights"]))
+        table = air_bnb.query_cube(
+            ["neighbourhood_group"], where={"room_type": ["Shared room"]})
+        for borough, count, minimum, average, maximum in table["rows"]:
+            self.assertEqual(
+                (minimum, maximum),
+                air_bnb._cross_table_statistics(borough, "Shared room")[::2])
+            self.assertAlmostEqual(
+                air_bnb._cross_table_statistics(borough, "Shared room")[1],
+                average)
+        nights = air_bnb.query_cube(["minimum_nights"])
+        self.assertEqual(len(air_bnb._data),
+                         sum(row[1] for row in nights["rows"]))
+        with self.assertRaises(ValueError):
+            air_bnb.query_cube(["room_type"], (ae.DataSet.Stats.MEDIAN,))
+
+        air_bnb.append_file(io.StringIO(
+            "id,neighbourhood_group,room_type,price,minimum_nights\n"
+            "1,Hoboken,Private room,200,3\n"))
+        self.assertEqual(
+            [("Hoboken", "2-4", 1, 200.0)],
+            [row[:4] for row in air_bnb.query_cube(
+                ["neighbourhood_group", "minimum_nights"],
+                where={"neighbourhood_group": ["Hoboken"]})["rows"]])
+
+    def test_price_ranges(self):
+        air_bnb = ae.DataSet()
+        air_bnb.load_file(snapshot=False)
+        location = ae.DataSet.Categories.LOCATION
+        property_type = ae.DataSet.Categories.PROPERTY_TYPE
+        brooklyn = air_bnb.select_rows({location: ["Brooklyn"],
+                                        property_type: ["Private room"]})
+        prices = list(air_bnb._data.selected_prices(brooklyn))
+        in_range = [price for price in prices if 50 <= price <= 120]
+        self.assertEqual(len(in_range), air_bnb.count_in_range(
+            "Brooklyn", "Private room", 50, 120))
+        self.assertEqual(len(prices), air_bnb.count_in_range(
+            "Brooklyn", "Private room"))
+        self.assertEqual(0, air_bnb.count_in_range("Brooklyn", "Castle"))
+
+        capped = [price for price in prices if price < 10000]
+        table = air_bnb.query_cross_table(ae.DataSet.Stats.AVG,
+                                          price_range=(None, 9999))
+        row = next(row for row in table["rows"] if row[0] == "Brooklyn")
+        self.assertAlmostEqual(
+            sum(capped) / len(capped),
+            row[1 + table["columns"].index("Private room")])
+        field = air_bnb.query_field_table(
+            property_type, (ae.DataSet.Stats.MAX,), price_range=(None, 9999))
+        self.assertTrue(all(value < 10000 for _, value in field["rows"]))
+        nothing = air_bnb.query_field_table(property_type,
+                                            price_range=(1e6, None))
+        self.assertTrue(all(value is None for row in nothing["rows"]
+                            for value in row[1:]))
+
+        canadian = air_bnb.query_field_table(
+            property_type, (ae.DataSet.Stats.MAX,), currency="CAD",
+            price_range=(None, 500))
+        self.assertTrue(all(value <= 500 for _, value in canadian["rows"]))
+        high = 500 * ae.rate_matrix[("CAD", "USD")]
+        self.assertEqual(
+            len([price for price in prices if price <= high]),
+            air_bnb.count_in_range("Brooklyn", "Private room", None, 500,
+                                   "CAD"))
+
+        air_bnb.enable_instrumentation()
+        air_bnb.append_file(io.StringIO(
+            "id,neighbourhood_group,room_type,price\n"
+            "1,Brooklyn,Private room,75\n"))
+        self.assertEqual(len(in_range) + 1, air_bnb.count_in_range(
+            "Brooklyn", "Private room", 50, 120))
+        self.assertNotIn("price_index_rows",
+                         air_bnb.instrumentation_stats()["counters"])
+        rebuilt = air_bnb._data.copy()
+        rebuilt._price_index = None
+        self.assertEqual(rebuilt.price_index(), air_bnb._data.price_index())
+
+    def test_histograms(self):
+        self.assertEqual([0.0, 25.0, 50.0, 75.0, 100.0],
+                         ae.histogram_edges(0, 100, 4))
+        self.assertEqual([10, 100.0, 1000],
+                         ae.histogram_edges(10, 1000, 2, log=True))
+        with self.assertRaises(ValueError):
+            ae.histogram_edges(0, 100, 4, log=True)
+
+        air_bnb = ae.DataSet()
+        air_bnb.load_file()
+        location = ae.DataSet.Categories.LOCATION
+        property_type = ae.DataSet.Categories.PROPERTY_TYPE
+        edges = [50, 100, 10000]
+        table = air_bnb.query_histogram(edges, currency="USD")
+        self.assertEqual(["<50", "50-100", "100-10000", "10000+"],
+                         table["bins"])
+        row = next(row for row in table["rows"]
+                   if row[:2] == ("Bronx", "Private room"))
+        self.assertEqual(air_bnb.count_in_range("Bronx", "Private room"),
+                         sum(row[2:]))
+        self.assertEqual(air_bnb.count_in_range("Bronx", "Private room",
+                                                50, 99.99), row[3])
+
+        air_bnb.toggle_active_label(property_type, "Shared room")
+        merged = air_bnb.query_histogram(edges, location, currency="USD")
+        bronx = next(row for row in merged["rows"] if row[0] == "Bronx")
+        self.assertEqual(
+            sum(air_bnb.count_in_range("Bronx", name)
+                for name in air_bnb.get_active_labels(property_type)),
+            sum(bronx[1:]))
+
+        # Bucketing the price column gives the counts of the index.
+        unindexed = air_bnb._data.copy()
+        unindexed._price_index = None
+        self.assertEqual(unindexed.cell_histograms(edges),
+                         air_bnb._data.cell_histograms(edges))
+
+        full = ae.DataSet()
+        full.load_file()
+        streamed = ae.DataSet()
+        streamed.load_file(streaming=True, histogram_edges=edges)
+        before = streamed.query_histogram(edges, location, currency="USD")
+        self.assertEqual(
+            full.query_histogram(edges, location, currency="USD"), before)
+        with self.assertRaisesRegex(ValueError, "histogram_edges"):
+            streamed.query_histogram([10, 20], currency="USD")
+        for dataset in (full, streamed):
+            dataset.append_file(io.StringIO(
+                "id,neighbourhood_group,room_type,price\n"
+                "1,Bronx,Shared room,75\n"))
+        after = streamed.query_histogram(edges, location, currency="USD")
+        self.assertEqual(
+            full.query_histogram(edges, location, currency="USD"), after)
+        self.assertEqual(before["rows"][0][2] + 1, after["rows"][0][2])
+
+    def test_sessions(self):
+        location = ae.DataSet.Categories.LOCATION
+        air_bnb = ae.DataSet()
+        air_bnb.load_file()
+        session = air_bnb.session()
+        session.toggle_active_label(location, "Queens")
+        self.assertIn("Queens", air_bnb.get_active_labels(location))
+        before = session.query_selection()["rows"][0][0]
+
+        errors = []
+        done = threading.Event()
+
+        def read():
+            reader = air_bnb.session()
+            try:
+                while not done.is_set():
+                    rows = len(reader._data)
+                    total = sum(row[0] for row in [
+                        reader.query_selection(filters={location: [label]})[
+                            "rows"][0]
+                        for label in reader.get_labels(location)])
+                    self.assertEqual(rows, total)
+                    reader.refresh()
+            except Exception as error:
+                errors.append(error)
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        for number in range(5):
+            air_bnb.append_file(io.StringIO(
+                "id,neighbourhood_group,room_type,price\n"
+                f"{number},Hoboken,Private room,100\n"))
+        done.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual([], errors)
+
+        self.assertEqual(before, session.query_selection()["rows"][0][0])
+        self.assertTrue(session.refresh())
+        self.assertEqual(air_bnb.version, session.version)
+        self.assertNotIn("Queens", session.get_active_labels(location))
+        self.assertIn("Hoboken", session.get_active_labels(location))
+        self.assertEqual(before + 5,
+                         session.query_selection()["rows"][0][0])
+
+    def test_background_load(self):
+        air_bnb = ae.DataSet()
+        load = air_bnb.load_file_in_background(snapshot=False)
+        lines = load.result(timeout=60)
+        self.assertTrue(load.done())
+        self.assertEqual(lines, load.rows)
+        self.assertEqual(lines, len(air_bnb._data))
+
+        delta = io.StringIO("id,neighbourhood_group,room_type,price\n"
+                            "1,Hoboken,Private room,100\n")
+        load = ae.BackgroundLoad(air_bnb, delta, {})
+        load.cancel()
+        with self.assertRaises(ae.DataSet.LoadCancelled):
+            load.start().result(timeout=60)
+        self.assertEqual(lines, len(air_bnb._data))
+        self.assertNotIn("Hoboken", air_bnb.get_labels(
+            ae.DataSet.Categories.LOCATION))
+
+    def test_sqlite_backend(self):
+        memory = ae.DataSet()
+        memory.load_file(snapshot=False)
+        with tempfile.TemporaryDirectory() as directory:
+            database = os.path.join(directory, "listings.db")
+            air_bnb = ae.DataSet()
+            air_bnb.load_file(database=database)
+            self.assertIsInstance(air_bnb._data, ae.SQLiteStore)
+            self.assertEqual(len(memory._data), len(air_bnb._data))
+            for stat in (ae.DataSet.Stats.AVG, ae.DataSet.Stats.MAX):
+                expected = memory.query_cross_table(stat)
+                actual = air_bnb.query_cross_table(stat)
+                self.assertEqual(expected["columns"], actual["columns"])
+                for expected_row, row in zip(expected["rows"],
+                                             actual["rows"]):
+                    self.assertEqual(expected_row[0], row[0])
+                    for value, other in zip(expected_row[1:], row[1:]):
+                        self.assertAlmostEqual(value, other)
+            self.assertEqual(
+                memory.count_in_range("Brooklyn", "Private room", 50, 120),
+                air_bnb.count_in_range("Brooklyn", "Private room", 50, 120))
+            edges = [50, 100, 10000]
+            self.assertEqual(
+                list(memory.query_histogram(edges, currency="USD")["rows"]),
+                list(air_bnb.query_histogram(edges, currency="USD")["rows"]))
+
+            session = air_bnb.session()
+            air_bnb.append_file(io.StringIO(
+                "id,neighbourhood_group,room_type,price\n"
+                "1,Hoboken,Private room,80\n"))
+            self.assertEqual(1, air_bnb.count_in_range("Hoboken",
+                                                       "Private room"))
+            self.assertEqual(len(memory._data) + 1, len(air_bnb._data))
+            self.assertEqual(len(memory._data), len(session._data))
+            self.assertEqual(0, session.count_in_range("Hoboken",
+                                                       "Private room"))
+
+            def tables():
+                with contextlib.closing(
+                        ae.sqlite3.connect(database)) as connection:
+                    return {name for (name,) in connection.execute(
+                        "SELECT name FROM sqlite_master "
+                        "WHERE type = 'table'")}
+
+            other = ae.DataSet()
+            other.load_file(io.StringIO(
+                "id,neighbourhood_group,room_type,price\n"
+                "1,Hoboken,Shared room,40\n"), database=database)
+            old_table = other._data.table
+            other.load_file(io.StringIO(
+                "id,neighbourhood_group,room_type,price\n"
+                "1,Hoboken,Shared room,50\n"), database=database)
+            self.assertIn(air_bnb._data.table, tables())
+            self.assertIn(session._data.table, tables())
+            self.assertNotIn(old_table, tables())
+            self.assertEqual(len(memory._data) + 1, len(air_bnb._data))
+
+    def test_approximate_queries(self):
+        sample = ae.CellSample(100, seed=1)
+        sample.extend(range(10))
+        self.assertTrue(sample.is_exact())
+        self.assertEqual((4.5, 4.5, 4.5), sample.interval(.5))
+        sample.extend(range(10, 10000))
+        self.assertEqual(100, len(sample.values))
+        self.assertEqual(10000, sample.count)
+        low, estimate, high = sample.interval()
+        self.assertLess(low, estimate)
+        self.assertLess(estimate, high)
+        self.assertLess(low, 4999.5)
+        self.assertGreater(high, 4999.5)
+        other = ae.CellSample(100, seed=2)
+        other.extend(range(10000, 30000))
+        sample.merge(other)
+        self.assertEqual(30000, sample.count)
+        self.assertEqual(100, len(sample.values))
+
+        air_bnb = ae.DataSet()
+        air_bnb.load_file(snapshot=False, sample_size=200)
+        air_bnb.approximate = True
+        exact = air_bnb.query_cross_table(ae.DataSet.Stats.AVG,
+                                          approximate=False)
+        self.assertNotIn("intervals", exact)
+        table = air_bnb.query_cross_table(ae.DataSet.Stats.AVG,
+                                          currency="USD")
+        self.assertEqual(200, table["sample_size"])
+        covered = 0
+        for exact_row, row, intervals in zip(exact["rows"], table["rows"],
+                                             table["intervals"]):
+            for value, estimate, interval in zip(exact_row[1:], row[1:],
+                                                 intervals):
+                self.assertEqual(value is None, interval is None)
+                if interval is not None:
+                    self.assertLessEqual(interval[0], estimate)
+                    self.assertLessEqual(estimate, interval[1])
+                    covered += interval[0] <= value <= interval[1]
+        self.assertGreaterEqual(covered, len(exact["rows"]) * 2)
+
+        field = air_bnb.query_field_table(
+            ae.DataSet.Categories.LOCATION,
+            (ae.DataSet.Stats.MIN, ae.DataSet.Stats.MEDIAN),
+            currency="USD", price_range=(None, 500))
+        for row, (minimum, median) in zip(field["rows"],
+                                          field["intervals"]):
+            self.assertIsNone(minimum)
+            self.assertLessEqual(median[0], row[2])
+            self.assertLessEqual(row[2], median[1])
+            self.assertLessEqual(median[1], 500)
+        output = io.StringIO()
+        air_bnb.display_field_table(ae.DataSet.Categories.LOCATION,
+                                    file=output)
+        self.assertIn("at 95% confidence", output.getvalue())
+
+        lines = ["id,neighbourhood_group,room_type,price"]
+        lines += [f"{row},Manhattan,Entire home/apt,{250 + row % 101}"
+                  for row in range(20000)]
+        lines += [f"{row},Manhattan,Shared room,{25 + row % 51}"
+                  for row in range(2000)]
+        skewed = ae.DataSet()
+        skewed.load_file(io.StringIO("\n".join(lines) + "\n"),
+                         snapshot=False, sample_size=50)
+        stats = (ae.DataSet.Stats.AVG, ae.DataSet.Stats.MEDIAN)
+        exact = skewed.query_field_table(ae.DataSet.Categories.LOCATION,
+                                         stats, currency="USD")
+        field = skewed.query_field_table(ae.DataSet.Categories.LOCATION,
+                                         stats, currency="USD",
+                                         approximate=True)
+        for value, interval in zip(exact["rows"][0][1:],
+                                   field["intervals"][0]):
+            self.assertLessEqual(interval[0], value)
+            self.assertLessEqual(value, interval[1])
+
+    def test_lazy_load(self):
+        eager = ae.DataSet()
+        eager.load_file(snapshot=False)
+        air_bnb = ae.DataSet()
+        air_bnb.enable_instrumentation()
+        lines = air_bnb.load_file(
+            snapshot=False, lazy=True,
+            dimensions=ae.make_dimensions(["room_type"]))
+        self.assertEqual(len(eager._data), lines)
+        location = ae.DataSet.Categories.LOCATION
+        self.assertEqual(eager.get_labels(location),
+                         air_bnb.get_labels(location))
+        air_bnb.toggle_active_label(location, "Bronx")
+        air_bnb.toggle_active_label(location, "Bronx")
+        counters = air_bnb.instrumentation_stats()["counters"]
+        self.assertNotIn("prices_parsed", counters)
+        self.assertTrue(air_bnb.cube._pending)
+
+        self.assertEqual(eager.query_cross_table(ae.DataSet.Stats.MEDIAN),
+                         air_bnb.query_cross_table(ae.DataSet.Stats.MEDIAN))
+        counters = air_bnb.instrumentation_stats()["counters"]
+        self.assertEqual(lines, counters["prices_parsed"])
+        self.assertEqual(lines, sum(row[1] for row in air_bnb.query_cube(
+            ["room_type"])["rows"]))
+        self.assertFalse(air_bnb.cube._pending)
+
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, "listings.csv")
+            shutil.copyfile(ae.filename, source)
+            air_bnb.load_file(source, lazy=True)
+            air_bnb.query_cross_table(ae.DataSet.Stats.AVG)
+            self.assertFalse(os.path.exists(ae.snapshot_path(source)))
+            air_bnb.finish_load()
+            self.assertTrue(os.path.exists(ae.snapshot_path(source)))
+            with open(source, "a", newline="") as file:
+                file.write("0,Queens,Private room,12.5\r\n"
+                           "0,Queens,Private room,free\r\n")
+            load = air_bnb.load_file_in_background(source, lazy=True)
+            with self.assertRaises(ValueError):
+                load.result(timeout=60)
+            self.assertEqual(lines, len(air_bnb._data))
+            self.assertEqual(lines + 2, air_bnb.load_file(source, lazy=True))
+            with self.assertRaises(ValueError):
+                air_bnb.query_cross_table(ae.DataSet.Stats.AVG)
+
+    def test_query_server(self):
+        air_bnb = ae.DataSet()
+        air_bnb.load_file()
+        server = ae.QueryServer(("127.0.0.1", 0), air_bnb, workers=2,
+                                quiet=True)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            connection = http.client.HTTPConnection(
+                *server.server_address[:2], timeout=10)
+            path = "/field_table?rows=LOCATION&PROPERTY_TYPE=Private+room"
+            bodies = []
+            for _ in range(2):
+                connection.request("GET", path)
+                response = connection.getresponse()
+                self.assertEqual(200, response.status)
+                bodies.append(json.loads(response.read()))
+            self.assertEqual(bodies[0], bodies[1])
+            self.assertEqual(1, server.cache.hits)
+            expected = ae.run_query(air_bnb, {
+                "type": "field_table", "rows": "LOCATION",
+                "filters": {"PROPERTY_TYPE": ["Private room"]}})
+            self.assertEqual(json.loads(json.dumps(expected)),
+                             bodies[0]["result"])
+
+            connection.request("POST", "/query", json.dumps(
+                {"type": "cross_table", "filters": {"LOCATION": ["Mars"]}}))
+            response = connection.getresponse()
+            self.assertEqual(400, response.status)
+            self.assertIn("Mars", json.loads(response.read())["error"])
+
+            idle = [http.client.HTTPConnection(*server.server_address[:2],
+                                               timeout=10) for _ in range(2)]
+            for other in idle:
+                other.request("GET", "/status")
+                other.getresponse().read()
+            connection.request("GET", "/labels?category=PROPERTY_TYPE")
+            self.assertEqual(200, connection.getresponse().status)
+            for other in idle:
+                other.close()
+            connection.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
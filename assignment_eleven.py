@@ -1,768 +1,4981 @@
-""" This program asks the user for their name, politely greets them,
-asks them for their home currency, asks them to enter a header for the
-menu, prints a currency table, then provides them with a menu with the
-copyright and header at the top. The user is prompted to input an
-option, and the program provides an unique polite message to the user's
-response accordingly.
-"""
-import copy
-import csv
-from enum import Enum
-
-conversions = {
-    "USD": 1,
-    "EUR": .9,
-    "CAD": 1.4,
-    "GBP": .8,
-    "CHF": .95,
-    "NZD": 1.66,
-    "AUD": 1.62,
-    "JPY": 107.92
-}
-home_currency = ""
-filename = './AB_NYC_2019.csv'
-
-
-class DataSet:
-    copyright = "No copyright has been set."
-
-    class Categories(Enum):
-        LOCATION = 0
-        PROPERTY_TYPE = 1
-
-    class Stats(Enum):
-        MIN = 2
-        AVG = 1
-        MAX = 3
-
-    def __init__(self, header=""):
-        try:
-            self.header = header
-        except ValueError:
-            self.header = ""
-        self._data = None
-        self._labels = {DataSet.Categories.LOCATION: set(),
-                        DataSet.Categories.PROPERTY_TYPE: set()}
-        self._active_labels = {DataSet.Categories.LOCATION: set(),
-                               DataSet.Categories.PROPERTY_TYPE: set()}
-
-    def get_labels(self, category: Categories):
-        return list(self._labels[category])
-
-    def get_active_labels(self, category: Categories):
-        return list(self._active_labels[category])
-
-    @staticmethod
-    def bubble_sort(list_to_sort: list):
-        """ Recursively sort the parameter list_to_sort. """
-        list_being_sorted = copy.deepcopy(list_to_sort)
-
-        length = len(list_being_sorted)
-        if length == 1:
-            return list_being_sorted
-
-        for i in range(length):
-            for j in range(0, length - 1):
-                if list_being_sorted[j] > list_being_sorted[j + 1]:
-                    (list_being_sorted[j], list_being_sorted[j + 1]) = \
-                        (list_being_sorted[j + 1], list_being_sorted[j])
-
-        sorted_list = DataSet.bubble_sort(list_being_sorted[0:length - 1])
-        largest = list_being_sorted[-1]
-        sorted_list.append(largest)
-
-        return sorted_list
-
-    @property
-    def header(self):
-        return self._header
-
-    @header.setter
-    def header(self, header: str):
-        if type(header) == str and len(header) <= 30:
-            self._header = header
-        else:
-            self._header = ""
-            raise ValueError
-
-    class EmptyDatasetError(Exception):
-        pass
-
-    class NoMatchingItems(Exception):
-        pass
-
-    def _initialize_sets(self):
-        """ Populate the dictionaries _labels and _active_labels with
-        the appropriate labels from self._data.
-        """
-        if self._data is None:
-            raise DataSet.EmptyDatasetError
-
-        location_set = {unit_info[0] for unit_info in self._data}
-        property_type_set = {unit_info[1] for unit_info in self._data}
-        self._labels = {DataSet.Categories.LOCATION: location_set,
-                        DataSet.Categories.PROPERTY_TYPE: property_type_set}
-        self._active_labels = copy.deepcopy(self._labels)
-
-    def _cross_table_statistics(self, descriptor_one: str,
-                                descriptor_two: str):
-        """ Return the minimum, average, and maximum rent of the
-        borough and property type, if there are valid entries with a
-        match.
-
-        Key Arguments:
-            descriptor_one (str): represents the borough type
-            descriptor_two (str): represents the property type
-        """
-        if self._data is None:
-            raise DataSet.EmptyDatasetError
-
-        rent_list = [descriptor[2] for descriptor in self._data
-                     if descriptor_one == descriptor[0] and
-                     descriptor_two == descriptor[1]]
-
-        if not rent_list:
-            raise DataSet.NoMatchingItems
-
-        min_rent = float(min(rent_list))
-        max_rent = float(max(rent_list))
-        avg_rent = float(sum(rent_list) / len(rent_list))
-
-        return min_rent, avg_rent, max_rent,
-
-    def print_cross_table(self, location_labels: list,
-                          property_labels: list, num: int):
-        """ Creates the table under the header of the cross table.
-
-        Key Arguments:
-            location_labels (list): a list containing the location
-            labels
-            property_labels (list): a list of the property labels
-            num (int): the index corresponding to the element in the
-            tuple based on whether we would like to the minimum,
-            maximum, or average rent
-        """
-        for location_label in location_labels:
-            print(f"{location_label:20}", end='')
-            for property_type in property_labels:
-                try:
-                    property_price = self._cross_table_statistics(
-                        location_label, property_type
-                    )
-                    avg_price = property_price[num]
-                    print(f"$ {avg_price:<20.2f}", end='')
-                except DataSet.NoMatchingItems:
-                    not_applicable = "N/A"
-                    print(f"$ {not_applicable:20}", end='')
-                continue
-            print()
-
-    def display_cross_table(self, stat: Stats):
-        """ Print a table of rates for each borough and property type.
-        The values will depend on the input for the parameter stat.
-
-        Key Arguments:
-            stat (Stats): a Stats datatype that determines whether the
-            average, minimum, or maximum rates will be shown
-        """
-        if self._data is None:
-            raise DataSet.EmptyDatasetError
-
-        location_labels = list(self._labels[DataSet.Categories.LOCATION])
-        property_labels = list(self._labels[DataSet.Categories.PROPERTY_TYPE])
-
-        sorted_location_labels = DataSet.bubble_sort(location_labels)
-        sorted_property_labels = DataSet.bubble_sort(property_labels)
-
-        print(f"                    ", end='')
-        for property_type in sorted_property_labels:
-            print(f"{property_type:<22}", end='')
-        print()
-
-        if stat == DataSet.Stats.AVG:
-            self.print_cross_table(sorted_location_labels,
-                                   sorted_property_labels, 1)
-        elif stat == DataSet.Stats.MIN:
-            self.print_cross_table(sorted_location_labels,
-                                   sorted_property_labels, 0)
-        elif stat == DataSet.Stats.MAX:
-            self.print_cross_table(sorted_location_labels,
-                                   sorted_property_labels, 2)
-
-    def _table_statistics(self, row_category: Categories, label: str):
-        """ Given a category from the Categories Enum, the string
-        matching one of the items in the category, calculate the
-        minimum, maximum, and average rent of the properties in that
-        category.
-
-        Key Arguments:
-            row_category (Categories): a category from the Categories
-            Enum
-            label (str): the label we would like to find the minimum,
-            maximum, and average rent values for
-        """
-        if row_category == DataSet.Categories.PROPERTY_TYPE:
-            filtered_rent_list = [descriptor[2] for descriptor in self._data
-                                  if (label == descriptor[0]) and
-                                  (descriptor[1] in
-                                   self.get_active_labels(row_category))]
-
-            if not filtered_rent_list:
-                return None
-            else:
-                min_rent = float(min(filtered_rent_list))
-                max_rent = float(max(filtered_rent_list))
-                avg_rent = float(
-                    sum(filtered_rent_list) / len(filtered_rent_list)
-                )
-                return min_rent, avg_rent, max_rent,
-        elif row_category == DataSet.Categories.LOCATION:
-            filtered_rent_list = [descriptor[2] for descriptor in self._data
-                                  if (label == descriptor[1]) and
-                                  (descriptor[0] in
-                                   self.get_active_labels(row_category))]
-
-            if not filtered_rent_list:
-                return None
-            else:
-                min_rent = float(min(filtered_rent_list))
-                max_rent = float(max(filtered_rent_list))
-                avg_rent = float(
-                    sum(filtered_rent_list) / len(filtered_rent_list))
-                return min_rent, avg_rent, max_rent,
-
-    def display_field_table(self, rows: Categories):
-        """ Display a table of the minimum, maximum, and average rent
-        for each item in the row category (the data should be filtered).
-
-        Key Arguments:
-            rows (Categories): the row category from Categories Enum
-        """
-        if self._data is None:
-            raise DataSet.EmptyDatasetError
-
-        active_location_labels = list(
-            self.get_active_labels(DataSet.Categories.LOCATION)
-        )
-        active_property_labels = list(
-            self.get_active_labels(DataSet.Categories.PROPERTY_TYPE)
-        )
-
-        sorted_active_location = DataSet.bubble_sort(active_location_labels)
-        sorted_active_property = DataSet.bubble_sort(active_property_labels)
-
-        given_labels = list(self.get_active_labels(rows))
-        sorted_given_labels = DataSet.bubble_sort(given_labels)
-
-        if rows == DataSet.Categories.LOCATION:
-            print("The following data are from properties matching these "
-                  "criteria: ")
-            for active_label in sorted_active_property:
-                print(f"- {active_label}")
-        elif rows == DataSet.Categories.PROPERTY_TYPE:
-            print("The following data are from properties matching these "
-                  "criteria: ")
-            for active_label in sorted_active_location:
-                print(f"- {active_label}")
-
-        minimum_string = "Minimum"
-        average_string = "Average"
-        maximum_string = "Maximum"
-        print(f"        {minimum_string:>18}   {average_string:>18} "
-              f"  {maximum_string:>18}", end='')
-        print()
-        for label in sorted_given_labels:
-            if rows == DataSet.Categories.LOCATION:
-                prices = self._table_statistics(
-                    DataSet.Categories.PROPERTY_TYPE,
-                    label
-                )
-                if prices is None:
-                    na_string = "N/A"
-                    print(
-                        f"{label:<18} {na_string:<18} "
-                        f"  {na_string:<18}   {na_string:<18}"
-                    )
-                else:
-                    print(
-                        f"{label:<18} $ {prices[0]:<18.2f} "
-                        f"$ {prices[1]:<18.2f} $ {prices[2]:<18.2f}"
-                    )
-            elif rows == DataSet.Categories.PROPERTY_TYPE:
-                prices = self._table_statistics(
-                    DataSet.Categories.LOCATION,
-                    label
-                )
-                if prices is None:
-                    na_string = "N/A"
-                    print(
-                        f"{label:<18} {na_string:<18} "
-                        f"{na_string:<18} {na_string:<18}"
-                    )
-                else:
-                    print(
-                        f"{label:<18} $ {prices[0]:<18.2f} "
-                        f"$ {prices[1]:<18.2f} $ {prices[2]:<18.2f}"
-                    )
-
-    def load_file(self):
-        """ Load data from file and initialize labels. """
-        with open(filename, 'r', newline='') as file:
-            csv_reader = csv.reader(file)
-            data_list = [(row[1], row[2], float(row[3])) for row in csv_reader
-                         if row[3] != 'price']
-            file_length = len(data_list)
-        self._data = data_list
-        self._initialize_sets()
-        return file_length
-
-    def toggle_active_label(self, category: Categories, descriptor: str):
-        """ Add a label to _active_labels if it is not there. Remove a
-        label from _active_labels if it is initially in this list.
-
-        Key Arguments:
-            category (Categories): a member of the Categories Enum
-            descriptor (str): the descriptor the user would like to
-            add or remove
-        """
-        is_in_active_labels = False
-        descriptor_in_labels = False
-        for label in self.get_labels(category):
-            if descriptor == label:
-                descriptor_in_labels = True
-
-        if descriptor_in_labels:
-            for label in self.get_active_labels(category):
-                if label == descriptor:
-                    is_in_active_labels = True
-
-            if is_in_active_labels:
-                self._active_labels[category].remove(descriptor)
-            else:
-                self._active_labels[category].add(descriptor)
-        else:
-            raise KeyError
-
-
-def currency_converter(quantity: float, source_curr: str, target_curr: str):
-    """ Convert source currency to target currency.
-
-    Key Arguments:
-        quantity (float): the amount of the original currency
-        source_curr (str): represents the source currency
-        target_curr (str): represents the currency after exchange
-    """
-    converted_quantity = (quantity
-                          * (1 / conversions[source_curr])
-                          * conversions[target_curr])
-    return converted_quantity
-
-
-def currency_options(base_curr: str):
-    """ Print out a table of options for converting base_curr to all
-    other string currencies.
-
-    Key Arguments:
-        base_curr (str): the home currency of the user
-    """
-    print(f"{base_curr:9}", end="")
-    for currency in conversions:
-        if currency == base_curr:
-            continue
-        else:
-            print(f"{currency:9}", end="")
-    print()
-
-    for i in range(10, 100, 10):
-        print(f"{i:<9.2f}", end="")
-        for currency in conversions:
-            if currency == base_curr:
-                continue
-            else:
-                converted_currency = currency_converter(i, base_curr, currency)
-                print(f"{converted_currency:<9.2f}", end="")
-        print()
-
-
-def manage_filters(dataset: DataSet, category: DataSet.Categories):
-    """ Print a menu-like list of all labels for a given category,
-    indicating which ones are currently active. Allow user to change a
-    label from active to inactive or inactive to active until user is
-    finished with making choices.
-
-    Key Arguments:
-        dataset (Dataset): an object of the class DataSet
-        category (Dataset.Categories): a member of the Enum Categories
-    """
-    making_choices = True
-    while making_choices:
-        print("The following labels are in the dataset:")
-        for num, label in enumerate(dataset.get_labels(category), 1):
-            label_status = "ACTIVE" if label in dataset.get_active_labels(
-                category) else "INACTIVE"
-            print(f"{num}. {label:<20} {label_status:<20}")
-
-        response = input("Please select an item to toggle or enter a blank"
-                         " line when you are\nfinished. ")
-        if response == '':
-            break
-        else:
-            index = int(response) - 1
-            try:
-                dataset.toggle_active_label(
-                    category, dataset.get_labels(category)[index])
-            except IndexError:
-                print("Please select a number from the list")
-
-
-def print_menu():
-    """ Print out the nine choices and the numbers associated with
-    them.
-    """
-    print("Main Menu")
-    print("1 - Print Average Rent by Location and Property Type")
-    print("2 - Print Minimum Rent by Location and Property Type")
-    print("3 - Print Maximum Rent by Location and Property Type")
-    print("4 - Print Min/Avg/Max by Location")
-    print("5 - Print Min/Avg/Max by Property Type")
-    print("6 - Adjust Location Filters")
-    print("7 - Adjust Property Type Filters")
-    print("8 - Load Data")
-    print("9 - Quit")
-
-
-def menu(dataset: DataSet):
-    """ Print the currency table, then print out menu with the
-    copyright and header on the top. Ask user to select an option,
-    catch errors, and provide a unique polite message for each selection
-    until they enter 9 to indicate that they want to quit the menu.
-
-    Key arguments:
-        dataset (DataSet): an object of the class DataSet
-    """
-    print(f"Options for converting from {home_currency}: ")
-    currency_options(home_currency)
-    print(DataSet.copyright)
-    show_menu = True
-    while show_menu:
-        print()
-        print(dataset.header)
-        print_menu()
-        try:
-            response = int(input("What is your choice? "))
-        except ValueError:
-            print("Please enter in a number only")
-            continue
-        if response == 1:
-            try:
-                dataset.display_cross_table(DataSet.Stats.AVG)
-            except DataSet.EmptyDatasetError:
-                print("Please Load a Dataset First")
-        elif response == 2:
-            try:
-                dataset.display_cross_table(DataSet.Stats.MIN)
-            except DataSet.EmptyDatasetError:
-                print("Please Load a Dataset First")
-        elif response == 3:
-            try:
-                dataset.display_cross_table(DataSet.Stats.MAX)
-            except DataSet.EmptyDatasetError:
-                print("Please Load a Dataset First")
-        elif response == 4:
-            try:
-                dataset.display_field_table(DataSet.Categories.LOCATION)
-            except DataSet.EmptyDatasetError:
-                print("Please Load a Dataset First")
-        elif response == 5:
-            try:
-                dataset.display_field_table(DataSet.Categories.PROPERTY_TYPE)
-            except DataSet.EmptyDatasetError:
-                print("Please Load a Dataset First")
-        elif response == 6:
-            try:
-                manage_filters(dataset, DataSet.Categories.LOCATION)
-            except DataSet.EmptyDatasetError:
-                print("Please Load a Dataset First")
-        elif response == 7:
-            try:
-                manage_filters(dataset, DataSet.Categories.PROPERTY_TYPE)
-            except DataSet.EmptyDatasetError:
-                print("Please Load a Dataset First")
-        elif response == 8:
-            num_lines = dataset.load_file()
-            print(str(num_lines) + " lines loaded")
-        elif response == 9:
-            print("Goodbye! Thank you for using this database")
-            break
-        else:
-            print("Please enter a number between 1 and 9")
-
-
-def greeting():
-    """ Obtain the user's name. """
-    my_name = input("\nPlease enter your name: ")
-    print("Hi ", my_name, ", welcome to Foothill's database project.",
-          sep='')
-
-
-def ask_home_currency():
-    """ Ask for user's home currency until user enters in a valid
-    currency.
-    """
-    global home_currency
-    invalid_currency = True
-    while invalid_currency:
-        home_currency = input("What is your home currency? ")
-        for currency in conversions:
-            if home_currency == currency:
-                invalid_currency = False
-            else:
-                continue
-
-
-def main():
-    """ Greet user, ask user for their home currency, ask user to enter
-    header for the menu, print table of options for currency
-    conversions, print menu with header and copyright at the top, and
-    print a unique polite message to the user based on the user's choice
-    until user enters the number 9 to quit the menu.
-    """
-    greeting()
-    ask_home_currency()
-    DataSet.copyright = "\nCopyright Michelle Tham"
-    air_bnb = DataSet()
-    while True:
-        header = input("Please enter a header for the menu:\n")
-        try:
-            air_bnb.header = header
-            break
-        except ValueError:
-            continue
-    menu(air_bnb)
-
-
-if __name__ == "__main__":
-    main()
-
-"""
-Please enter your name: Michelle
-Hi Michelle, welcome to Foothill's database project.
-What is your home currency? AUD
-Please enter a header for the menu:
-Final Airbnb Database
-Options for converting from AUD: 
-AUD      USD      EUR      CAD      GBP      CHF      NZD      JPY      
-10.00    6.17     5.56     8.64     4.94     5.86     10.25    666.17   
-20.00    12.35    11.11    17.28    9.88     11.73    20.49    1332.35  
-30.00    18.52    16.67    25.93    14.81    17.59    30.74    1998.52  
-40.00    24.69    22.22    34.57    19.75    23.46    40.99    2664.69  
-50.00    30.86    27.78    43.21    24.69    29.32    51.23    3330.86  
-60.00    37.04    33.33    51.85    29.63    35.19    61.48    3997.04  
-70.00    43.21    38.89    60.49    34.57    41.05    71.73    4663.21  
-80.00    49.38    44.44    69.14    39.51    46.91    81.98    5329.38  
-90.00    55.56    50.00    77.78    44.44    52.78    92.22    5995.56  
-
-Copyright Michelle Tham
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 1
-Please Load a Dataset First
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 8
-48895 lines loaded
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 1
-                    Entire home/apt       Private room          Shared room           
-Bronx               $ 127.51              $ 66.79               $ 59.80               
-Brooklyn            $ 178.33              $ 76.50               $ 50.53               
-Manhattan           $ 249.24              $ 116.78              $ 88.98               
-Queens              $ 147.05              $ 71.76               $ 69.02               
-Staten Island       $ 173.85              $ 62.29               $ 57.44               
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 2
-                    Entire home/apt       Private room          Shared room           
-Bronx               $ 28.00               $ 0.00                $ 20.00               
-Brooklyn            $ 0.00                $ 0.00                $ 0.00                
-Manhattan           $ 0.00                $ 10.00               $ 10.00               
-Queens              $ 10.00               $ 10.00               $ 11.00               
-Staten Island       $ 48.00               $ 20.00               $ 13.00               
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 3
-                    Entire home/apt       Private room          Shared room           
-Bronx               $ 1000.00             $ 2500.00             $ 800.00              
-Brooklyn            $ 10000.00            $ 7500.00             $ 725.00              
-Manhattan           $ 10000.00            $ 9999.00             $ 1000.00             
-Queens              $ 2600.00             $ 10000.00            $ 1800.00             
-Staten Island       $ 5000.00             $ 300.00              $ 150.00              
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 4
-The following data are from properties matching these criteria: 
-- Entire home/apt
-- Private room
-- Shared room
-                   Minimum              Average              Maximum
-Bronx              $ 0.00               $ 87.50              $ 2500.00           
-Brooklyn           $ 0.00               $ 124.38             $ 10000.00          
-Manhattan          $ 0.00               $ 196.88             $ 10000.00          
-Queens             $ 10.00              $ 99.52              $ 10000.00          
-Staten Island      $ 13.00              $ 114.81             $ 5000.00           
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 5
-The following data are from properties matching these criteria: 
-- Bronx
-- Brooklyn
-- Manhattan
-- Queens
-- Staten Island
-                   Minimum              Average              Maximum
-Entire home/apt    $ 0.00               $ 211.79             $ 10000.00          
-Private room       $ 0.00               $ 89.78              $ 10000.00          
-Shared room        $ 0.00               $ 70.13              $ 1800.00           
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 6
-The following labels are in the dataset:
-1. Queens               ACTIVE              
-2. Brooklyn             ACTIVE              
-3. Staten Island        ACTIVE              
-4. Manhattan            ACTIVE              
-5. Bronx                ACTIVE              
-Please select an item to toggle or enter a blank line when you are
-finished. 3
-The following labels are in the dataset:
-1. Queens               ACTIVE              
-2. Brooklyn             ACTIVE              
-3. Staten Island        INACTIVE            
-4. Manhattan            ACTIVE              
-5. Bronx                ACTIVE              
-Please select an item to toggle or enter a blank line when you are
-finished. 1
-The following labels are in the dataset:
-1. Queens               INACTIVE            
-2. Brooklyn             ACTIVE              
-3. Staten Island        INACTIVE            
-4. Manhattan            ACTIVE              
-5. Bronx                ACTIVE              
-Please select an item to toggle or enter a blank line when you are
-finished. 
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 5
-The following data are from properties matching these criteria: 
-- Bronx
-- Brooklyn
-- Manhattan
-                   Minimum              Average              Maximum
-Entire home/apt    $ 0.00               $ 217.95             $ 10000.00          
-Private room       $ 0.00               $ 93.29              $ 9999.00           
-Shared room        $ 0.00               $ 70.48              $ 1000.00           
-
-Final Airbnb Database
-Main Menu
-1 - Print Average Rent by Location and Property Type
-2 - Print Minimum Rent by Location and Property Type
-3 - Print Maximum Rent by Location and Property Type
-4 - Print Min/Avg/Max by Location
-5 - Print Min/Avg/Max by Property Type
-6 - Adjust Location Filters
-7 - Adjust Property Type Filters
-8 - Load Data
-9 - Quit
-What is your choice? 
-"""
+""" This program asks the user for their name, politely greets them,
+asks them for their home currency, asks them to enter a header for the
+menu, prints a currency table, then provides them with a menu with the
+copyright and header at the top. The user is prompted to input an
+option, and the program provides an unique polite message to the user's
+response accordingly.
+"""
+import argparse
+import atexit
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import copy
+import csv
+import functools
+import hashlib
+import heapq
+import http.server
+import io
+import itertools
+import json
+import math
+import mmap
+import os
+import pathlib
+import queue
+import random
+import re
+import sqlite3
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+import uuid
+import weakref
+from array import array
+from enum import Enum
+from operator import itemgetter
+
+conversions = {
+    "USD": 1,
+    "EUR": .9,
+    "CAD": 1.4,
+    "GBP": .8,
+    "CHF": .95,
+    "NZD": 1.66,
+    "AUD": 1.62,
+    "JPY": 107.92
+}
+currency_symbols = {
+    "USD": "$",
+    "EUR": "€",
+    "CAD": "C$",
+    "GBP": "£",
+    "CHF": "Fr",
+    "NZD": "NZ$",
+    "AUD": "A$",
+    "JPY": "¥"
+}
+data_currency = "USD"
+home_currency = ""
+filename = './AB_NYC_2019.csv'
+# Lower bucket edges for the numeric columns of the export.
+default_buckets = {"minimum_nights": [1, 2, 4, 8, 30],
+                   "availability_365": [1, 90, 180, 270, 365],
+                   "number_of_reviews": [1, 10, 50, 100]}
+# Prices kept in the sample of each cell for approximate queries.
+default_sample_size = 1000
+# Held while deferred columns are parsed, so that threads sharing a
+# lazily loaded version parse them only once.
+materialize_lock = threading.Lock()
+
+
+def build_rate_matrix(rates: dict):
+    """ Return a dictionary mapping every (source, target) pair of
+    currencies in rates to the factor that converts an amount of the
+    source currency into the target currency.
+
+    Key Arguments:
+        rates (dict): the value of one USD in each currency
+    """
+    return {(source_curr, target_curr):
+            (1 / rates[source_curr]) * rates[target_curr]
+            for source_curr in rates for target_curr in rates}
+
+
+rate_matrix = build_rate_matrix(conversions)
+
+
+class Instrumentation:
+    """ Timers and counters recording where the time of a DataSet goes.
+    Timers accumulate the number of calls and the total seconds of each
+    instrumented method (including the methods it calls); counters hold
+    quantities such as rows scanned, cells computed, and cache hits.
+    """
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+
+    def add_time(self, name: str, seconds: float):
+        """ Record one call of name that took the given seconds. """
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+
+    def count(self, name: str, amount=1):
+        """ Add amount to the counter called name. """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def stats(self):
+        """ Return the timers and counters as a dictionary. """
+        return {"timers": {name: {"calls": calls, "seconds": seconds}
+                           for name, (calls, seconds)
+                           in self.timers.items()},
+                "counters": dict(self.counters)}
+
+    def report(self):
+        """ Return the timers and counters as a printable table. """
+        lines = ["Timer                           Calls       Seconds"]
+        for name, (calls, seconds) in sorted(self.timers.items()):
+            lines.append(f"{name:30}{calls:>7}{seconds:>14.6f}")
+        lines.append("Counter                         Value")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:30}{value:>7}")
+        return "\n".join(lines)
+
+
+def instrumented(method):
+    """ Decorate a DataSet method so that its calls are timed whenever
+    instrumentation is enabled on the DataSet. When it is disabled the
+    only cost is one attribute check.
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = self._instrumentation
+        if instrumentation is None:
+            return method(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            instrumentation.add_time(name, time.perf_counter() - start)
+    return wrapper
+
+
+class CellAggregate:
+    """ Mergeable count, sum, minimum, and maximum of the prices in one
+    group of listings.
+    """
+    __slots__ = ('count', 'total', 'minimum', 'maximum')
+
+    def __init__(self, count=0, total=0.0, minimum=float('inf'),
+                 maximum=float('-inf')):
+        self.count = count
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def add(self, price: float):
+        """ Fold a single price into the aggregate. """
+        self.count += 1
+        self.total += price
+        if price < self.minimum:
+            self.minimum = price
+        if price > self.maximum:
+            self.maximum = price
+
+    def merge(self, other: "CellAggregate"):
+        """ Fold another aggregate into this one. """
+        self.count += other.count
+        self.total += other.total
+        if other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if other.maximum > self.maximum:
+            self.maximum = other.maximum
+
+    def statistics(self):
+        """ Return the minimum, average, and maximum price, or None if
+        the aggregate is empty.
+        """
+        if not self.count:
+            return None
+        return (float(self.minimum), float(self.total / self.count),
+                float(self.maximum),)
+
+
+class QuantileSketch:
+    """ Mergeable streaming sketch of the distribution of prices in one
+    group of listings, in the style of a merging t-digest. Up to
+    exact_limit values are kept as they are, so small groups answer
+    quantiles exactly; past that the values are compressed into
+    centroids whose size shrinks towards the tails, keeping the memory
+    of a sketch bounded by roughly compression + exact_limit values.
+    """
+    __slots__ = ('compression', 'exact_limit', 'count', 'minimum',
+                 'maximum', '_means', '_weights', '_buffer')
+
+    def __init__(self, compression=200, exact_limit=512):
+        self.compression = compression
+        self.exact_limit = exact_limit
+        self.count = 0
+        self.minimum = float('inf')
+        self.maximum = float('-inf')
+        self._means = []
+        self._weights = []
+        self._buffer = []
+
+    def add(self, value: float):
+        """ Add a single value to the sketch. """
+        self.extend((value,))
+
+    def extend(self, values):
+        """ Add a sequence of values to the sketch. """
+        values = list(values)
+        if not values:
+            return
+        self.count += len(values)
+        self.minimum = min(self.minimum, min(values))
+        self.maximum = max(self.maximum, max(values))
+        self._buffer.extend(values)
+        if len(self._buffer) > self.exact_limit:
+            self._means, self._weights = self._centroids()
+            self._buffer = []
+
+    def merge(self, other: "QuantileSketch"):
+        """ Fold another sketch into this one. """
+        if not other.count:
+            return
+        self.count += other.count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self._means = self._means + other._means
+        self._weights = self._weights + other._weights
+        self._buffer = self._buffer + other._buffer
+        if self._weights or len(self._buffer) > self.exact_limit:
+            self._means, self._weights = self._centroids()
+            self._buffer = []
+
+    def is_exact(self):
+        """ Return True if the sketch still holds every value. """
+        return not self._weights
+
+    def _centroids(self):
+        """ Return the means and weights of the centroids that result
+        from compressing the current centroids and buffered values,
+        without changing the sketch.
+        """
+        items = sorted(list(zip(self._means, self._weights))
+                       + [(value, 1) for value in self._buffer])
+        scale = self.compression / (2 * math.pi)
+
+        def limit(weight_so_far):
+            k = scale * math.asin(2 * weight_so_far / self.count - 1) + 1
+            if k >= scale * math.pi / 2:
+                return self.count
+            return (math.sin(k / scale) + 1) / 2 * self.count
+
+        means = []
+        weights = []
+        mean, weight = items[0]
+        weight_so_far = 0
+        weight_limit = limit(0)
+        for item_mean, item_weight in items[1:]:
+            if weight_so_far + weight + item_weight <= weight_limit:
+                weight += item_weight
+                mean += (item_mean - mean) * item_weight / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                weight_so_far += weight
+                weight_limit = limit(weight_so_far)
+                mean, weight = item_mean, item_weight
+        means.append(mean)
+        weights.append(weight)
+        return means, weights
+
+    def quantile(self, fraction: float):
+        """ Return the value below which the given fraction of the
+        values fall, or None if the sketch is empty. Exact sketches
+        interpolate linearly between the closest ranks.
+
+        Key Arguments:
+            fraction (float): the quantile wanted, between 0 and 1
+        """
+        if not self.count:
+            return None
+        if self.is_exact():
+            values = sorted(self._buffer)
+            position = fraction * (len(values) - 1)
+            lower = math.floor(position)
+            upper = min(lower + 1, len(values) - 1)
+            return float(values[lower] + (values[upper] - values[lower])
+                         * (position - lower))
+
+        if self._buffer:
+            means, weights = self._centroids()
+        else:
+            means, weights = self._means, self._weights
+        target = fraction * self.count
+        previous_center = 0.0
+        previous_mean = self.minimum
+        cumulative = 0.0
+        for mean, weight in zip(means, weights):
+            center = cumulative + weight / 2
+            if target <= center:
+                if center == previous_center:
+                    return float(mean)
+                share = (target - previous_center) / (center
+                                                      - previous_center)
+                return float(previous_mean
+                             + (mean - previous_mean) * share)
+            previous_center = center
+            previous_mean = mean
+            cumulative += weight
+        if self.count == previous_center:
+            return float(self.maximum)
+        share = (target - previous_center) / (self.count - previous_center)
+        return float(previous_mean + (self.maximum - previous_mean) * share)
+
+
+class CellSample:
+    """ Mergeable uniform random sample of the prices in one group of
+    listings. A reservoir of at most size values is kept however many
+    are added, and once it is full whole runs of values are skipped
+    (Algorithm L), so adding n values costs far fewer than n random
+    draws. Two samples merge into a uniform sample of their union,
+    which is how the samples of a cell loaded in parts are combined.
+    """
+    __slots__ = ('size', 'count', 'values', '_random', '_weight', '_skip')
+
+    def __init__(self, size: int = None, seed=0):
+        self.size = size or default_sample_size
+        self.count = 0
+        self.values = []
+        self._random = random.Random(seed)
+        self._weight = None
+        self._skip = 0
+
+    def _uniform(self):
+        """ Return a random number in the open interval (0, 1). """
+        while True:
+            value = self._random.random()
+            if value:
+                return value
+
+    def _advance(self):
+        """ Draw the weight of the next replacement and the number of
+        values skipped before it.
+        """
+        self._weight *= math.exp(math.log(self._uniform()) / self.size)
+        self._draw_skip()
+
+    def _draw_skip(self):
+        """ Draw the number of values skipped before the next
+        replacement at the current weight.
+        """
+        self._skip = 0
+        if self._weight < 1:
+            self._skip = int(math.log(self._uniform())
+                             / math.log1p(-self._weight))
+
+    def add(self, value: float):
+        """ Add a single value to the sample. """
+        self.extend((value,))
+
+    def extend(self, values):
+        """ Add a sequence of values to the sample. """
+        values = list(values)
+        room = self.size - len(self.values)
+        if room > 0:
+            self.values.extend(values[:room])
+            self.count += min(room, len(values))
+            if len(self.values) < self.size:
+                return
+            values = values[room:]
+            self._weight = 1.0
+            self._advance()
+        position = self._skip
+        while position < len(values):
+            self.values[self._random.randrange(self.size)] = values[position]
+            self._advance()
+            position += self._skip + 1
+        self._skip = position - len(values)
+        self.count += len(values)
+
+    def merge(self, other: "CellSample"):
+        """ Replace the sample with a uniform sample of the values of
+        both samples, drawing from each in proportion to its count.
+        """
+        if not other.count:
+            return
+        total = self.count + other.count
+        if (self.count == len(self.values) and other.count
+                == len(other.values) and total <= self.size):
+            self.values = self.values + other.values
+        else:
+            # Draw the share of each sample as if picking values one at
+            # a time, without replacement, from the union of the groups,
+            # taking no more values than either sample can supply at
+            # its share of the union.
+            draws = min(self.size, total, *(
+                len(sample.values) * total // sample.count
+                for sample in (self, other) if sample.count))
+            own, others = self.count, other.count
+            from_self = 0
+            for _ in range(draws):
+                if self._random.random() * (own + others) < own:
+                    from_self += 1
+                    own -= 1
+                else:
+                    others -= 1
+            from_self = min(from_self, len(self.values))
+            from_other = min(draws - from_self, len(other.values))
+            self.values = (self._random.sample(self.values, from_self)
+                           + self._random.sample(other.values, from_other))
+        self.count = total
+        self._weight = None
+        if len(self.values) >= self.size:
+            # The weight of a reservoir after count values is the
+            # size-th smallest of count uniform keys.
+            self._weight = self._random.betavariate(
+                self.size, self.count - self.size + 1)
+            self._draw_skip()
+
+    def is_exact(self):
+        """ Return True if the sample still holds every value. """
+        return self.count == len(self.values)
+
+    def restricted(self, low=None, high=None):
+        """ Return a sample of the values from low to high inclusive,
+        with their count estimated from the share of the sample in
+        range, or None if no sampled value is in range.
+        """
+        kept = [value for value in self.values
+                if (low is None or value >= low)
+                and (high is None or value <= high)]
+        if not kept:
+            return None
+        sample = CellSample(self.size)
+        sample.values = kept
+        sample.count = len(kept)
+        if not self.is_exact():
+            sample.count = max(len(kept), round(
+                self.count * len(kept) / len(self.values)))
+        return sample
+
+    def interval(self, fraction: float = None, confidence=.95):
+        """ Return a (low, estimate, high) tuple for the mean of the
+        group, or for the given quantile, where low and high bound a
+        confidence interval at the given level, or None if the sample is
+        empty. A sample holding every value gives exact estimates with
+        low and high equal to them.
+
+        Key Arguments:
+            fraction (float): the quantile wanted, or None for the mean
+            confidence (float): the level of the interval, e.g. .95
+        """
+        if not self.values:
+            return None
+        size = len(self.values)
+        z = statistics.NormalDist().inv_cdf(.5 + confidence / 2)
+        correction = 0.0
+        if not self.is_exact():
+            correction = math.sqrt((self.count - size) / (self.count - 1))
+        if fraction is None:
+            estimate = math.fsum(self.values) / size
+            spread = statistics.stdev(self.values) if size > 1 else 0.0
+            half_width = z * spread / math.sqrt(size) * correction
+            return (estimate - half_width, estimate, estimate + half_width)
+        values = sorted(self.values)
+        position = fraction * (size - 1)
+        lower = math.floor(position)
+        upper = min(lower + 1, size - 1)
+        estimate = float(values[lower] + (values[upper] - values[lower])
+                         * (position - lower))
+        if not correction:
+            return (estimate, estimate, estimate)
+        # Ranks of the order statistics bounding the quantile, from the
+        # normal approximation of the binomial.
+        half_width = z * math.sqrt(size * fraction * (1 - fraction)) \
+            * correction
+        return (float(values[max(0, math.floor(position - half_width))]),
+                estimate,
+                float(values[min(size - 1, math.ceil(position
+                                                     + half_width))]))
+
+
+class StratifiedSample:
+    """ The samples of several cells taken together, for estimating the
+    mean or a quantile of all their listings. Each cell is kept as a
+    stratum of its own instead of being resampled, so that it weighs by
+    its number of listings however many of its prices were sampled: the
+    mean is the mean of the cell means weighted by their counts, and a
+    quantile is read from the sampled prices of every cell weighted by
+    its count over its number of sampled prices.
+    """
+    __slots__ = ('strata',)
+
+    def __init__(self):
+        self.strata = []
+
+    def merge(self, sample: CellSample):
+        """ Add the sample of another cell as a stratum. """
+        if sample.values:
+            self.strata.append(sample)
+
+    @property
+    def count(self):
+        """ The number of listings of all the cells. """
+        return sum(sample.count for sample in self.strata)
+
+    def is_exact(self):
+        """ Return True if every stratum still holds all its values. """
+        return all(sample.is_exact() for sample in self.strata)
+
+    def interval(self, fraction: float = None, confidence=.95):
+        """ Return a (low, estimate, high) tuple for the mean of all the
+        listings, or for the given quantile, as CellSample.interval
+        does, or None if there are no samples.
+
+        Key Arguments:
+            fraction (float): the quantile wanted, or None for the mean
+            confidence (float): the level of the interval, e.g. .95
+        """
+        if len(self.strata) == 1:
+            return self.strata[0].interval(fraction, confidence)
+        if self.is_exact():
+            pooled = CellSample(self.count)
+            for sample in self.strata:
+                pooled.values.extend(sample.values)
+            pooled.count = len(pooled.values)
+            return pooled.interval(fraction, confidence)
+        total = self.count
+        z = statistics.NormalDist().inv_cdf(.5 + confidence / 2)
+        # The variance of a stratum mean per unit of its variance.
+        factors = []
+        for sample in self.strata:
+            size = len(sample.values)
+            correction = 0.0
+            if not sample.is_exact():
+                correction = (sample.count - size) / (sample.count - 1)
+            factors.append((sample.count / total) ** 2 * correction / size)
+        if fraction is None:
+            estimate = math.fsum(sample.count * math.fsum(sample.values)
+                                 / len(sample.values)
+                                 for sample in self.strata) / total
+            variance = math.fsum(
+                factor * statistics.variance(sample.values)
+                for factor, sample in zip(factors, self.strata)
+                if len(sample.values) > 1)
+            half_width = z * math.sqrt(variance)
+            return (estimate - half_width, estimate, estimate + half_width)
+        weighted = sorted(
+            (value, sample.count / len(sample.values))
+            for sample in self.strata for value in sample.values)
+        values = [value for value, _ in weighted]
+        cumulative = list(itertools.accumulate(
+            weight for _, weight in weighted))
+
+        def quantile(share):
+            position = bisect.bisect_left(
+                cumulative, min(max(share, 0.0), 1.0) * cumulative[-1])
+            return float(values[min(position, len(values) - 1)])
+
+        # Woodruff's interval: the quantiles at the bounds of the
+        # confidence interval of the share of listings below it.
+        half_width = z * math.sqrt(fraction * (1 - fraction)
+                                   * math.fsum(factors))
+        return (quantile(fraction - half_width), quantile(fraction),
+                quantile(fraction + half_width))
+
+
+class ColumnStore:
+    """ Columnar storage for the listings of a DataSet. Prices are kept
+    in a typed array of doubles, and every category is kept as an array
+    of small integer codes with its own label dictionary. A store built
+    with keep_rows=False only keeps the labels and the cell aggregates,
+    so its memory use does not grow with the number of listings. A
+    store built with a sample_size also keeps a CellSample of that many
+    prices per cell, and a store built with histogram_edges the count of
+    prices in each bin of those edges per cell, filled as the listings
+    are added.
+
+    Listings added with extend_raw keep their price fields unparsed
+    until the prices are first read, so that the labels of a freshly
+    loaded file can be used before any price has been parsed.
+    """
+    _code_typecodes = (('B', 1 << 8), ('H', 1 << 16), ('L', 1 << 32))
+    # The positions of the set bits of every byte value.
+    _bit_positions = [tuple(bit for bit in range(8) if value >> bit & 1)
+                      for value in range(256)]
+
+    def __init__(self, keep_rows=True, sample_size: int = None,
+                 histogram_edges: list = None):
+        self.keep_rows = keep_rows
+        self.sample_size = sample_size
+        self.histogram_edges = None
+        if histogram_edges:
+            self.histogram_edges = tuple(sorted(histogram_edges))
+        self._raw_prices = []
+        self.prices = array('d')
+        self.codes = {category: array('B') for category in DataSet.Categories}
+        self.code_labels = {category: [] for category in DataSet.Categories}
+        self.label_codes = {category: {} for category in DataSet.Categories}
+        self._row_count = 0
+        self._cells = None if keep_rows else {}
+        self._sketches = None if keep_rows else {}
+        self._samples = {} if sample_size else None
+        self._histograms = {} if histogram_edges else None
+        self._bitmaps = {}
+        self._price_index = None
+        self.instrumentation = None
+        # The (path, os.stat_result) of the file for materialize to
+        # snapshot once the prices of a lazy load have been parsed.
+        self.snapshot_source = None
+
+    def __len__(self):
+        return self._row_count
+
+    @property
+    def prices(self):
+        """ The price of every listing, with any price fields added by
+        extend_raw parsed in bulk on first use. A copy of the store may
+        extend the same array, so only its first len(self) prices are
+        sure to belong to this store; see _columns.
+        """
+        if self._raw_prices:
+            self._parse_prices()
+        return self._prices
+
+    @prices.setter
+    def prices(self, prices):
+        self._prices = prices
+
+    def _parse_prices(self):
+        """ Parse the raw price fields added by extend_raw onto the end
+        of the price column. A malformed price raises ValueError and
+        leaves the fields unparsed, so every read of the prices raises
+        it again.
+        """
+        with materialize_lock:
+            if not self._raw_prices:
+                return
+            prices = array('d')
+            for block in self._raw_prices:
+                prices.extend(map(float, block.split(b'\n')))
+            if len(self._prices) + len(prices) != self._row_count:
+                raise ValueError("A price field holds a line break")
+            self._make_writable()
+            self._prices.extend(prices)
+            self._raw_prices = []
+            if self.instrumentation is not None:
+                self.instrumentation.count("prices_parsed", len(prices))
+
+    def materialize(self):
+        """ Parse any price fields added by extend_raw, build the price
+        index of a store that keeps its rows, and write the snapshot its
+        load left for this moment, if any, so that none of this is left
+        to the first query that reads the prices.
+        """
+        self._parse_prices()
+        if self.keep_rows:
+            self.price_index()
+        with materialize_lock:
+            snapshot, self.snapshot_source = self.snapshot_source, None
+        if snapshot is not None:
+            save_snapshot(self, *snapshot)
+
+    def code_for(self, category, label: str):
+        """ Return the integer code of label within category, assigning
+        a new code (and widening the code array if needed) when the
+        label has not been seen before.
+
+        Key Arguments:
+            category (Categories): a member of the Categories Enum
+            label (str): the label to look up
+        """
+        label_codes = self.label_codes[category]
+        code = label_codes.get(label)
+        if code is None:
+            code = len(label_codes)
+            label_codes[label] = code
+            self.code_labels[category].append(label)
+            self._widen_codes(category, code)
+        return code
+
+    def _widen_codes(self, category, code: int):
+        """ Swap the code array of category for a wider one if code no
+        longer fits in its current item size.
+        """
+        self._make_writable()
+        codes = self.codes[category]
+        for typecode, limit in ColumnStore._code_typecodes:
+            if code < limit:
+                if codes.typecode != typecode:
+                    self.codes[category] = array(typecode, codes)
+                return
+
+    def append(self, location: str, property_type: str, price: float):
+        """ Add a single listing to the end of the store. """
+        self.extend(((location, property_type, price),))
+
+    def extend(self, rows):
+        """ Add listings to the end of the store, interning their labels
+        and folding them into the cell aggregates if those have already
+        been built.
+
+        Key Arguments:
+            rows (iterable): (location, property type, price) tuples
+        """
+        location_codes = []
+        property_codes = []
+        prices = []
+        location_lookup = self.label_codes[DataSet.Categories.LOCATION]
+        property_lookup = self.label_codes[DataSet.Categories.PROPERTY_TYPE]
+        for location, property_type, price in rows:
+            location_code = location_lookup.get(location)
+            if location_code is None:
+                location_code = self.code_for(DataSet.Categories.LOCATION,
+                                              location)
+            property_code = property_lookup.get(property_type)
+            if property_code is None:
+                property_code = self.code_for(
+                    DataSet.Categories.PROPERTY_TYPE, property_type)
+            location_codes.append(location_code)
+            property_codes.append(property_code)
+            prices.append(price)
+        self.extend_coded(location_codes, property_codes, prices)
+
+    def extend_coded(self, location_codes, property_codes, prices):
+        """ Add listings whose labels have already been interned with
+        code_for to the end of the store.
+
+        Key Arguments:
+            location_codes (list): the location code of each listing
+            property_codes (list): the property type code of each listing
+            prices (list): the price of each listing
+        """
+        self._make_writable()
+        if self.keep_rows:
+            self.codes[DataSet.Categories.LOCATION].extend(location_codes)
+            self.codes[DataSet.Categories.PROPERTY_TYPE].extend(
+                property_codes)
+            self.prices.extend(prices)
+        if self._cells is not None:
+            ColumnStore._fold_cells(self._cells, location_codes,
+                                    property_codes, prices)
+        if self._sketches is not None:
+            ColumnStore._fold_sketches(self._sketches, location_codes,
+                                       property_codes, prices)
+        if self._samples is not None:
+            ColumnStore._fold_samples(self._samples, location_codes,
+                                      property_codes, prices,
+                                      self.sample_size)
+        if self._histograms is not None:
+            ColumnStore._fold_histograms(self._histograms,
+                                         self.histogram_edges, location_codes,
+                                         property_codes, prices)
+        self._extend_bitmaps(self._row_count)
+        self._update_price_index(location_codes, property_codes, prices)
+        self._row_count += len(prices)
+
+    def extend_raw(self, location_codes, property_codes, raw_prices):
+        """ Add listings as extend_coded does, keeping their price fields
+        as the bytes read from the file until the prices are first read,
+        which is also when a malformed price raises ValueError. A store
+        that folds its listings into aggregates as they arrive parses the
+        prices at once instead.
+
+        Key Arguments:
+            location_codes (list): the location code of each listing
+            property_codes (list): the property type code of each listing
+            raw_prices (list): the price field of each listing, as bytes
+        """
+        if not self.keep_rows or any(
+                cache is not None for cache in (self._cells, self._sketches,
+                                                self._samples,
+                                                self._histograms)):
+            self.extend_coded(location_codes, property_codes,
+                              list(map(float, raw_prices)))
+            return
+        self._make_writable()
+        self.codes[DataSet.Categories.LOCATION].extend(location_codes)
+        self.codes[DataSet.Categories.PROPERTY_TYPE].extend(property_codes)
+        if raw_prices:
+            self._raw_prices.append(b'\n'.join(raw_prices))
+        self._extend_bitmaps(self._row_count)
+        self._price_index = None
+        self._row_count += len(raw_prices)
+
+    def _columns(self):
+        """ Return the location codes, property codes, and prices of the
+        listings of this store. Copies of a store extend the arrays they
+        share with it in place, so a store that has been copied and
+        appended to only reads the first len(self) rows of each.
+        """
+        rows = self._row_count
+        return tuple(column if len(column) == rows else column[:rows]
+                     for column in (self.codes[DataSet.Categories.LOCATION],
+                                    self.codes[
+                                        DataSet.Categories.PROPERTY_TYPE],
+                                    self.prices))
+
+    def _shared_column(self, column):
+        """ Return column for a copy of the store to extend in place if
+        it is a writable array that ends with the rows of this store,
+        or else a new array holding the rows of this store only.
+        """
+        if isinstance(column, array):
+            if len(column) == self._row_count:
+                return column
+            return column[:self._row_count]
+        return array(column.format, column[:self._row_count].tobytes())
+
+    def _make_writable(self):
+        """ Copy columns that are read-only views of a memory-mapped
+        snapshot into arrays so that they can be extended.
+        """
+        if isinstance(self._prices, memoryview):
+            self._prices = array('d', self._prices.tobytes())
+        for category, codes in self.codes.items():
+            if isinstance(codes, memoryview):
+                self.codes[category] = array(codes.format, codes.tobytes())
+
+    def copy(self):
+        """ Return a copy of the store, with the same label codes, that
+        can be extended or merged into without changing this one. The
+        copy shares the columns of the store rather than copying them,
+        and extends them in place past the rows of this store, which
+        only ever reads its own rows; so the cost of a copy does not
+        grow with the number of listings. A store that is no longer the
+        last version of its columns, or whose columns are mapped from a
+        snapshot, gives its copy new columns instead.
+        """
+        other = ColumnStore(self.keep_rows, self.sample_size,
+                            self.histogram_edges)
+        # Parsed first, as the copy cannot parse into a shared column.
+        other.prices = self._shared_column(self.prices)
+        for category, codes in self.codes.items():
+            other.codes[category] = self._shared_column(codes)
+            other.code_labels[category] = list(self.code_labels[category])
+            other.label_codes[category] = dict(self.label_codes[category])
+        other._row_count = self._row_count
+        if self._cells is not None:
+            other._cells = {key: CellAggregate(cell.count, cell.total,
+                                               cell.minimum, cell.maximum)
+                            for key, cell in self._cells.items()}
+        other._sketches = copy.deepcopy(self._sketches)
+        other._samples = copy.deepcopy(self._samples)
+        if self._histograms is not None:
+            other._histograms = {key: list(counts)
+                                 for key, counts in self._histograms.items()}
+        other._bitmaps = {category: list(bitmaps)
+                          for category, bitmaps in self._bitmaps.items()}
+        # Updates replace the index rather than change it.
+        other._price_index = self._price_index
+        other.instrumentation = self.instrumentation
+        return other
+
+    def merge(self, other: "ColumnStore"):
+        """ Append every listing of another store after ours, remapping
+        its label codes onto ours, and merge its cell aggregates into
+        ours without rescanning its rows.
+
+        Key Arguments:
+            other (ColumnStore): the store to merge, which must keep its
+            rows if this store does
+        """
+        self._make_writable()
+        mappings = {category: [self.code_for(category, label)
+                               for label in other.code_labels[category]]
+                    for category in DataSet.Categories}
+        if self._cells is None and not self._row_count:
+            self._cells = {}
+        location_map = mappings[DataSet.Categories.LOCATION]
+        property_map = mappings[DataSet.Categories.PROPERTY_TYPE]
+
+        if self.keep_rows:
+            for category in DataSet.Categories:
+                ColumnStore._extend_codes(self.codes[category],
+                                          other.codes[category],
+                                          mappings[category])
+            self.prices.extend(other.prices)
+        if self._cells is not None:
+            for (location, property_type), cell in \
+                    other.cell_aggregates().items():
+                key = (location_map[location], property_map[property_type])
+                existing = self._cells.get(key)
+                if existing is None:
+                    self._cells[key] = CellAggregate(
+                        cell.count, cell.total, cell.minimum, cell.maximum)
+                else:
+                    existing.merge(cell)
+        if self._sketches is not None:
+            for (location, property_type), sketch in \
+                    other.cell_sketches().items():
+                key = (location_map[location], property_map[property_type])
+                self._sketches.setdefault(key, QuantileSketch()).merge(
+                    sketch)
+        if self._samples is not None:
+            for (location, property_type), sample in \
+                    other.cell_samples().items():
+                key = (location_map[location], property_map[property_type])
+                self._samples.setdefault(key, CellSample(
+                    self.sample_size, hash(key))).merge(sample)
+        if self._histograms is not None:
+            for (location, property_type), counts in \
+                    other.cell_histograms(self.histogram_edges).items():
+                key = (location_map[location], property_map[property_type])
+                total = self._histograms.setdefault(key, [0] * len(counts))
+                for index, count in enumerate(counts):
+                    total[index] += count
+        self._extend_bitmaps(self._row_count)
+        if self.keep_rows:
+            self._update_price_index(
+                *(column[self._row_count:] for column in (
+                    self.codes[DataSet.Categories.LOCATION],
+                    self.codes[DataSet.Categories.PROPERTY_TYPE],
+                    self.prices)))
+        self._row_count += len(other)
+
+    @staticmethod
+    def _extend_codes(target: array, codes: array, mapping: list):
+        """ Extend target with codes translated through mapping. """
+        if mapping == list(range(len(mapping))):
+            if codes.typecode == target.typecode:
+                target.extend(codes)
+            else:
+                target.extend(codes.tolist())
+        elif codes.typecode == 'B' and target.typecode == 'B':
+            table = bytes(mapping) + bytes(256 - len(mapping))
+            target.frombytes(codes.tobytes().translate(table))
+        else:
+            target.extend([mapping[code] for code in codes])
+
+    @staticmethod
+    def _fold_cells(cells: dict, location_codes, property_codes, prices):
+        """ Fold parallel columns of codes and prices into a dictionary
+        of CellAggregates keyed by (location code, property code).
+        """
+        for location, property_type, price in zip(location_codes,
+                                                  property_codes, prices):
+            cell = cells.get((location, property_type))
+            if cell is None:
+                cells[(location, property_type)] = CellAggregate(
+                    1, price, price, price)
+            else:
+                cell.count += 1
+                cell.total += price
+                if price < cell.minimum:
+                    cell.minimum = price
+                elif price > cell.maximum:
+                    cell.maximum = price
+
+    @staticmethod
+    def _group_prices(location_codes, property_codes, prices):
+        """ Return a dictionary mapping each (location code, property
+        code) pair to the list of its prices, in row order.
+        """
+        groups = {}
+        for location, property_type, price in zip(location_codes,
+                                                  property_codes, prices):
+            group = groups.get((location, property_type))
+            if group is None:
+                groups[(location, property_type)] = [price]
+            else:
+                group.append(price)
+        return groups
+
+    @staticmethod
+    def _fold_sketches(sketches: dict, location_codes, property_codes,
+                       prices):
+        """ Add parallel columns of codes and prices to a dictionary of
+        QuantileSketches keyed by (location code, property code), one
+        batch of values per cell.
+        """
+        groups = ColumnStore._group_prices(location_codes, property_codes,
+                                           prices)
+        for key, group in groups.items():
+            sketch = sketches.get(key)
+            if sketch is None:
+                sketch = sketches[key] = QuantileSketch()
+            sketch.extend(group)
+
+    def cell_sketches(self, batch_size=1 << 20):
+        """ Return a dictionary mapping each (location code, property
+        code) pair present in the store to a QuantileSketch of its
+        prices. The sketches are built on first use, batch_size rows at
+        a time so that memory stays bounded, and then cached.
+        """
+        if self.instrumentation is not None:
+            if self._sketches is None:
+                self.instrumentation.count("sketch_rows_scanned", len(self))
+            else:
+                self.instrumentation.count("sketch_cache_hits")
+        if self._sketches is None:
+            sketches = {}
+            location_codes, property_codes, prices = self._columns()
+            for start in range(0, len(prices), batch_size):
+                stop = start + batch_size
+                ColumnStore._fold_sketches(
+                    sketches, location_codes[start:stop],
+                    property_codes[start:stop], prices[start:stop])
+            self._sketches = sketches
+        return self._sketches
+
+    @staticmethod
+    def _fold_samples(samples: dict, location_codes, property_codes,
+                      prices, size: int):
+        """ Add parallel columns of codes and prices to a dictionary of
+        CellSamples of size values keyed by (location code, property
+        code), one batch of values per cell.
+        """
+        groups = ColumnStore._group_prices(location_codes, property_codes,
+                                           prices)
+        for key, group in groups.items():
+            sample = samples.get(key)
+            if sample is None:
+                sample = samples[key] = CellSample(size, hash(key))
+            sample.extend(group)
+
+    @staticmethod
+    def _fold_histograms(histograms: dict, edges, location_codes,
+                         property_codes, prices):
+        """ Add parallel columns of codes and prices to a dictionary of
+        bin counts for edges keyed by (location code, property code).
+        Every price is bucketed by one binary search in edges, and the
+        (cell, bin) pairs are counted in a single pass.
+        """
+        bins = map(functools.partial(bisect.bisect_right, edges), prices)
+        for (location, property_type, index), count in collections.Counter(
+                zip(location_codes, property_codes, bins)).items():
+            counts = histograms.get((location, property_type))
+            if counts is None:
+                counts = histograms[(location, property_type)] = \
+                    [0] * (len(edges) + 1)
+            counts[index] += count
+
+    def cell_samples(self, batch_size=1 << 20):
+        """ Return a dictionary mapping each (location code, property
+        code) pair present in the store to a CellSample of its prices.
+        Stores without a sample_size build the samples on first use,
+        with default_sample_size values each, and then cache them.
+        """
+        if self.instrumentation is not None:
+            if self._samples is None:
+                self.instrumentation.count("sample_rows_scanned", len(self))
+            else:
+                self.instrumentation.count("sample_cache_hits")
+        if self._samples is None:
+            if not self.keep_rows:
+                raise ValueError("A store that keeps no rows only has "
+                                 "samples if built with a sample_size")
+            self.sample_size = self.sample_size or default_sample_size
+            samples = {}
+            location_codes, property_codes, prices = self._columns()
+            for start in range(0, len(prices), batch_size):
+                stop = start + batch_size
+                ColumnStore._fold_samples(
+                    samples, location_codes[start:stop],
+                    property_codes[start:stop], prices[start:stop],
+                    self.sample_size)
+            self._samples = samples
+        return self._samples
+
+    @staticmethod
+    def _label_bitmaps(codes, label_count: int):
+        """ Return a list holding the bitmap of each code below
+        label_count within the column of codes, an int whose bit i is
+        set if row i has the code. A column of one-byte codes is
+        translated to a string of binary digits per code, last row
+        first, and parsed by int in one step. Wider codes have too many
+        labels for a pass over the column per label, so the rows are
+        bucketed by code in one pass instead, and each bitmap is packed
+        from its own rows.
+        """
+        if codes.itemsize == 1:
+            column = bytes(codes)[::-1]
+            bitmaps = []
+            for code in range(label_count):
+                table = bytearray(b'0' * 256)
+                table[code] = ord('1')
+                bitmaps.append(int(column.translate(table) or b'0', 2))
+            return bitmaps
+        positions = [array('L') for _ in range(label_count)]
+        for row, code in enumerate(codes):
+            positions[code].append(row)
+        bitmaps = []
+        for code, rows in enumerate(positions):
+            packed = bytearray(rows[-1] // 8 + 1 if rows else 0)
+            for row in rows:
+                packed[row >> 3] |= 1 << (row & 7)
+            bitmaps.append(int.from_bytes(packed, 'little'))
+            positions[code] = None
+        return bitmaps
+
+    def _extend_bitmaps(self, start: int):
+        """ Add the listings from row start onwards to the bitmaps that
+        have already been built.
+        """
+        if not self.keep_rows:
+            return
+        for category, bitmaps in self._bitmaps.items():
+            added = ColumnStore._label_bitmaps(
+                self.codes[category][start:],
+                len(self.code_labels[category]))
+            bitmaps.extend([0] * (len(added) - len(bitmaps)))
+            for code, bitmap in enumerate(added):
+                if bitmap:
+                    bitmaps[code] |= bitmap << start
+
+    def label_bitmaps(self, category):
+        """ Return a list mapping each label code of category to the
+        bitmap of the listings with that label. The bitmaps are built
+        on first use and kept up to date as listings are added.
+
+        Key Arguments:
+            category (Categories): a member of the Categories Enum
+        """
+        if not self.keep_rows:
+            raise ValueError("Bitmaps need a store that keeps its rows")
+        bitmaps = self._bitmaps.get(category)
+        if bitmaps is None:
+            if self.instrumentation is not None:
+                self.instrumentation.count("bitmap_rows_indexed", len(self))
+            codes = self.codes[category]
+            bitmaps = ColumnStore._label_bitmaps(
+                codes if len(codes) == len(self) else codes[:len(self)],
+                len(self.code_labels[category]))
+            self._bitmaps[category] = bitmaps
+        return bitmaps
+
+    def select(self, codes: dict):
+        """ Return the bitmap of the listings whose code in every
+        category of codes is one of the codes given for it, that is the
+        AND across categories of the OR of the label bitmaps within each.
+
+        Key Arguments:
+            codes (dict): maps categories to collections of label codes
+        """
+        selection = (1 << len(self)) - 1
+        for category, category_codes in codes.items():
+            bitmaps = self.label_bitmaps(category)
+            union = 0
+            for code in category_codes:
+                union |= bitmaps[code]
+            selection &= union
+        return selection
+
+    def selected_rows(self, selection: int):
+        """ Yield the rows of the listings in the bitmap selection, in
+        order. Runs of empty bytes are skipped by a regular expression
+        scan, so only the bytes holding selected rows are visited here.
+        """
+        data = selection.to_bytes((len(self) + 7) // 8, 'little')
+        positions = ColumnStore._bit_positions
+        for run in re.finditer(b'[^\x00]+', data):
+            for index in range(run.start(), run.end()):
+                base = 8 * index
+                for bit in positions[data[index]]:
+                    yield base + bit
+
+    def selected_prices(self, selection: int):
+        """ Return an iterator over the prices of the listings in the
+        bitmap selection, in row order.
+        """
+        prices = self.prices
+        return (prices[row] for row in self.selected_rows(selection))
+
+    def price_index(self):
+        """ Return a dictionary mapping each (location code, property
+        code) pair to two arrays: its prices in ascending order, and
+        their prefix sums, where prefix[i] is the sum of the i smallest
+        prices. DataSet.load_file builds the index as the load finishes,
+        other stores on first use, and listings added later are merged
+        into it.
+        """
+        if not self.keep_rows:
+            raise ValueError("Price ranges need every listing, which a "
+                             "streaming store does not keep")
+        if self._price_index is None:
+            if self.instrumentation is not None:
+                self.instrumentation.count("price_index_rows", len(self))
+            index = {}
+            for key, prices in ColumnStore._group_prices(
+                    *self._columns()).items():
+                prices.sort()
+                index[key] = (array('d', prices), array(
+                    'd', itertools.accumulate(prices, initial=0.0)))
+            self._price_index = index
+        return self._price_index
+
+    def _update_price_index(self, location_codes, property_codes, prices):
+        """ Merge listings being added into the price index, if it has
+        been built. Each cell they fall in gets new arrays, copied up to
+        the first added price, with the rest of its prices merged with
+        the added ones and their prefix sums carried on from there; the
+        other cells keep the arrays they share with earlier versions.
+        """
+        if self._price_index is None:
+            return
+        index = dict(self._price_index)
+        for key, added in ColumnStore._group_prices(
+                location_codes, property_codes, prices).items():
+            added.sort()
+            old_prices, old_prefix = index.get(key, ((), (0.0,)))
+            start = bisect.bisect_right(old_prices, added[0])
+            tail = sorted(itertools.chain(old_prices[start:], added))
+            cell_prices = array('d', bytes(old_prices[:start]))
+            cell_prices.extend(tail)
+            prefix = array('d', bytes(old_prefix[:start]))
+            prefix.extend(itertools.accumulate(tail,
+                                               initial=old_prefix[start]))
+            index[key] = (cell_prices, prefix)
+        self._price_index = index
+
+    def _price_bounds(self, key, low, high):
+        """ Return the sorted prices of cell key, their prefix sums, and
+        the start and stop of the prices from low to high inclusive, or
+        None if the cell has no listings.
+        """
+        entry = self.price_index().get(key)
+        if entry is None:
+            return None
+        prices, prefix = entry
+        start = 0 if low is None else bisect.bisect_left(prices, low)
+        stop = (len(prices) if high is None
+                else bisect.bisect_right(prices, high))
+        return prices, prefix, start, max(start, stop)
+
+    def range_aggregate(self, key, low=None, high=None):
+        """ Return a CellAggregate of the prices of cell key from low to
+        high inclusive, found by binary search in the price index, or
+        None if no price is in range.
+
+        Key Arguments:
+            key (tuple): the (location code, property code) of the cell
+            low (float): the lowest price counted, or None for no limit
+            high (float): the highest price counted, or None for no
+            limit
+        """
+        bounds = self._price_bounds(key, low, high)
+        if bounds is None or bounds[2] == bounds[3]:
+            return None
+        prices, prefix, start, stop = bounds
+        return CellAggregate(stop - start, prefix[stop] - prefix[start],
+                             prices[start], prices[stop - 1])
+
+    def range_prices(self, key, low=None, high=None):
+        """ Return the prices of cell key from low to high inclusive as
+        a sorted array, as in range_aggregate.
+        """
+        bounds = self._price_bounds(key, low, high)
+        if bounds is None:
+            return array('d')
+        prices, _, start, stop = bounds
+        return prices[start:stop]
+
+    def cell_histograms(self, edges, batch_size=1 << 20):
+        """ Return a dictionary mapping each (location code, property
+        code) pair to a list of the number of its prices below edges[0],
+        in each range from one edge up to (but not including) the next,
+        and from edges[-1] up. The counts for the histogram_edges of the
+        store are kept up to date as listings are added; other edges are
+        counted with one binary search per edge in the price index of
+        each cell, or by bucketing the price column in batches when the
+        index has not been built.
+
+        Key Arguments:
+            edges (list): the ascending bin edges
+        """
+        if (self._histograms is not None
+                and tuple(edges) == self.histogram_edges):
+            if self.instrumentation is not None:
+                self.instrumentation.count("histogram_cache_hits")
+            return self._histograms
+        if not self.keep_rows:
+            raise ValueError("A streaming store only has histograms for "
+                             "the histogram_edges it was loaded with")
+        histograms = {}
+        if self._price_index is None:
+            if self.instrumentation is not None:
+                self.instrumentation.count("histogram_rows_scanned",
+                                           len(self))
+            location_codes, property_codes, prices = self._columns()
+            for start in range(0, len(prices), batch_size):
+                stop = start + batch_size
+                ColumnStore._fold_histograms(
+                    histograms, edges, location_codes[start:stop],
+                    property_codes[start:stop], prices[start:stop])
+            return histograms
+        for key, (prices, _) in self.price_index().items():
+            below = [bisect.bisect_left(prices, edge) for edge in edges]
+            histograms[key] = [stop - start for start, stop in zip(
+                [0, *below], [*below, len(prices)])]
+        return histograms
+
+    def cell_aggregates(self):
+        """ Return a dictionary mapping each (location code, property
+        code) pair present in the store to its CellAggregate. All cells
+        are built in a single pass over the columns and then cached.
+        """
+        if self.instrumentation is not None:
+            if self._cells is None:
+                self.instrumentation.count("rows_scanned", len(self))
+                self.instrumentation.count("cell_cache_misses")
+            else:
+                self.instrumentation.count("cell_cache_hits")
+        if self._cells is None:
+            cells = {}
+            ColumnStore._fold_cells(cells, *self._columns())
+            self._cells = cells
+        return self._cells
+
+
+class _TableOwner:
+    """ Held by a SQLiteStore that created its listings table and by its
+    copies; the table is dropped when the last of them lets go.
+    """
+
+    def __init__(self, database: str, table: str):
+        weakref.finalize(self, _TableOwner._drop, database, table)
+
+    @staticmethod
+    def _drop(database: str, table: str):
+        # The file may be gone already, and must not be created again.
+        uri = f"{pathlib.Path(database).absolute().as_uri()}?mode=rw"
+        with contextlib.suppress(sqlite3.Error), contextlib.closing(
+                sqlite3.connect(uri, timeout=60, uri=True)) as connection:
+            with connection:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class SQLiteStore(ColumnStore):
+    """ A ColumnStore that keeps the listings in a SQLite database file
+    rather than in memory, for files too large for RAM. Listings are
+    inserted with executemany, one transaction per batch, and SQLite
+    computes the cell aggregates with a GROUP BY and price ranges from
+    an index on (location, room type, price). Labels and the cached
+    aggregates stay in memory as in a ColumnStore that does not keep its
+    rows.
+
+    Each load writes a new table of a unique name, which is dropped once
+    neither the store that created it nor any copy of it is left, so
+    other DataSets and processes can share the database file. Each store
+    only reads the rows up to its last row id, so the copy an append
+    works on leaves the previous version as it was. Every thread queries
+    through its own connection.
+
+    Key Arguments:
+        database (str or PathLike): the SQLite database file
+        table (str): an existing listings table to read, which is never
+        dropped; by default a new one is created
+        sample_size (int): if given, keep a CellSample of this many
+        prices per cell, filled as the listings are inserted
+    """
+
+    def __init__(self, database, table: str = None,
+                 sample_size: int = None):
+        super().__init__(keep_rows=False, sample_size=sample_size)
+        self.database = os.fspath(database)
+        self._cells = None
+        self._sketches = None
+        self._max_rowid = 0
+        self._indexed = False
+        self._connections = threading.local()
+        self.table = table
+        self._owner = None
+        if table is None:
+            self.table = self._create_table()
+            self._owner = _TableOwner(self.database, self.table)
+
+    def _connection(self):
+        """ Return the connection of the current thread. """
+        connection = getattr(self._connections, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.database, timeout=60)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._connections.connection = connection
+        return connection
+
+    def _create_table(self):
+        """ Create an empty listings table and return its name. """
+        table = f"listings_{uuid.uuid4().hex}"
+        connection = self._connection()
+        with connection:
+            connection.execute(f"CREATE TABLE {table} (location INTEGER "
+                               f"NOT NULL, room_type INTEGER NOT NULL, "
+                               f"price REAL NOT NULL)")
+        return table
+
+    def _query(self, sql: str, parameters=()):
+        """ Return a cursor over the rows of sql, run on the listings up
+        to the last row of this store. The table name is substituted
+        for {table}, and the row id bound is the last parameter.
+        """
+        connection = self._connection()
+        if not self._indexed:
+            # Built after the bulk insert rather than maintained by it.
+            with connection:
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_cells ON "
+                    f"{self.table} (location, room_type, price)")
+                connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self.table}_room_type ON "
+                    f"{self.table} (room_type, price)")
+            self._indexed = True
+        return connection.execute(sql.format(table=self.table),
+                                  (*parameters, self._max_rowid))
+
+    def _insert(self, location_codes, property_codes, prices):
+        """ Insert listings in one transaction and move the row id bound
+        of this store past them.
+        """
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                f"INSERT INTO {self.table} VALUES (?, ?, ?)",
+                zip(location_codes, property_codes, prices))
+        self._max_rowid = connection.execute(
+            f"SELECT MAX(rowid) FROM {self.table}").fetchone()[0] or 0
+
+    def extend_coded(self, location_codes, property_codes, prices):
+        self._insert(location_codes, property_codes, prices)
+        if self._cells is not None:
+            ColumnStore._fold_cells(self._cells, location_codes,
+                                    property_codes, prices)
+        if self._sketches is not None:
+            ColumnStore._fold_sketches(self._sketches, location_codes,
+                                       property_codes, prices)
+        if self._samples is not None:
+            ColumnStore._fold_samples(self._samples, location_codes,
+                                      property_codes, prices,
+                                      self.sample_size)
+        self._row_count += len(prices)
+
+    def merge(self, other: ColumnStore):
+        """ Insert every listing of another store, which must keep its
+        rows, and merge its aggregates as ColumnStore.merge does.
+        """
+        mappings = {category: [self.code_for(category, label)
+                               for label in other.code_labels[category]]
+                    for category in DataSet.Categories}
+        location_map = mappings[DataSet.Categories.LOCATION]
+        property_map = mappings[DataSet.Categories.PROPERTY_TYPE]
+        if self._cells is None:
+            self.cell_aggregates()
+        self._insert(
+            [location_map[code]
+             for code in other.codes[DataSet.Categories.LOCATION]],
+            [property_map[code]
+             for code in other.codes[DataSet.Categories.PROPERTY_TYPE]],
+            other.prices)
+        super().merge(other)
+
+    def copy(self):
+        """ Return a store over the same table and rows that can be
+        appended to without changing this one.
+        """
+        other = SQLiteStore(self.database, self.table, self.sample_size)
+        for category in DataSet.Categories:
+            other.code_labels[category] = list(self.code_labels[category])
+            other.label_codes[category] = dict(self.label_codes[category])
+        other._row_count = self._row_count
+        other._max_rowid = self._max_rowid
+        other._indexed = self._indexed
+        other._owner = self._owner
+        if self._cells is not None:
+            other._cells = {key: CellAggregate(cell.count, cell.total,
+                                               cell.minimum, cell.maximum)
+                            for key, cell in self._cells.items()}
+        other._sketches = copy.deepcopy(self._sketches)
+        other._samples = copy.deepcopy(self._samples)
+        other.instrumentation = self.instrumentation
+        return other
+
+    def cell_aggregates(self):
+        """ Return the CellAggregate of every (location code, property
+        code) pair, computed by one GROUP BY query and then cached.
+        """
+        if self.instrumentation is not None:
+            if self._cells is None:
+                self.instrumentation.count("cell_cache_misses")
+            else:
+                self.instrumentation.count("cell_cache_hits")
+        if self._cells is None:
+            self._cells = {
+                (location, property_type): CellAggregate(count, total,
+                                                         minimum, maximum)
+                for location, property_type, count, total, minimum, maximum
+                in self._query(
+                    "SELECT location, room_type, COUNT(*), SUM(price), "
+                    "MIN(price), MAX(price) FROM {table} WHERE rowid <= ? "
+                    "GROUP BY location, room_type")}
+        return self._cells
+
+    def cell_sketches(self, batch_size=1 << 20):
+        """ Return the QuantileSketch of every (location code, property
+        code) pair, folded from the prices batch_size rows at a time in
+        index order, and then cached.
+        """
+        if self.instrumentation is not None:
+            if self._sketches is None:
+                self.instrumentation.count("sketch_rows_scanned", len(self))
+            else:
+                self.instrumentation.count("sketch_cache_hits")
+        if self._sketches is None:
+            sketches = {}
+            for rows in self._batches(batch_size):
+                ColumnStore._fold_sketches(sketches, *zip(*rows))
+            self._sketches = sketches
+        return self._sketches
+
+    def cell_samples(self, batch_size=1 << 20):
+        """ Return the CellSample of every (location code, property
+        code) pair, folded from the prices batch_size rows at a time if
+        the store was not built with a sample_size, and then cached.
+        """
+        if self.instrumentation is not None:
+            if self._samples is None:
+                self.instrumentation.count("sample_rows_scanned", len(self))
+            else:
+                self.instrumentation.count("sample_cache_hits")
+        if self._samples is None:
+            self.sample_size = self.sample_size or default_sample_size
+            samples = {}
+            for rows in self._batches(batch_size):
+                ColumnStore._fold_samples(samples, *zip(*rows),
+                                          self.sample_size)
+            self._samples = samples
+        return self._samples
+
+    def _batches(self, batch_size: int):
+        """ Yield the (location, room type, price) rows of the store in
+        lists of up to batch_size, in index order.
+        """
+        cursor = self._query(
+            "SELECT location, room_type, price FROM {table} "
+            "WHERE rowid <= ? ORDER BY location, room_type")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield rows
+
+    def price_index(self):
+        raise ValueError("A SQLiteStore has no price index; its price "
+                         "ranges are answered by SQLite")
+
+    def range_aggregate(self, key, low=None, high=None):
+        """ Return a CellAggregate of the prices of cell key from low to
+        high inclusive, or None if no price is in range, as in
+        ColumnStore.range_aggregate.
+        """
+        count, total, minimum, maximum = self._query(
+            "SELECT COUNT(*), SUM(price), MIN(price), MAX(price) "
+            "FROM {table} WHERE location = ? AND room_type = ? "
+            "AND price >= ? AND price <= ? AND rowid <= ?",
+            SQLiteStore._range_parameters(key, low, high)).fetchone()
+        if not count:
+            return None
+        return CellAggregate(count, total, minimum, maximum)
+
+    def range_prices(self, key, low=None, high=None):
+        """ Return the prices of cell key from low to high inclusive as
+        a sorted array.
+        """
+        return array('d', (price for (price,) in self._query(
+            "SELECT price FROM {table} WHERE location = ? "
+            "AND room_type = ? AND price >= ? AND price <= ? "
+            "AND rowid <= ? ORDER BY price",
+            SQLiteStore._range_parameters(key, low, high))))
+
+    @staticmethod
+    def _range_parameters(key, low, high):
+        return (*key, -math.inf if low is None else low,
+                math.inf if high is None else high)
+
+    def cell_histograms(self, edges):
+        """ Return the bin counts of every cell as in
+        ColumnStore.cell_histograms, computed by one GROUP BY query.
+        """
+        below = ", ".join("SUM(price < ?)" for _ in edges)
+        histograms = {}
+        for location, property_type, count, *counts in self._query(
+                f"SELECT location, room_type, COUNT(*), {below} "
+                f"FROM {{table}} WHERE rowid <= ? "
+                f"GROUP BY location, room_type", edges):
+            histograms[(location, property_type)] = [
+                stop - start for start, stop in zip([0, *counts],
+                                                    [*counts, count])]
+        return histograms
+
+
+class Dimension:
+    """ A dimension of a DataCube: the value of one column of the
+    listing file, named by its header, or for a numeric column the range
+    of buckets the value falls in. Buckets are given by their sorted
+    lower edges and include the lower edge but not the next one, so
+    edges [1, 7, 30] give the ranges "<1", "1-7", "7-30", and "30+".
+    """
+
+    def __init__(self, column: str, buckets=None, name: str = None):
+        self.column = column
+        self.name = name or column
+        self.buckets = None if buckets is None else sorted(buckets)
+        if self.buckets is not None:
+            edges = [f"{edge:g}" for edge in self.buckets]
+            self.labels = ([f"<{edges[0]}"]
+                           + [f"{low}-{high}"
+                              for low, high in zip(edges, edges[1:])]
+                           + [f"{edges[-1]}+"])
+
+    def label(self, text: str):
+        """ Return the label of the column value text in this dimension.
+        A numeric dimension labels values that are not numbers "N/A".
+        """
+        if self.buckets is None:
+            return text
+        try:
+            return self.labels[bisect.bisect_right(self.buckets,
+                                                   float(text))]
+        except ValueError:
+            return "N/A"
+
+
+class DataCube:
+    """ A data cube of the listings: one CellAggregate of the prices for
+    every combination of dimension labels that occurs. Any roll-up to a
+    subset of the dimensions, sliced to chosen labels, is merged from
+    the cube without reading the listings again, and roll-ups without a
+    slice are cached. Files added with defer_file are only read when the
+    cells are first needed.
+    """
+
+    def __init__(self, dimensions: list):
+        self.dimensions = list(dimensions)
+        self.names = [dimension.name for dimension in self.dimensions]
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("Dimension names must be unique")
+        self._pending = []
+        self.cells = {}
+        self._rollups = {}
+
+    @property
+    def cells(self):
+        """ The CellAggregate of every combination of labels, read from
+        any deferred files on first use.
+        """
+        if self._pending:
+            with materialize_lock:
+                for source in self._pending:
+                    self._read_file(source)
+                self._pending = []
+        return self._cells
+
+    @cells.setter
+    def cells(self, cells: dict):
+        self._cells = cells
+
+    def add_file(self, source):
+        """ Add every listing in source, a CSV file with a header row, to
+        the cube and return the cube. The columns of the dimensions and
+        the price are found by their header names.
+
+        Key Arguments:
+            source (str, PathLike or file): the CSV file to read
+        """
+        self.cells  # Read any deferred files first.
+        self._read_file(source)
+        return self
+
+    def defer_file(self, path):
+        """ Add the listings of the CSV file at path to the cube the
+        first time its cells are needed, and return the cube. Only the
+        header is read now, to check that the columns are there.
+
+        Key Arguments:
+            path (str or PathLike): the CSV file to read later
+        """
+        with open_listing_source(path) as file:
+            self._columns(next(csv.reader(file), []))
+        self._pending.append(path)
+        return self
+
+    def _columns(self, header: list):
+        """ Return the position of the price in header and a (position,
+        label function) pair per dimension, raising ValueError if a
+        column is missing.
+        """
+        try:
+            return header.index('price'), [
+                (header.index(dimension.column), dimension.label)
+                for dimension in self.dimensions]
+        except ValueError as error:
+            raise ValueError(f"Column not found: {error}") from None
+
+    def _read_file(self, source):
+        """ Add every listing in source to the cells, as add_file does.
+        """
+        with open_listing_source(source) as file:
+            rows = csv.reader(file)
+            price_column, columns = self._columns(next(rows, []))
+            cells = self._cells
+            for row in rows:
+                key = tuple(label(row[column]) for column, label in columns)
+                price = float(row[price_column])
+                cell = cells.get(key)
+                if cell is None:
+                    cells[key] = CellAggregate(1, price, price, price)
+                else:
+                    cell.add(price)
+        self._rollups = {}
+
+    def copy(self):
+        """ Return a copy of the cube that can be added to without
+        changing this one.
+        """
+        other = DataCube(self.dimensions)
+        other.cells = {key: CellAggregate(cell.count, cell.total,
+                                          cell.minimum, cell.maximum)
+                       for key, cell in self.cells.items()}
+        return other
+
+    def _positions(self, names):
+        """ Return the position of each dimension name in the cube keys,
+        raising KeyError for a name that is not a dimension.
+        """
+        try:
+            return [self.names.index(name) for name in names]
+        except ValueError:
+            raise KeyError(next(name for name in names
+                                if name not in self.names)) from None
+
+    def order_key(self, names):
+        """ Return a key function ordering tuples of labels of the
+        dimensions names by label, with buckets in numeric order.
+        """
+        orders = []
+        for position in self._positions(names):
+            dimension = self.dimensions[position]
+            if dimension.buckets is None:
+                orders.append(None)
+            else:
+                orders.append({label: index for index, label
+                               in enumerate(dimension.labels)})
+
+        def key(labels):
+            return tuple(label if order is None
+                         else order.get(label, len(order))
+                         for label, order in zip(labels, orders))
+        return key
+
+    def labels(self, name: str):
+        """ Return the set of labels that occur in dimension name. """
+        position = self._positions([name])[0]
+        return {key[position] for key in self.cells}
+
+    def rollup(self, group_by=(), where: dict = None):
+        """ Return a dictionary mapping each combination of labels of the
+        group_by dimensions to the CellAggregate merged from the cube
+        cells with those labels, keeping only the cells whose label in
+        each dimension of where is one of the labels given for it.
+
+        Key Arguments:
+            group_by (iterable): the names of the dimensions kept
+            where (dict): maps dimension names to iterables of labels
+        """
+        group_by = tuple(group_by)
+        if not where and group_by in self._rollups:
+            return self._rollups[group_by]
+        positions = self._positions(group_by)
+        conditions = [(position, set(labels)) for position, labels in zip(
+            self._positions(list(where or {})), (where or {}).values())]
+        merged = {}
+        for key, cell in self.cells.items():
+            if all(key[position] in labels
+                   for position, labels in conditions):
+                rolled = tuple(key[position] for position in positions)
+                aggregate = merged.get(rolled)
+                if aggregate is None:
+                    merged[rolled] = CellAggregate(
+                        cell.count, cell.total, cell.minimum, cell.maximum)
+                else:
+                    aggregate.merge(cell)
+        if not where:
+            self._rollups[group_by] = merged
+        return merged
+
+
+def make_dimensions(columns):
+    """ Return a Dimension for each column name in columns, bucketing the
+    numeric columns of the NYC export by the edges in default_buckets.
+    """
+    return [Dimension(column, default_buckets.get(column))
+            for column in columns]
+
+
+def open_listing_source(source):
+    """ Return a context manager for reading listings from source. A
+    path is opened (and closed afterwards); an object that is already
+    readable is used as is and left open.
+
+    Key Arguments:
+        source (str, PathLike or file): the CSV file to read
+    """
+    if hasattr(source, 'read'):
+        return contextlib.nullcontext(source)
+    return open(source, 'r', newline='')
+
+
+def bytes_read(file):
+    """ Return how far into file reading has progressed, or None if the
+    file cannot tell.
+    """
+    try:
+        return getattr(file, 'buffer', file).tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def parse_listings(csv_rows):
+    """ Yield a (location, property type, price) tuple for each listing
+    row from a csv reader, skipping the header row.
+    """
+    for row in csv_rows:
+        if row[3] != 'price':
+            yield row[1], row[2], float(row[3])
+
+
+def split_listing_file(path, parts: int):
+    """ Return a list of (start, end) byte ranges that divide the file
+    at path into about parts pieces. Every range starts at the beginning
+    of a record: a newline only ends a record when an even number of
+    quote characters precedes it, so quoted fields holding newlines are
+    never split.
+
+    Key Arguments:
+        path (str or PathLike): the CSV file to divide
+        parts (int): the number of ranges wanted
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return [(0, 0)]
+    boundaries = [0]
+    with open(path, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        position = 0
+        quotes = 0
+        for part in range(1, parts):
+            target = size * part // parts
+            if target <= position:
+                continue
+            quotes += mapped[position:target].count(b'"')
+            position = target
+            while position < size:
+                newline = mapped.find(b'\n', position)
+                if newline == -1:
+                    position = size
+                    break
+                quotes += mapped[position:newline].count(b'"')
+                position = newline + 1
+                if quotes % 2 == 0:
+                    break
+            if position >= size:
+                break
+            boundaries.append(position)
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def split_quoted_record(mapped, position: int, end: int):
+    """ Split the CSV record starting at position into its fields,
+    following RFC 4180 quoting, and return the fields (as bytes) along
+    with the position just past the record.
+    """
+    fields = []
+    while True:
+        if mapped[position:position + 1] == b'"':
+            parts = []
+            start = position + 1
+            while True:
+                close = mapped.find(b'"', start, end)
+                if close == -1:
+                    close = end
+                parts.append(mapped[start:close])
+                if mapped[close + 1:close + 2] != b'"':
+                    break
+                parts.append(b'"')
+                start = close + 2
+            fields.append(b''.join(parts))
+            position = close + 1
+            delimiter = mapped[position:position + 1]
+            if delimiter == b'\r':
+                position += 1
+                delimiter = mapped[position:position + 1]
+        else:
+            comma = mapped.find(b',', position, end)
+            newline = mapped.find(b'\n', position, end)
+            if newline == -1:
+                newline = end
+            if comma == -1 or newline < comma:
+                fields.append(mapped[position:newline].rstrip(b'\r'))
+                position = newline
+            else:
+                fields.append(mapped[position:comma])
+                position = comma
+            delimiter = mapped[position:position + 1]
+        if delimiter == b',':
+            position += 1
+        else:
+            return fields, position + 1
+
+
+def scan_listing_chunks(mapped, store: ColumnStore, start=0, end=None,
+                        block_size=1 << 23, parse_prices=True):
+    """ Walk the bytes of a memory-mapped CSV file a block at a time and
+    yield a (location codes, property codes, prices, position) tuple of
+    lists for each block, taking only the location, room type, and price
+    fields of each record. Label bytes are interned straight into the
+    codes of store, so no string is created for a label that has been
+    seen before. Blocks end on a newline preceded by balanced quotes, so
+    no record is split between blocks.
+
+    Records whose first four fields are unquoted are split in one step,
+    with any quoted newlines after them joined back by balancing quotes;
+    other records go through split_quoted_record.
+
+    Key Arguments:
+        mapped (mmap or bytes): the contents of the CSV file
+        store (ColumnStore): the store whose label codes are used
+        start (int): the byte offset of the first record to read
+        end (int): the byte offset just past the last record to read
+        block_size (int): the approximate number of bytes per block
+        parse_prices (bool): convert the prices of each block to floats
+        in bulk; if False they are yielded as the bytes of the fields
+    """
+    if end is None:
+        end = len(mapped)
+    location_lookup = {}
+    property_lookup = {}
+    header_prices = (b'price', b'price\r')
+    position = start
+    while position < end:
+        block_end = min(position + block_size, end)
+        newline = mapped.find(b'\n', block_end - 1, end)
+        block_end = end if newline == -1 else newline + 1
+        block = mapped[position:block_end]
+        quotes = block.count(b'"')
+        while quotes % 2 and block_end < end:
+            newline = mapped.find(b'\n', block_end, end)
+            next_end = end if newline == -1 else newline + 1
+            extra = mapped[block_end:next_end]
+            quotes += extra.count(b'"')
+            block += extra
+            block_end = next_end
+        position = block_end
+
+        location_codes = []
+        property_codes = []
+        prices = []
+        lines = iter(block.split(b'\n'))
+        for line in lines:
+            fields = line.split(b',', 4)
+            first_quote = line.find(b'"')
+            if first_quote != -1:
+                quotes = line.count(b'"')
+                if quotes % 2:
+                    parts = [line]
+                    for part in lines:
+                        parts.append(part)
+                        quotes += part.count(b'"')
+                        if quotes % 2 == 0:
+                            break
+                    line = b'\n'.join(parts)
+                    fields = line.split(b',', 4)
+                if len(fields) < 5 or \
+                        first_quote < len(line) - len(fields[4]):
+                    fields = split_quoted_record(line, 0, len(line))[0]
+            if len(fields) < 4 or fields[3] in header_prices:
+                continue
+            location_code = location_lookup.get(fields[1])
+            if location_code is None:
+                location_code = store.code_for(DataSet.Categories.LOCATION,
+                                               fields[1].decode())
+                location_lookup[fields[1]] = location_code
+            property_code = property_lookup.get(fields[2])
+            if property_code is None:
+                property_code = store.code_for(
+                    DataSet.Categories.PROPERTY_TYPE, fields[2].decode())
+                property_lookup[fields[2]] = property_code
+            location_codes.append(location_code)
+            property_codes.append(property_code)
+            prices.append(fields[3])
+        if parse_prices:
+            prices = list(map(float, prices))
+        yield location_codes, property_codes, prices, position
+
+
+def scan_listing_file(path, store: ColumnStore, progress=None, start=0,
+                      end=None, lazy=False):
+    """ Memory-map the CSV file at path and add the listings between
+    byte offsets start and end to store with scan_listing_chunks.
+
+    Key Arguments:
+        path (str or PathLike): the CSV file to read
+        store (ColumnStore): the store to add the listings to
+        progress (callable): called after every block with the number
+        of listings in store and the bytes read so far
+        start (int): the byte offset of the first record to read
+        end (int): the byte offset just past the last record to read
+        lazy (bool): add the listings with extend_raw, leaving their
+        prices to be parsed when first needed
+    """
+    if os.path.getsize(path) == 0:
+        return
+    extend = store.extend_raw if lazy else store.extend_coded
+    with open(path, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for location_codes, property_codes, prices, position in \
+                scan_listing_chunks(mapped, store, start, end,
+                                    parse_prices=not lazy):
+            extend(location_codes, property_codes, prices)
+            if progress is not None:
+                progress(len(store), position)
+
+
+def load_listing_range(path, start: int, end: int, keep_rows=True,
+                       sample_size: int = None, histogram_edges: list = None):
+    """ Parse the listings in one byte range of a CSV file and return
+    them as a ColumnStore with its cell aggregates already built. This
+    runs in the worker processes of a parallel load.
+
+    Key Arguments:
+        path (str or PathLike): the CSV file to read
+        start (int): the byte offset of the first record in the range
+        end (int): the byte offset just past the last record
+        keep_rows (bool): keep the listings as well as the aggregates
+        sample_size (int): if given, also keep a CellSample of this many
+        prices per cell
+        histogram_edges (list): if given, also count the prices of each
+        cell in the bins of these edges
+    """
+    store = ColumnStore(keep_rows, sample_size, histogram_edges)
+    scan_listing_file(path, store, start=start, end=end)
+    store.cell_aggregates()
+    return store
+
+
+SNAPSHOT_MAGIC = b'ABNBSNAP'
+SNAPSHOT_VERSION = 2
+
+
+def snapshot_path(source):
+    """ Return the path of the binary snapshot kept next to source. """
+    return os.fspath(source) + '.snapshot'
+
+
+def file_digest(path):
+    """ Return the hex BLAKE2b digest of the contents of a file. """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_snapshot(store: ColumnStore, source, parsed_stat=None):
+    """ Write the columns, label dictionaries, cell aggregates, and
+    price index of store to a binary snapshot next to source, keyed on
+    the size, modification time, and content hash of source. The
+    columns are stored as raw 8-byte aligned arrays so that
+    load_snapshot can map them without copying. Failing to write the
+    snapshot is not an error.
+
+    Key Arguments:
+        store (ColumnStore): the store parsed from source
+        source (str or PathLike): the CSV file the store was parsed from
+        parsed_stat (os.stat_result): if given, the status of source
+        when it was parsed; no snapshot is written if source has
+        changed since
+    """
+    try:
+        source_stat = os.stat(source)
+    except OSError:
+        return
+    if parsed_stat is not None and (
+            (parsed_stat.st_size, parsed_stat.st_mtime_ns)
+            != (source_stat.st_size, source_stat.st_mtime_ns)):
+        return
+    *codes, prices = store._columns()
+    index = store.price_index()
+    sorted_prices = array('d')
+    prefix_sums = array('d')
+    for cell_prices, prefix in index.values():
+        sorted_prices.extend(cell_prices)
+        prefix_sums.extend(prefix)
+    columns = [('prices', prices)] + [
+        (category.name, codes[category.value])
+        for category in DataSet.Categories] + [
+        ('sorted_prices', sorted_prices), ('prefix_sums', prefix_sums)]
+    offsets = {}
+    position = 0
+    for name, column in columns:
+        length = len(column) * column.itemsize
+        offsets[name] = [position, length, column.typecode]
+        position += length + (-length % 8)
+    header = json.dumps({
+        'version': SNAPSHOT_VERSION,
+        'byteorder': sys.byteorder,
+        'size': source_stat.st_size,
+        'mtime_ns': source_stat.st_mtime_ns,
+        'hash': file_digest(source),
+        'rows': len(store),
+        'labels': {category.name: store.code_labels[category]
+                   for category in DataSet.Categories},
+        'cells': [[location, property_type, cell.count, cell.total,
+                   cell.minimum, cell.maximum]
+                  for (location, property_type), cell
+                  in store.cell_aggregates().items()],
+        'index': [[location, property_type, len(cell_prices)]
+                  for (location, property_type), (cell_prices, _)
+                  in index.items()],
+        'columns': offsets,
+    }).encode()
+    header += b' ' * (-(len(SNAPSHOT_MAGIC) + 8 + len(header)) % 8)
+
+    temporary_path = snapshot_path(source) + '.tmp'
+    try:
+        with open(temporary_path, 'wb') as file:
+            file.write(SNAPSHOT_MAGIC)
+            file.write(len(header).to_bytes(8, 'little'))
+            file.write(header)
+            for name, column in columns:
+                data = column.tobytes()
+                file.write(data)
+                file.write(bytes(-len(data) % 8))
+        os.replace(temporary_path, snapshot_path(source))
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(temporary_path)
+
+
+def load_snapshot(source):
+    """ Return a ColumnStore whose columns are memory-mapped from the
+    snapshot of source, or None if there is no snapshot or it no longer
+    matches source. A snapshot matches when the size and modification
+    time of source are unchanged, or when its size is unchanged and its
+    contents still hash to the same digest.
+
+    Key Arguments:
+        source (str or PathLike): the CSV file the snapshot was made from
+    """
+    try:
+        with open(snapshot_path(source), 'rb') as file:
+            if file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            header_length = int.from_bytes(file.read(8), 'little')
+            header = json.loads(file.read(header_length))
+            data_start = len(SNAPSHOT_MAGIC) + 8 + header_length
+            source_stat = os.stat(source)
+            if (header['version'] != SNAPSHOT_VERSION
+                    or header['byteorder'] != sys.byteorder
+                    or header['size'] != source_stat.st_size):
+                return None
+            if (header['mtime_ns'] != source_stat.st_mtime_ns
+                    and header['hash'] != file_digest(source)):
+                return None
+            mapped = memoryview(mmap.mmap(file.fileno(), 0,
+                                          access=mmap.ACCESS_READ))
+    except (OSError, ValueError, KeyError):
+        return None
+
+    def column(name):
+        offset, length, typecode = header['columns'][name]
+        start = data_start + offset
+        return mapped[start:start + length].cast(typecode)
+
+    store = ColumnStore()
+    store.prices = column('prices')
+    for category in DataSet.Categories:
+        store.codes[category] = column(category.name)
+        store.code_labels[category] = header['labels'][category.name]
+        store.label_codes[category] = {
+            label: code for code, label
+            in enumerate(header['labels'][category.name])}
+    store._cells = {(location, property_type): CellAggregate(*cell)
+                    for location, property_type, *cell in header['cells']}
+    sorted_prices = column('sorted_prices')
+    prefix_sums = column('prefix_sums')
+    store._price_index = {}
+    start = 0
+    for cell, (location, property_type, count) in enumerate(header['index']):
+        store._price_index[location, property_type] = (
+            sorted_prices[start:start + count],
+            prefix_sums[start + cell:start + cell + count + 1])
+        start += count
+    store._row_count = header['rows']
+    return store
+
+
+def read_listings(store: ColumnStore, source, progress=None,
+                  chunk_size=65536, lazy=False):
+    """ Add every listing in source to store. A path is scanned through
+    a memory map with scan_listing_file; an open file is parsed with
+    csv.reader in chunks of chunk_size listings.
+
+    Key Arguments:
+        store (ColumnStore): the store to add the listings to
+        source (str, PathLike or file): the CSV file to read
+        progress (callable): called after every chunk with the number
+        of listings in store and the bytes read so far
+        chunk_size (int): the number of listings per chunk of an open
+        file
+        lazy (bool): leave the prices of a path unparsed until they are
+        first needed, as in scan_listing_file
+    """
+    if not hasattr(source, 'read'):
+        scan_listing_file(source, store, progress, lazy=lazy)
+        return
+    with open_listing_source(source) as file:
+        for chunk in read_listing_chunks(file, chunk_size):
+            store.extend(chunk)
+            if progress is not None:
+                progress(len(store), bytes_read(file))
+
+
+def read_listing_chunks(file, chunk_size=65536):
+    """ Yield lists of at most chunk_size parsed listings from an open
+    CSV file, so that only one chunk is held in memory at a time.
+
+    Key Arguments:
+        file (file): an open text file of listings
+        chunk_size (int): the number of listings per chunk
+    """
+    listings = parse_listings(csv.reader(file))
+    while True:
+        chunk = list(itertools.islice(listings, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class DataSet:
+    """ The listings loaded from a file, with their labels, the active
+    label filters, and the aggregates the tables are built from.
+
+    A DataSet may be shared between threads as follows. A load or append
+    builds a new version of the listings and aggregates without touching
+    the current one, and swaps it in at once; only one load or append
+    runs at a time. Each reading thread works on its own session(),
+    which holds a version that never changes underneath it and its own
+    filters, and calls refresh() to move to the newest version.
+
+    When approximate is True, averages and quantiles in the cross and
+    field tables are estimated from a CellSample of each cell, with a
+    confidence interval, unless a query asks for exact values.
+    """
+    copyright = "No copyright has been set."
+
+    class Categories(Enum):
+        LOCATION = 0
+        PROPERTY_TYPE = 1
+
+    class Stats(Enum):
+        MIN = 2
+        AVG = 1
+        MAX = 3
+        MEDIAN = 4
+        P90 = 5
+        P99 = 6
+
+    _stat_indices = {Stats.MIN: 0, Stats.AVG: 1, Stats.MAX: 2}
+    _quantile_fractions = {Stats.MEDIAN: .5, Stats.P90: .9, Stats.P99: .99}
+    _sampled_stats = {Stats.AVG, *_quantile_fractions}
+    _stat_names = {Stats.MIN: "Minimum", Stats.AVG: "Average",
+                   Stats.MAX: "Maximum", Stats.MEDIAN: "Median",
+                   Stats.P90: "90th Pct", Stats.P99: "99th Pct"}
+
+    def __init__(self, header=""):
+        try:
+            self.header = header
+        except ValueError:
+            self.header = ""
+        self._data = None
+        self._labels = {DataSet.Categories.LOCATION: set(),
+                        DataSet.Categories.PROPERTY_TYPE: set()}
+        self._active_labels = {DataSet.Categories.LOCATION: set(),
+                               DataSet.Categories.PROPERTY_TYPE: set()}
+        self._field_aggregates = {}
+        self._field_sketches = {}
+        self._cube = None
+        self._version = 0
+        self._parent = None
+        self._swap_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        # The store, cube, and previous state of a lazy load, until
+        # finish_load.
+        self._unfinished = None
+        self._instrumentation = None
+        self.approximate = False
+
+    def enable_instrumentation(self, dump_on_exit=False):
+        """ Start recording timers and counters for the operations of
+        this DataSet, keeping any already recorded. If dump_on_exit is
+        True, the numbers are printed to stderr when the program exits.
+        """
+        if self._instrumentation is None:
+            self._instrumentation = Instrumentation()
+        if self._data is not None:
+            self._data.instrumentation = self._instrumentation
+        if dump_on_exit:
+            atexit.register(self._dump_instrumentation)
+
+    def disable_instrumentation(self):
+        """ Stop recording and discard the recorded numbers. """
+        self._instrumentation = None
+        if self._data is not None:
+            self._data.instrumentation = None
+
+    def instrumentation_stats(self):
+        """ Return the recorded timers and counters as a dictionary, or
+        None if instrumentation is not enabled.
+        """
+        if self._instrumentation is None:
+            return None
+        return self._instrumentation.stats()
+
+    def _dump_instrumentation(self):
+        """ Print the recorded timers and counters to stderr. """
+        if self._instrumentation is not None:
+            print(self._instrumentation.report(), file=sys.stderr)
+
+    def _count(self, name: str, amount=1):
+        """ Add amount to a counter if instrumentation is enabled. """
+        if self._instrumentation is not None:
+            self._instrumentation.count(name, amount)
+
+    def get_labels(self, category: Categories):
+        return list(self._labels[category])
+
+    def get_active_labels(self, category: Categories):
+        return list(self._active_labels[category])
+
+    @staticmethod
+    def sort_labels(labels, key=None, descending=False, limit=None):
+        """ Return the labels in sorted order in O(n log n) time. If
+        limit is given, only the first limit labels of that order are
+        returned, selected with a heap in O(n log k) time.
+
+        Key Arguments:
+            labels (iterable): the labels (or any items) to order
+            key (callable): computes the value each item is ordered by
+            descending (bool): order from largest to smallest
+            limit (int): the number of leading items to keep
+        """
+        if limit is None:
+            return sorted(labels, key=key, reverse=descending)
+        if descending:
+            return heapq.nlargest(limit, labels, key=key)
+        return heapq.nsmallest(limit, labels, key=key)
+
+    @staticmethod
+    def _display_currency(currency):
+        """ Return the currency tables should be shown in: currency if
+        given, otherwise the home currency, otherwise that of the data.
+        """
+        return currency or home_currency or data_currency
+
+    def _price_limits(self, price_range, currency: str = None):
+        """ Return price_range, a (low, high) pair of limits in the
+        display currency of which either may be None, converted to the
+        currency of the data, or None if no price_range is given. Raise
+        ValueError if the listings were loaded with streaming=True, as
+        the prices of a streaming load are not kept to search.
+        """
+        if price_range is None:
+            return None
+        if (self._data is not None and not self._data.keep_rows
+                and not isinstance(self._data, SQLiteStore)):
+            raise ValueError("Price ranges need every listing, which a "
+                             "DataSet loaded with streaming=True does not "
+                             "keep")
+        low, high = price_range
+        return tuple(convert_values((low, high), DataSet._display_currency(
+            currency), data_currency))
+
+    @staticmethod
+    def _statistic_key(value_for, descending: bool):
+        """ Return a sort key that orders labels by value_for(label),
+        placing labels without data (a value of None) last.
+        """
+        missing = float('-inf') if descending else float('inf')
+
+        def key(label):
+            value = value_for(label)
+            return missing if value is None else value
+        return key
+
+    @staticmethod
+    def _statistic(stat: Stats, aggregate: CellAggregate, sketch_for):
+        """ Return the value of stat for a group of listings, taken from
+        its aggregate or, for quantiles, from the sketch returned by
+        sketch_for(). Return None if the group is empty.
+        """
+        if aggregate is None or not aggregate.count:
+            return None
+        if stat in DataSet._quantile_fractions:
+            return sketch_for().quantile(DataSet._quantile_fractions[stat])
+        return aggregate.statistics()[DataSet._stat_indices[stat]]
+
+    def _merged_sketch(self, cell_filter):
+        """ Return a QuantileSketch merged from the sketches of the cells
+        whose keys satisfy cell_filter(key).
+        """
+        sketch = QuantileSketch()
+        for key, cell_sketch in self._data.cell_sketches().items():
+            if cell_filter(key):
+                sketch.merge(cell_sketch)
+        return sketch
+
+    @property
+    def header(self):
+        return self._header
+
+    @header.setter
+    def header(self, header: str):
+        if type(header) == str and len(header) <= 30:
+            self._header = header
+        else:
+            self._header = ""
+            raise ValueError
+
+    class EmptyDatasetError(Exception):
+        pass
+
+    class NoMatchingItems(Exception):
+        pass
+
+    class LoadCancelled(Exception):
+        pass
+
+    @instrumented
+    def _initialize_sets(self, data: ColumnStore, cube: DataCube = None):
+        """ Swap in data (and its cube) as the new version of the
+        listings and populate the dictionaries _labels and
+        _active_labels with the appropriate labels from it. Readers of
+        the previous version are not affected.
+        """
+        if data is None:
+            raise DataSet.EmptyDatasetError
+
+        location_set = set(
+            data.code_labels[DataSet.Categories.LOCATION])
+        property_type_set = set(
+            data.code_labels[DataSet.Categories.PROPERTY_TYPE])
+        labels = {DataSet.Categories.LOCATION: location_set,
+                  DataSet.Categories.PROPERTY_TYPE: property_type_set}
+        data.instrumentation = self._instrumentation
+        self._swap(data, cube, labels, copy.deepcopy(labels), {}, {})
+
+    def _swap(self, data: ColumnStore, cube, labels: dict,
+              active_labels: dict, field_aggregates: dict,
+              field_sketches: dict):
+        """ Replace the version of the listings and the state derived
+        from it in one step. Label sets are never changed in place once
+        swapped in, so sessions can share them.
+        """
+        with self._swap_lock:
+            self._data = data
+            self._cube = cube
+            self._labels = labels
+            self._active_labels = active_labels
+            self._field_aggregates = field_aggregates
+            self._field_sketches = field_sketches
+            self._version += 1
+
+    @property
+    def version(self):
+        """ The number of versions of the listings swapped in so far. """
+        return self._version
+
+    def session(self):
+        """ Return a new DataSet sharing the current version of the
+        listings and aggregates of this one, with a copy of its filters.
+        Loads and appends on this DataSet do not change the session
+        until its refresh() is called, and toggling labels in the
+        session does not change this DataSet.
+        """
+        view = DataSet(self.header)
+        view._parent = self
+        view._instrumentation = self._instrumentation
+        view.approximate = self.approximate
+        with self._swap_lock:
+            view._data = self._data
+            view._cube = self._cube
+            view._labels = self._labels
+            view._active_labels = dict(self._active_labels)
+            view._version = self._version
+        return view
+
+    def refresh(self):
+        """ Move a session to the newest version of the DataSet it was
+        created from. Labels the session had switched off stay off, and
+        labels that are new to it start active. Return True if the
+        version changed.
+        """
+        if self._parent is None or self._parent.version == self._version:
+            return False
+        parent = self._parent
+        with parent._swap_lock:
+            data, cube, labels, version = (parent._data, parent._cube,
+                                           parent._labels, parent._version)
+        active_labels = {
+            category: labels[category]
+            - (self._labels[category] - self._active_labels[category])
+            for category in DataSet.Categories}
+        self._swap(data, cube, labels, active_labels, {}, {})
+        self._version = version
+        return True
+
+    @staticmethod
+    def _other_category(category: Categories):
+        """ Return the category that is not the parameter category. """
+        if category == DataSet.Categories.LOCATION:
+            return DataSet.Categories.PROPERTY_TYPE
+        return DataSet.Categories.LOCATION
+
+    def _filtered_aggregates(self, filter_category: Categories):
+        """ Return a dictionary mapping each label code of the other
+        category to a CellAggregate merged from the cells whose
+        filter_category label is active. The dictionary is built from
+        the cell aggregates on first use and then kept up to date by
+        toggle_active_label.
+
+        Key Arguments:
+            filter_category (Categories): the category whose active
+            labels restrict the aggregates
+        """
+        aggregates = self._field_aggregates.get(filter_category)
+        if aggregates is not None:
+            self._count("field_cache_hits")
+        else:
+            self._count("field_cache_misses")
+            aggregates = self._merge_filtered_cells(
+                self._data.cell_aggregates(), filter_category,
+                self._active_labels[filter_category], CellAggregate)
+            self._field_aggregates[filter_category] = aggregates
+        return aggregates
+
+    def _merge_filtered_cells(self, cells: dict, filter_category: Categories,
+                              active_labels, empty):
+        """ Return a dictionary mapping each label code of the other
+        category to the merge of the cells (aggregates or sketches)
+        whose filter_category label is in active_labels.
+
+        Key Arguments:
+            cells (dict): the cells keyed by (location, property) codes
+            filter_category (Categories): the category being filtered
+            active_labels (set): the labels of filter_category kept
+            empty (type): creates the empty value cells are merged into
+        """
+        # Cell keys are ordered by the value of each category.
+        row_index = DataSet._other_category(filter_category).value
+        label_codes = self._data.label_codes[filter_category]
+        active_codes = {label_codes[label] for label in active_labels}
+        merged = {}
+        for key, cell in cells.items():
+            if key[filter_category.value] in active_codes:
+                merged.setdefault(key[row_index], empty()).merge(cell)
+        return merged
+
+    def _update_filtered_aggregates(self, category: Categories,
+                                    descriptor: str, activated: bool):
+        """ Bring the cached aggregates filtered by category up to date
+        after descriptor was toggled. An activated label is merged in
+        cell by cell; a deactivated one drops the cache so that it is
+        re-merged from the cells, since minimums and maximums cannot be
+        subtracted.
+        """
+        self._field_sketches.pop(category, None)
+        aggregates = self._field_aggregates.get(category)
+        if aggregates is None:
+            return
+        if not activated:
+            del self._field_aggregates[category]
+            return
+        row_index = DataSet._other_category(category).value
+        code = self._data.label_codes[category][descriptor]
+        for key, cell in self._data.cell_aggregates().items():
+            if key[category.value] == code:
+                aggregates.setdefault(key[row_index],
+                                      CellAggregate()).merge(cell)
+
+    def _filtered_sketches(self, filter_category: Categories):
+        """ Return a dictionary mapping each label code of the other
+        category to a QuantileSketch merged from the cells whose
+        filter_category label is active. The dictionary is merged from
+        the cell sketches on first use and dropped whenever a label of
+        filter_category is toggled.
+
+        Key Arguments:
+            filter_category (Categories): the category whose active
+            labels restrict the sketches
+        """
+        sketches = self._field_sketches.get(filter_category)
+        if sketches is None:
+            sketches = self._merge_filtered_cells(
+                self._data.cell_sketches(), filter_category,
+                self._active_labels[filter_category], QuantileSketch)
+            self._field_sketches[filter_category] = sketches
+        return sketches
+
+    def _range_cells(self, price_range):
+        """ Return a dictionary mapping each (location code, property
+        code) pair with listings priced within price_range, a (low,
+        high) pair of inclusive limits, to the CellAggregate of those
+        listings.
+        """
+        cells = {}
+        for key in self._data.cell_aggregates():
+            aggregate = self._data.range_aggregate(key, *price_range)
+            if aggregate is not None:
+                cells[key] = aggregate
+        self._count("range_cells_computed", len(cells))
+        return cells
+
+    def _range_sketches(self, price_range):
+        """ Return a dictionary mapping each cell with listings priced
+        within price_range to a QuantileSketch of those prices.
+        """
+        sketches = {}
+        for key in self._data.cell_aggregates():
+            prices = self._data.range_prices(key, *price_range)
+            if prices:
+                sketches[key] = QuantileSketch()
+                sketches[key].extend(prices)
+        return sketches
+
+    def count_in_range(self, location: str, property_type: str, low=None,
+                       high=None, currency: str = None):
+        """ Return the number of listings of the borough and property
+        type with a rent from low to high inclusive.
+
+        Key Arguments:
+            location (str): the borough
+            property_type (str): the property type
+            low (float): the lowest rent counted, or None for no limit
+            high (float): the highest rent counted, or None for no limit
+            currency (str): the currency of low and high, defaulting to
+            the home currency
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+        low, high = self._price_limits((low, high), currency)
+        key = (self._data.label_codes[DataSet.Categories.LOCATION].get(
+                   location),
+               self._data.label_codes[DataSet.Categories.PROPERTY_TYPE].get(
+                   property_type))
+        aggregate = self._data.range_aggregate(key, low, high)
+        return 0 if aggregate is None else aggregate.count
+
+    @instrumented
+    def _cross_table_statistics(self, descriptor_one: str,
+                                descriptor_two: str):
+        """ Return the minimum, average, and maximum rent of the
+        borough and property type, if there are valid entries with a
+        match. The values are read from the cached cell aggregates, so
+        rendering a whole cross table costs a single scan of the data.
+
+        Key Arguments:
+            descriptor_one (str): represents the borough type
+            descriptor_two (str): represents the property type
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+
+        location_code = self._data.label_codes[
+            DataSet.Categories.LOCATION].get(descriptor_one)
+        property_code = self._data.label_codes[
+            DataSet.Categories.PROPERTY_TYPE].get(descriptor_two)
+        cell = self._data.cell_aggregates().get(
+            (location_code, property_code))
+        self._count("cells_computed")
+
+        if cell is None:
+            raise DataSet.NoMatchingItems
+
+        return cell.statistics()
+
+    def _cross_table_value(self, descriptor_one: str, descriptor_two: str,
+                           stat: Stats, price_range=None):
+        """ Return the value of stat for the rents of the borough and
+        property type, raising NoMatchingItems if there are none.
+
+        Key Arguments:
+            descriptor_one (str): represents the borough type
+            descriptor_two (str): represents the property type
+            stat (Stats): the statistic wanted
+            price_range (tuple): if given, only count rents from low to
+            high inclusive; either limit may be None
+        """
+        if stat not in DataSet._quantile_fractions and price_range is None:
+            return self._cross_table_statistics(
+                descriptor_one, descriptor_two)[DataSet._stat_indices[stat]]
+
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+        key = (self._data.label_codes[DataSet.Categories.LOCATION].get(
+                   descriptor_one),
+               self._data.label_codes[DataSet.Categories.PROPERTY_TYPE].get(
+                   descriptor_two))
+        if price_range is not None:
+            value = DataSet._statistic(
+                stat, self._data.range_aggregate(key, *price_range),
+                lambda: self._range_sketch(key, price_range))
+            if value is None:
+                raise DataSet.NoMatchingItems
+            return value
+        sketch = self._data.cell_sketches().get(key)
+        if sketch is None:
+            raise DataSet.NoMatchingItems
+        return sketch.quantile(DataSet._quantile_fractions[stat])
+
+    def _range_sketch(self, key, price_range):
+        """ Return a QuantileSketch of the prices of cell key within
+        price_range.
+        """
+        sketch = QuantileSketch()
+        sketch.extend(self._data.range_prices(key, *price_range))
+        return sketch
+
+    def _cell_samples(self, price_range=None):
+        """ Return the CellSamples of the cells, restricted to the
+        prices within price_range if given.
+        """
+        samples = self._data.cell_samples()
+        if price_range is None:
+            return samples
+        restricted = {}
+        for key, sample in samples.items():
+            sample = sample.restricted(*price_range)
+            if sample is not None:
+                restricted[key] = sample
+        return restricted
+
+    def _is_sampled(self, stat: Stats, approximate):
+        """ Return True if stat is to be estimated from samples, given
+        the approximate argument of a query (None for the default of
+        the DataSet).
+        """
+        if approximate is None:
+            approximate = self.approximate
+        return approximate and stat in DataSet._sampled_stats
+
+    @staticmethod
+    def _sample_interval(stat: Stats, sample: CellSample, confidence):
+        """ Return the (low, estimate, high) tuple of stat estimated from
+        sample, or None if there is no sample.
+        """
+        if sample is None:
+            return None
+        return sample.interval(DataSet._quantile_fractions.get(stat),
+                               confidence)
+
+    def print_cross_table(self, location_labels: list,
+                          property_labels: list, stat: Stats,
+                          currency: str = None, file=None):
+        """ Creates the table under the header of the cross table.
+
+        Key Arguments:
+            location_labels (list): a list containing the location
+            labels
+            property_labels (list): a list of the property labels
+            stat (Stats): the statistic shown in each cell
+            currency (str): the currency the rents are shown in
+            file (stream): where the table is written, by default
+            sys.stdout
+        """
+        TextRenderer().render_rows(
+            self._cross_table(stat, location_labels, property_labels,
+                              currency), file)
+
+    def top_cells(self, stat: Stats, k=10, largest=True):
+        """ Return up to k (borough, property type, rent) tuples for the
+        cells with the largest (or smallest) value of stat, selected
+        with a heap rather than by sorting every cell.
+
+        Key Arguments:
+            stat (Stats): the statistic to rank the cells by
+            k (int): the number of cells to return
+            largest (bool): return the largest values instead of the
+            smallest
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+
+        location_labels = self._data.code_labels[DataSet.Categories.LOCATION]
+        property_labels = self._data.code_labels[
+            DataSet.Categories.PROPERTY_TYPE]
+        sketches = self._data.cell_sketches
+        cells = ((location_labels[key[0]], property_labels[key[1]],
+                  DataSet._statistic(stat, cell,
+                                     lambda key=key: sketches()[key]))
+                 for key, cell in self._data.cell_aggregates().items())
+        return DataSet.sort_labels(cells, key=itemgetter(2),
+                                   descending=largest, limit=k)
+
+    @instrumented
+    def display_top_cells(self, stat: Stats, k=10, largest=True,
+                          currency: str = None, file=None,
+                          renderer: "TableRenderer" = None):
+        """ Print the k borough and property type cells with the
+        largest (or smallest) value of stat, one per line.
+
+        Key Arguments:
+            stat (Stats): the statistic to rank the cells by
+            k (int): the number of cells to print
+            largest (bool): print the largest values instead of the
+            smallest
+            currency (str): the currency the rents are shown in
+            file (stream): where the cells are written, by default
+            sys.stdout
+            renderer (TableRenderer): the output format, by default text
+        """
+        (renderer or TextRenderer()).render(
+            self.query_top_cells(stat, k, largest, currency), file)
+
+    def _row_value(self, category: Categories, label: str, stat: Stats):
+        """ Return the value of stat over every listing with the given
+        label, ignoring the active filters.
+        """
+        code = self._data.label_codes[category].get(label)
+        aggregate = CellAggregate()
+        for key, cell in self._data.cell_aggregates().items():
+            if key[category.value] == code:
+                aggregate.merge(cell)
+        return DataSet._statistic(
+            stat, aggregate,
+            lambda: self._merged_sketch(
+                lambda key: key[category.value] == code))
+
+    @instrumented
+    def display_cross_table(self, stat: Stats, order_by: Stats = None,
+                            descending=False, currency: str = None,
+                            file=None, renderer: "TableRenderer" = None,
+                            price_range=None, approximate=None):
+        """ Print a table of rates for each borough and property type.
+        The values will depend on the input for the parameter stat.
+
+        Key Arguments:
+            stat (Stats): a Stats datatype that determines whether the
+            average, minimum, maximum, median, or percentile rates will
+            be shown
+            order_by (Stats): if given, order the boroughs by this
+            statistic over all of their listings instead of by name
+            descending (bool): order the boroughs from largest to
+            smallest
+            currency (str): the currency the rents are shown in,
+            defaulting to the home currency
+            file (stream): where the table is written, by default
+            sys.stdout
+            renderer (TableRenderer): the output format, by default text
+            price_range (tuple): if given, a (low, high) pair of limits
+            on the rents counted, as in query_cross_table
+            approximate (bool): estimate the values from the cell
+            samples, as in query_cross_table
+        """
+        (renderer or TextRenderer()).render(
+            self._cross_table(stat, *self._cross_table_labels(
+                None, order_by, descending), currency, price_range,
+                approximate), file)
+
+    def _table_statistics(self, row_category: Categories, label: str):
+        """ Given a category from the Categories Enum, the string
+        matching one of the items in the category, calculate the
+        minimum, maximum, and average rent of the properties in that
+        category. The statistics are combined from precomputed cells,
+        so the cost does not depend on the number of listings.
+
+        Key Arguments:
+            row_category (Categories): a category from the Categories
+            Enum
+            label (str): the label we would like to find the minimum,
+            maximum, and average rent values for
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+
+        label_category = DataSet._other_category(row_category)
+        label_code = self._data.label_codes[label_category].get(label)
+        aggregate = self._filtered_aggregates(row_category).get(label_code)
+        self._count("field_rows_computed")
+
+        if aggregate is None:
+            return None
+        return aggregate.statistics()
+
+    @instrumented
+    def display_field_table(self, rows: Categories, order_by: Stats = None,
+                            descending=False,
+                            stats=(Stats.MIN, Stats.AVG, Stats.MAX),
+                            currency: str = None, file=None,
+                            renderer: "TableRenderer" = None,
+                            price_range=None, approximate=None):
+        """ Display a table of the minimum, maximum, and average rent
+        for each item in the row category (the data should be filtered).
+
+        Key Arguments:
+            rows (Categories): the row category from Categories Enum
+            order_by (Stats): if given, order the rows by this statistic
+            instead of by label
+            descending (bool): order the rows from largest to smallest
+            stats (tuple): the Stats shown as columns, by default the
+            minimum, average, and maximum
+            currency (str): the currency the rents are shown in,
+            defaulting to the home currency
+            file (stream): where the table is written, by default
+            sys.stdout
+            renderer (TableRenderer): the output format, by default text
+            price_range (tuple): if given, a (low, high) pair of limits
+            on the rents counted, as in query_cross_table
+            approximate (bool): estimate the averages from the cell
+            samples, as in query_field_table
+        """
+        (renderer or TextRenderer()).render(
+            self.query_field_table(rows, stats, order_by=order_by,
+                                   descending=descending, currency=currency,
+                                   price_range=price_range,
+                                   approximate=approximate), file)
+
+    def _query_labels(self, filters, defaults: dict):
+        """ Return a dictionary of label sets by category, taking the
+        labels in filters where given and defaults elsewhere. Raise
+        KeyError for a label that is not in the dataset.
+
+        Key Arguments:
+            filters (dict): maps categories to iterables of labels
+            defaults (dict): maps categories to the default label sets
+        """
+        labels = {}
+        for category in DataSet.Categories:
+            chosen = (filters or {}).get(category)
+            if chosen is None:
+                labels[category] = set(defaults[category])
+                continue
+            chosen = set(chosen)
+            unknown = chosen - self._labels[category]
+            if unknown:
+                raise KeyError(sorted(unknown)[0])
+            labels[category] = chosen
+        return labels
+
+    def _cross_table_labels(self, filters: dict, order_by: Stats,
+                            descending: bool):
+        """ Return the sorted location and property labels of a cross
+        table, restricted to the labels in filters if given.
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+
+        labels = self._query_labels(filters, self._labels)
+        location_key = None
+        if order_by is not None:
+            location_key = DataSet._statistic_key(
+                lambda label: self._row_value(
+                    DataSet.Categories.LOCATION, label, order_by),
+                descending)
+        return (DataSet.sort_labels(labels[DataSet.Categories.LOCATION],
+                                    key=location_key, descending=descending),
+                DataSet.sort_labels(labels[DataSet.Categories.PROPERTY_TYPE]))
+
+    def _cross_table(self, stat: Stats, location_labels: list,
+                     property_labels: list, currency: str = None,
+                     price_range=None, approximate=None, confidence=.95):
+        """ Return the cross table of stat over the given labels as in
+        query_cross_table, except that its rows are generated one
+        borough at a time as they are rendered.
+        """
+        limits = self._price_limits(price_range, currency)
+        if self._is_sampled(stat, approximate):
+            table = self._sampled_cross_table(
+                stat, location_labels, property_labels, currency,
+                limits, confidence)
+            if price_range is not None:
+                table["price_range"] = list(price_range)
+            return table
+        currency = DataSet._display_currency(currency)
+
+        def rows():
+            for location_label in location_labels:
+                values = []
+                for property_type in property_labels:
+                    try:
+                        values.append(self._cross_table_value(
+                            location_label, property_type, stat,
+                            limits))
+                    except DataSet.NoMatchingItems:
+                        values.append(None)
+                yield (location_label, *convert_values(
+                    values, data_currency, currency))
+
+        table = {"table": "cross_table", "stat": stat.name,
+                 "currency": currency, "columns": property_labels,
+                 "header": [DataSet.Categories.LOCATION.name,
+                            *property_labels],
+                 "rows": rows()}
+        if price_range is not None:
+            table["price_range"] = list(price_range)
+        return table
+
+    def _sampled_cross_table(self, stat: Stats, location_labels: list,
+                             property_labels: list, currency: str,
+                             limits, confidence):
+        """ Return the cross table of stat as in _cross_table, estimated
+        from the cell samples of the rents within limits, if given, in
+        the currency of the data. Its "intervals" entry holds a list per
+        row with the (low, high) confidence interval of every value, or
+        None where no listing matches.
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+        currency = DataSet._display_currency(currency)
+        samples = self._cell_samples(limits)
+        location_codes = self._data.label_codes[DataSet.Categories.LOCATION]
+        property_codes = self._data.label_codes[
+            DataSet.Categories.PROPERTY_TYPE]
+        rows = []
+        intervals = []
+        for location_label in location_labels:
+            estimates = [DataSet._sample_interval(
+                stat, samples.get((location_codes.get(location_label),
+                                   property_codes.get(property_type))),
+                confidence) for property_type in property_labels]
+            rows.append((location_label, *convert_values(
+                [None if estimate is None else estimate[1]
+                 for estimate in estimates], data_currency, currency)))
+            intervals.append([
+                None if estimate is None else convert_values(
+                    (estimate[0], estimate[2]), data_currency, currency)
+                for estimate in estimates])
+        table = {"table": "cross_table", "stat": stat.name,
+                 "currency": currency, "columns": property_labels,
+                 "header": [DataSet.Categories.LOCATION.name,
+                            *property_labels],
+                 "sample_size": self._data.sample_size,
+                 "confidence": confidence, "intervals": intervals,
+                 "rows": rows}
+        return table
+
+    @instrumented
+    def query_cross_table(self, stat: Stats, filters: dict = None,
+                          order_by: Stats = None, descending=False,
+                          currency: str = None, price_range=None,
+                          approximate=None, confidence=.95):
+        """ Return the cross table of stat as a dictionary instead of
+        printing it. Its "rows" entry holds one (borough, value, ...)
+        tuple per borough, with a value for each property type in
+        "columns" and None where no listing matches.
+
+        Key Arguments:
+            stat (Stats): the statistic shown in each cell
+            filters (dict): maps categories to the labels to include,
+            defaulting to every label of the category
+            order_by (Stats): if given, order the boroughs by this
+            statistic over all of their listings instead of by name
+            descending (bool): order the boroughs from largest to
+            smallest
+            currency (str): the currency of the values, defaulting to
+            the home currency
+            price_range (tuple): if given, a (low, high) pair of limits
+            in the currency of the values; only rents from low to high
+            inclusive are counted, and either limit may be None
+            approximate (bool): estimate an average or quantile from the
+            cell samples, adding the "intervals" of the values, or
+            compute it exactly if False; by default as the approximate
+            attribute of the DataSet says
+            confidence (float): the level of the intervals
+        """
+        table = self._cross_table(
+            stat, *self._cross_table_labels(filters, order_by, descending),
+            currency, price_range, approximate, confidence)
+        table["rows"] = list(table["rows"])
+        return table
+
+    @instrumented
+    def query_field_table(self, rows: Categories,
+                          stats=(Stats.MIN, Stats.AVG, Stats.MAX),
+                          filters: dict = None, order_by: Stats = None,
+                          descending=False, currency: str = None,
+                          price_range=None, approximate=None,
+                          confidence=.95):
+        """ Return the field table of the row category as a dictionary
+        instead of printing it. Its "rows" entry holds one (label,
+        value, ...) tuple per row label, with a value for each of stats
+        and None where no listing matches. Filters apply only to this
+        query; the active labels of the DataSet are left unchanged.
+
+        Key Arguments:
+            rows (Categories): the row category from Categories Enum
+            stats (tuple): the Stats given for each row
+            filters (dict): maps categories to the labels to include,
+            defaulting to the active labels of the category
+            order_by (Stats): if given, order the rows by this statistic
+            instead of by label
+            descending (bool): order the rows from largest to smallest
+            currency (str): the currency of the values, defaulting to
+            the home currency
+            price_range (tuple): if given, only count rents within
+            these limits, as in query_cross_table
+            approximate (bool): estimate averages and quantiles from
+            the cell samples of each row, weighting every cell by its
+            number of listings, as in query_cross_table
+            confidence (float): the level of the intervals
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+
+        labels = self._query_labels(filters, self._active_labels)
+        filter_category = DataSet._other_category(rows)
+        limits = self._price_limits(price_range, currency)
+        if limits is not None:
+            aggregates = self._merge_filtered_cells(
+                self._range_cells(limits), filter_category,
+                labels[filter_category], CellAggregate)
+
+            @functools.lru_cache(maxsize=None)
+            def sketches():
+                return self._merge_filtered_cells(
+                    self._range_sketches(limits), filter_category,
+                    labels[filter_category], QuantileSketch)
+        elif labels[filter_category] == self._active_labels[filter_category]:
+            aggregates = self._filtered_aggregates(filter_category)
+
+            def sketches():
+                return self._filtered_sketches(filter_category)
+        else:
+            aggregates = self._merge_filtered_cells(
+                self._data.cell_aggregates(), filter_category,
+                labels[filter_category], CellAggregate)
+
+            @functools.lru_cache(maxsize=None)
+            def sketches():
+                return self._merge_filtered_cells(
+                    self._data.cell_sketches(), filter_category,
+                    labels[filter_category], QuantileSketch)
+
+        row_codes = self._data.label_codes[rows]
+
+        @functools.lru_cache(maxsize=None)
+        def samples():
+            return self._merge_filtered_cells(
+                self._cell_samples(limits), filter_category,
+                labels[filter_category], StratifiedSample)
+
+        intervals = {}
+
+        def value_for(label, stat):
+            self._count("field_values_computed")
+            if self._is_sampled(stat, approximate):
+                estimate = DataSet._sample_interval(
+                    stat, samples().get(row_codes[label]), confidence)
+                if estimate is None:
+                    return None
+                intervals[label, stat] = estimate[0], estimate[2]
+                return estimate[1]
+            return DataSet._statistic(
+                stat, aggregates.get(row_codes[label]),
+                lambda: sketches()[row_codes[label]])
+
+        row_key = None
+        if order_by is not None:
+            row_key = DataSet._statistic_key(
+                lambda label: value_for(label, order_by), descending)
+        row_labels = DataSet.sort_labels(labels[rows], key=row_key,
+                                         descending=descending)
+
+        currency = DataSet._display_currency(currency)
+        table = {"table": "field_table", "rows_category": rows.name,
+                 "filters": DataSet.sort_labels(labels[filter_category]),
+                 "stats": [stat.name for stat in stats],
+                 "currency": currency,
+                 "header": [rows.name, *(stat.name for stat in stats)],
+                 "rows": [(label, *convert_values(
+                     [value_for(label, stat) for stat in stats],
+                     data_currency, currency)) for label in row_labels]}
+        if any(self._is_sampled(stat, approximate) for stat in stats):
+            table["sample_size"] = self._data.sample_size
+            table["confidence"] = confidence
+            table["intervals"] = [
+                [None if (label, stat) not in intervals else convert_values(
+                    intervals[label, stat], data_currency, currency)
+                 for stat in stats] for label in row_labels]
+        if price_range is not None:
+            table["price_range"] = list(price_range)
+        return table
+
+    def select_rows(self, filters: dict = None):
+        """ Return the bitmap of the listings whose label in every
+        category is one of the labels of filters, defaulting to the
+        active labels. See ColumnStore.label_bitmaps.
+
+        Key Arguments:
+            filters (dict): maps categories to the labels to include
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+        return self._data.select(self._query_codes(filters))
+
+    def _query_codes(self, filters: dict):
+        """ Return the label codes of _query_labels by category, with the
+        active labels as defaults.
+        """
+        labels = self._query_labels(filters, self._active_labels)
+        return {category: {self._data.label_codes[category][label]
+                           for label in labels[category]}
+                for category in DataSet.Categories}
+
+    @instrumented
+    def query_selection(self, stats=(Stats.MIN, Stats.AVG, Stats.MAX),
+                        filters: dict = None, currency: str = None):
+        """ Return the statistics of every listing matching filters as a
+        table dictionary with a single (count, value, ...) row. The
+        listings are selected with the label bitmaps and only their
+        prices are aggregated; a DataSet loaded without its rows merges
+        the matching cells instead.
+
+        Key Arguments:
+            stats (tuple): the Stats wanted
+            filters (dict): maps categories to the labels to include,
+            defaulting to the active labels of the category
+            currency (str): the currency of the values, defaulting to
+            the home currency
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+
+        codes = self._query_codes(filters)
+        if self._data.keep_rows:
+            prices = list(self._data.selected_prices(
+                self._data.select(codes)))
+            self._count("rows_selected", len(prices))
+            aggregate = None
+            if prices:
+                aggregate = CellAggregate(len(prices), sum(prices),
+                                          min(prices), max(prices))
+
+            def sketch():
+                selected = QuantileSketch()
+                selected.extend(prices)
+                return selected
+        else:
+            def selected(key):
+                return all(key[category.value] in category_codes
+                           for category, category_codes in codes.items())
+            aggregate = CellAggregate()
+            for key, cell in self._data.cell_aggregates().items():
+                if selected(key):
+                    aggregate.merge(cell)
+
+            def sketch():
+                return self._merged_sketch(selected)
+
+        currency = DataSet._display_currency(currency)
+        values = convert_values(
+            [DataSet._statistic(stat, aggregate, sketch) for stat in stats],
+            data_currency, currency)
+        return {"table": "selection",
+                "filters": {category.name: DataSet.sort_labels(
+                    self._data.code_labels[category][code]
+                    for code in codes[category])
+                    for category in DataSet.Categories},
+                "stats": [stat.name for stat in stats],
+                "currency": currency,
+                "header": ["COUNT", *(stat.name for stat in stats)],
+                "rows": [(aggregate.count if aggregate else 0, *values)]}
+
+    @property
+    def cube(self):
+        """ The DataCube built by load_file, or None. """
+        return self._cube
+
+    @instrumented
+    def query_cube(self, group_by, stats=(Stats.MIN, Stats.AVG, Stats.MAX),
+                   where: dict = None, order_by: Stats = None,
+                   descending=False, currency: str = None):
+        """ Return a roll-up of the data cube to the group_by dimensions,
+        sliced by where, as a table dictionary with one (label, ...,
+        count, value, ...) row per combination of labels. The cube only
+        holds mergeable aggregates, so quantile Stats are not available.
+
+        Key Arguments:
+            group_by (list): the names of the dimensions of each row
+            stats (tuple): the Stats given for each row, out of MIN,
+            AVG, and MAX
+            where (dict): maps dimension names to the labels to include
+            order_by (Stats): if given, order the rows by this statistic
+            instead of by their labels
+            descending (bool): order the rows from largest to smallest
+            currency (str): the currency of the values, defaulting to
+            the home currency
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+        if self._cube is None:
+            raise ValueError("No data cube; load with dimensions")
+        for stat in (*stats, *([order_by] if order_by else [])):
+            if stat in DataSet._quantile_fractions:
+                raise ValueError(f"{stat.name} is not held by the cube")
+
+        group_by = list(group_by)
+        cells = self._cube.rollup(group_by, where)
+        self._count("cube_cells_merged", len(cells))
+        key = self._cube.order_key(group_by)
+        if order_by is not None:
+            key = DataSet._statistic_key(
+                lambda labels: DataSet._statistic(order_by, cells[labels],
+                                                  None), descending)
+        currency = DataSet._display_currency(currency)
+        rows = []
+        for labels in DataSet.sort_labels(cells, key=key,
+                                          descending=descending):
+            aggregate = cells[labels]
+            rows.append((*labels, aggregate.count, *convert_values(
+                [DataSet._statistic(stat, aggregate, None)
+                 for stat in stats], data_currency, currency)))
+        return {"table": "cube", "dimensions": group_by,
+                "where": {name: DataSet.sort_labels(labels)
+                          for name, labels in (where or {}).items()},
+                "stats": [stat.name for stat in stats],
+                "currency": currency,
+                "header": [*group_by, "COUNT",
+                           *(stat.name for stat in stats)],
+                "rows": rows}
+
+    @instrumented
+    def query_histogram(self, edges, rows: Categories = None,
+                        filters: dict = None, currency: str = None):
+        """ Return the distribution of rents as a table dictionary with
+        one (label, ..., count, ...) row per borough and property type
+        cell, or per label of rows if given, and one count per bin. The
+        bins are labelled as the buckets of a Dimension: below the first
+        edge, from each edge to the next, and from the last edge up.
+        Only listings whose labels are active (or in filters) count.
+
+        Key Arguments:
+            edges (list): the ascending bin edges, for example from
+            histogram_edges, in the currency of the table
+            rows (Categories): if given, merge the cells into one row per
+            label of this category
+            filters (dict): maps categories to the labels to include,
+            defaulting to the active labels of the category
+            currency (str): the currency of edges, defaulting to the
+            home currency
+        """
+        if self._data is None:
+            raise DataSet.EmptyDatasetError
+        edges = sorted(edges)
+        if not edges:
+            raise ValueError("A histogram needs at least one edge")
+
+        currency = DataSet._display_currency(currency)
+        codes = self._query_codes(filters)
+        histograms = self._data.cell_histograms(
+            convert_values(edges, currency, data_currency))
+        categories = list(DataSet.Categories)
+        if rows is not None:
+            categories = [rows]
+        merged = {}
+        for key, counts in histograms.items():
+            if all(key[category.value] in codes[category]
+                   for category in DataSet.Categories):
+                labels = tuple(
+                    self._data.code_labels[category][key[category.value]]
+                    for category in categories)
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = list(counts)
+                else:
+                    merged[labels] = [sum(pair)
+                                      for pair in zip(total, counts)]
+        self._count("histogram_cells_merged", len(histograms))
+
+        bins = Dimension("price", edges).labels
+        return {"table": "histogram",
+                "dimensions": [category.name for category in categories],
+                "bins": bins, "currency": currency,
+                "header": [*(category.name for category in categories),
+                           *bins],
+                "rows": [(*labels, *merged[labels])
+                         for labels in DataSet.sort_labels(merged)]}
+
+    @instrumented
+    def display_histogram(self, edges, rows: Categories = None,
+                          currency: str = None, file=None,
+                          renderer: "TableRenderer" = None):
+        """ Print the distribution of rents from query_histogram under
+        the active filters, with a column of counts per bin.
+        """
+        (renderer or TextRenderer()).render(
+            self.query_histogram(edges, rows, currency=currency), file)
+
+    @instrumented
+    def query_top_cells(self, stat: Stats, k=10, largest=True,
+                        currency: str = None):
+        """ Return the result of top_cells as a dictionary, with the
+        values converted to currency (the home currency by default).
+        """
+        currency = DataSet._display_currency(currency)
+        cells = self.top_cells(stat, k, largest)
+        prices = convert_values([cell[2] for cell in cells], data_currency,
+                                currency)
+        return {"table": "top_cells", "stat": stat.name,
+                "currency": currency,
+                "header": [DataSet.Categories.LOCATION.name,
+                           DataSet.Categories.PROPERTY_TYPE.name, stat.name],
+                "rows": [(location_label, property_type, price)
+                         for (location_label, property_type, _), price
+                         in zip(cells, prices)]}
+
+    @instrumented
+    def load_file(self, source=None, progress=None, streaming=False,
+                  chunk_size=65536, workers=1, snapshot=True,
+                  dimensions: list = None, database=None,
+                  sample_size: int = None, lazy=False,
+                  histogram_edges: list = None):
+        """ Load data from file and initialize labels. The file is read
+        in chunks through a generator pipeline, and each chunk is fed
+        straight into the store. A file given by path is memory-mapped
+        and scanned for just the location, room type, and price fields;
+        an open file goes through csv.reader. Return the number of
+        listings loaded.
+
+        With more than one worker, a file given by path is split into
+        byte ranges aligned on record boundaries, each range is parsed
+        and aggregated in its own process, and the partial stores are
+        merged in file order, giving the same listings, label codes,
+        and line count as a serial load.
+
+        A file given by path is also saved as a binary snapshot next to
+        it; later loads map the snapshot in and only parse the CSV again
+        once the file has changed.
+
+        Key Arguments:
+            source (str, PathLike or file): the CSV file to read,
+            defaulting to the module filename
+            progress (callable): called after every chunk with the
+            number of listings and bytes read so far
+            streaming (bool): keep only the aggregation state instead
+            of every listing, so memory stays bounded for any file size
+            chunk_size (int): the number of listings parsed per chunk
+            of an open file
+            workers (int): the number of processes used to parse a file
+            given by path
+            snapshot (bool): read and write the binary snapshot of a
+            file given by path (ignored when streaming)
+            dimensions (list): if given, also build a DataCube of the
+            file over these Dimensions for query_cube; an open file must
+            then be seekable, as it is read a second time
+            database (str or PathLike): if given, keep the listings in
+            this SQLite database file with a SQLiteStore instead of in
+            memory (streaming and snapshot are then ignored)
+            sample_size (int): if given, also sample this many prices
+            per cell while loading, for approximate queries; samples are
+            otherwise built on the first approximate query
+            lazy (bool): only decode the labels of a file given by path
+            while loading, so that the labels and filters can be used at
+            once, and parse the prices in bulk when a statistic first
+            needs them, or when finish_load is called; a malformed price
+            raises ValueError only then. The DataCube of dimensions is
+            also built on first use, and the price index and snapshot by
+            finish_load (ignored with more than one worker)
+            histogram_edges (list): if given, also count the prices of
+            every cell in the bins of these edges, in the currency of the
+            table, while loading and appending, so that query_histogram
+            answers for them without reading the prices (which a
+            streaming load needs; ignored with a database)
+        """
+        if source is None:
+            source = filename
+        start = None
+        if dimensions is not None and hasattr(source, 'read'):
+            start = source.tell()
+        with self._write_lock:
+            store = self._load_store(source, progress, streaming,
+                                     chunk_size, workers, snapshot,
+                                     database, sample_size, lazy,
+                                     histogram_edges)
+            if store.keep_rows and not store._raw_prices:
+                # Built now rather than by the first price range query.
+                store.price_index()
+            cube = None
+            if dimensions is not None and lazy and start is None:
+                cube = DataCube(dimensions).defer_file(source)
+            elif dimensions is not None:
+                if start is not None:
+                    source.seek(start)
+                cube = DataCube(dimensions).add_file(source)
+            self._unfinished = None
+            if store._raw_prices:
+                self._unfinished = (store, cube, (
+                    self._data, self._cube, self._labels,
+                    self._active_labels, self._field_aggregates,
+                    self._field_sketches))
+            self._initialize_sets(store, cube)
+        self._count("rows_loaded", len(store))
+        return len(store)
+
+    def finish_load(self):
+        """ Do the work a lazy load_file leaves for later: parse the
+        prices, build their index and the deferred DataCube, and write
+        the snapshot of the file, so that the first query does not wait
+        for any of it. A malformed price raises ValueError, and the
+        listings loaded before the lazy load are swapped back in. Does
+        nothing unless the last load was lazy and is not yet finished.
+        """
+        with self._write_lock:
+            unfinished, self._unfinished = self._unfinished, None
+        if unfinished is None:
+            return
+        store, cube, previous = unfinished
+        try:
+            store.materialize()
+            if cube is not None:
+                cube.cells
+        except ValueError:
+            with self._write_lock:
+                if self._data is store:
+                    self._swap(*previous)
+            raise
+
+    def _load_store(self, source, progress, streaming: bool,
+                    chunk_size: int, workers: int, snapshot: bool,
+                    database=None, sample_size: int = None, lazy=False,
+                    histogram_edges: list = None):
+        """ Load the listings of source into a new ColumnStore (or
+        SQLiteStore) as described in load_file and return it.
+        """
+        by_path = not hasattr(source, 'read')
+        use_snapshot = (snapshot and by_path and not streaming
+                        and database is None)
+        if use_snapshot:
+            store = load_snapshot(source)
+            if store is not None:
+                self._count("snapshot_hits")
+                if progress is not None:
+                    progress(len(store), os.path.getsize(source))
+                if sample_size:
+                    # Snapshots hold no samples; draw them from the map.
+                    store.sample_size = sample_size
+                    store.cell_samples()
+                if histogram_edges:
+                    # Nor histograms; count them from the mapped index.
+                    edges = tuple(sorted(histogram_edges))
+                    store._histograms = store.cell_histograms(edges)
+                    store.histogram_edges = edges
+                return store
+        if database is not None:
+            store = SQLiteStore(database, sample_size=sample_size)
+        else:
+            store = ColumnStore(not streaming, sample_size, histogram_edges)
+        if workers > 1 and by_path:
+            self._load_parallel(store, source, progress, workers)
+        else:
+            read_listings(store, source, progress, chunk_size, lazy)
+        if use_snapshot and store._raw_prices:
+            # Written by finish_load, keyed on the file as it was read.
+            store.snapshot_source = (source, os.stat(source))
+        elif use_snapshot:
+            save_snapshot(store, source)
+        return store
+
+    def load_file_in_background(self, source=None, **options):
+        """ Start load_file in a background thread and return the
+        BackgroundLoad following it. Until the load completes, queries
+        keep using the listings loaded before; the new ones are swapped
+        in only when the load succeeds, so a cancelled or failed load
+        leaves the DataSet as it was. A lazy load swaps its labels in
+        as soon as they are read and then runs finish_load in the same
+        thread, so its prices are parsed before the load reports success
+        and a malformed price fails the load.
+
+        Key Arguments:
+            source (str, PathLike or file): the CSV file to read,
+            defaulting to the module filename
+            options: other keyword arguments of load_file, except
+            progress
+        """
+        if source is None:
+            source = filename
+        return BackgroundLoad(self, source, options).start()
+
+    @instrumented
+    def append_file(self, source, progress=None, chunk_size=65536):
+        """ Parse only the listings in source and add them after the
+        listings already loaded. Labels that have not been seen before
+        are added and made active, and the cell and filtered aggregates
+        are updated rather than rebuilt, so the cost follows the size of
+        source rather than of everything loaded so far. The update is
+        made to a copy sharing the columns, which are extended in place,
+        and then swapped in; sessions reading the previous version only
+        read its own rows and are not affected. Listings are not matched
+        by id, so an updated listing is added as a new row. Return the
+        number of listings added.
+
+        Key Arguments:
+            source (str, PathLike or file): the CSV file of new listings
+            progress (callable): called after every chunk with the
+            number of new listings and bytes read so far
+            chunk_size (int): the number of listings parsed per chunk
+            of an open file
+        """
+        if self._data is None:
+            return self.load_file(source, progress, chunk_size=chunk_size,
+                                  snapshot=False)
+
+        with self._write_lock:
+            start = None
+            if self._cube is not None and hasattr(source, 'read'):
+                start = source.tell()
+            delta = ColumnStore(
+                self._data.keep_rows or isinstance(self._data, SQLiteStore),
+                self._data.sample_size
+                if self._data._samples is not None else None,
+                self._data.histogram_edges)
+            read_listings(delta, source, progress, chunk_size)
+            store = self._data.copy()
+            store.merge(delta)
+            cube = self._cube
+            if cube is not None:
+                if start is not None:
+                    source.seek(start)
+                cube = cube.copy().add_file(source)
+            labels = {}
+            active_labels = {}
+            for category in DataSet.Categories:
+                added = (set(delta.code_labels[category])
+                         - self._labels[category])
+                labels[category] = self._labels[category] | added
+                active_labels[category] = (self._active_labels[category]
+                                           | added)
+            field_aggregates, field_sketches = \
+                self._merge_into_filtered_caches(store, delta,
+                                                 active_labels)
+            self._swap(store, cube, labels, active_labels,
+                       field_aggregates, field_sketches)
+        self._count("rows_appended", len(delta))
+        return len(delta)
+
+    def _merge_into_filtered_caches(self, store: ColumnStore,
+                                    delta: ColumnStore,
+                                    active_labels: dict):
+        """ Return copies of the cached aggregates and sketches filtered
+        by the active labels, with the cells of a store of newly added
+        listings merged in. store is the store delta was merged into.
+        """
+        mappings = {category: [store.label_codes[category][label]
+                               for label in delta.code_labels[category]]
+                    for category in DataSet.Categories}
+        field_aggregates = copy.deepcopy(self._field_aggregates)
+        field_sketches = copy.deepcopy(self._field_sketches)
+        caches = [(field_aggregates, delta.cell_aggregates, CellAggregate),
+                  (field_sketches, delta.cell_sketches, QuantileSketch)]
+        for field_cache, delta_cells, empty in caches:
+            for filter_category, merged in field_cache.items():
+                row_category = DataSet._other_category(filter_category)
+                active = active_labels[filter_category]
+                filter_labels = delta.code_labels[filter_category]
+                for key, cell in delta_cells().items():
+                    if filter_labels[key[filter_category.value]] in active:
+                        row_code = mappings[row_category][
+                            key[row_category.value]]
+                        merged.setdefault(row_code, empty()).merge(cell)
+        return field_aggregates, field_sketches
+
+    @staticmethod
+    def _load_parallel(store: ColumnStore, path, progress, workers: int):
+        """ Parse the file at path in a pool of worker processes and
+        merge the listings into store.
+        """
+        keep_rows = store.keep_rows or isinstance(store, SQLiteStore)
+        ranges = split_listing_file(path, workers)
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(load_listing_range, path, start, end,
+                                       keep_rows, store.sample_size,
+                                       store.histogram_edges)
+                       for start, end in ranges]
+            try:
+                for future, (start, end) in zip(futures, ranges):
+                    store.merge(future.result())
+                    if progress is not None:
+                        progress(len(store), end)
+            except BaseException:
+                # Don't start the ranges still queued, e.g. on a cancel.
+                executor.shutdown(cancel_futures=True)
+                raise
+        return store
+
+    @instrumented
+    def toggle_active_label(self, category: Categories, descriptor: str):
+        """ Add a label to _active_labels if it is not there. Remove a
+        label from _active_labels if it is initially in this list.
+
+        Key Arguments:
+            category (Categories): a member of the Categories Enum
+            descriptor (str): the descriptor the user would like to
+            add or remove
+        """
+        if descriptor not in self._labels[category]:
+            raise KeyError
+
+        # The set is replaced rather than changed, as sessions may share it.
+        active_labels = self._active_labels[category]
+        if descriptor in active_labels:
+            self._active_labels[category] = active_labels - {descriptor}
+            self._update_filtered_aggregates(category, descriptor, False)
+        else:
+            self._active_labels[category] = active_labels | {descriptor}
+            self._update_filtered_aggregates(category, descriptor, True)
+
+
+class BackgroundLoad:
+    """ A DataSet.load_file running in a background thread, with its
+    progress so far. The outcome is held by future, a
+    concurrent.futures.Future giving the number of listings loaded, so
+    callers can wait on it or poll it. cancel() stops the load at its
+    next progress report, and the future then raises
+    DataSet.LoadCancelled.
+    """
+
+    def __init__(self, dataset: DataSet, source, options: dict):
+        self.rows = 0
+        self.bytes_read = 0
+        self.total_bytes = None
+        if not hasattr(source, 'read'):
+            try:
+                self.total_bytes = os.path.getsize(source)
+            except OSError:
+                pass
+        self.future = concurrent.futures.Future()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(dataset, source, options), daemon=True)
+
+    def start(self):
+        """ Start the load and return self. """
+        self._thread.start()
+        return self
+
+    def _progress(self, rows: int, bytes_read):
+        if self._cancel.is_set():
+            raise DataSet.LoadCancelled
+        self.rows = rows
+        if bytes_read is not None:
+            self.bytes_read = bytes_read
+
+    def _run(self, dataset: DataSet, source, options: dict):
+        self.future.set_running_or_notify_cancel()
+        try:
+            rows = dataset.load_file(source, progress=self._progress,
+                                     **options)
+            # A lazy load is finished here, off the query path, and a
+            # malformed price fails the load.
+            dataset.finish_load()
+            self.future.set_result(rows)
+        except BaseException as error:
+            self.future.set_exception(error)
+
+    def cancel(self):
+        """ Ask the load to stop. It stops at its next progress report,
+        unless it has already finished.
+        """
+        self._cancel.set()
+
+    def done(self):
+        """ Return True once the load has finished, failed, or stopped.
+        """
+        return self.future.done()
+
+    def result(self, timeout=None):
+        """ Wait for the load and return the number of listings loaded,
+        raising its exception if it failed or DataSet.LoadCancelled if
+        it was cancelled.
+        """
+        return self.future.result(timeout)
+
+    def status(self):
+        """ Return a line describing the progress of the load. """
+        text = f"{self.rows:,} listings parsed, {self.bytes_read:,}"
+        if self.total_bytes:
+            percent = 100 * self.bytes_read / self.total_bytes
+            text += f" of {self.total_bytes:,} bytes read ({percent:.0f}%)"
+        else:
+            text += " bytes read"
+        return text
+
+
+def currency_converter(quantity: float, source_curr: str, target_curr: str):
+    """ Convert source currency to target currency.
+
+    Key Arguments:
+        quantity (float): the amount of the original currency
+        source_curr (str): represents the source currency
+        target_curr (str): represents the currency after exchange
+    """
+    converted_quantity = quantity * rate_matrix[(source_curr, target_curr)]
+    return converted_quantity
+
+
+def convert_values(values, source_curr: str, target_curr: str):
+    """ Convert a whole column of amounts from source currency to target
+    currency with a single rate lookup, returning a list. None values
+    (cells without data) are passed through unchanged.
+
+    Key Arguments:
+        values (iterable): the amounts of the original currency
+        source_curr (str): represents the source currency
+        target_curr (str): represents the currency after exchange
+    """
+    rate = rate_matrix[(source_curr, target_curr)]
+    return [None if value is None else value * rate for value in values]
+
+
+def format_price(price, currency: str, width: int):
+    """ Return price (a number, or a string such as "N/A") prefixed by
+    the symbol of currency, padded so that every currency takes up the
+    same width as "$ " followed by width characters.
+    """
+    symbol = currency_symbols.get(currency, currency)
+    width -= len(symbol) - 1
+    if isinstance(price, str):
+        return f"{symbol} {price:<{width}}"
+    return f"{symbol} {price:<{width}.2f}"
+
+
+class TableRenderer:
+    """ Writes the table dictionaries returned by the DataSet query
+    methods to a stream. Subclasses turn the header, each row, and the
+    footer of a table into strings; the whole table is built in one
+    buffer and written with a single call, or written a row at a time
+    if stream_rows is True, so that very large tables need not be held
+    in memory.
+    """
+
+    def __init__(self, stream_rows=False):
+        self.stream_rows = stream_rows
+
+    def header(self, table: dict):
+        """ Return the text written before the rows of table. """
+        return ""
+
+    def row(self, table: dict, row: tuple, index: int):
+        """ Return the text of row, the index-th row of table. """
+        raise NotImplementedError
+
+    def footer(self, table: dict):
+        """ Return the text written after the rows of table. """
+        return ""
+
+    def render(self, table: dict, file=None):
+        """ Write table to file, by default sys.stdout. """
+        self._write(table, file, True)
+
+    def render_rows(self, table: dict, file=None):
+        """ Write only the rows of table to file, by default sys.stdout.
+        """
+        self._write(table, file, False)
+
+    def _write(self, table: dict, file, whole: bool):
+        if file is None:
+            file = sys.stdout
+        buffer = io.StringIO()
+        if whole:
+            buffer.write(self.header(table))
+        for index, row in enumerate(table["rows"]):
+            buffer.write(self.row(table, row, index))
+            if self.stream_rows:
+                file.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+        if whole:
+            buffer.write(self.footer(table))
+        file.write(buffer.getvalue())
+
+
+class TextRenderer(TableRenderer):
+    """ Renders tables as the fixed-width text shown in the menu. """
+
+    def header(self, table: dict):
+        if table["table"] == "cross_table":
+            return "                    " + "".join(
+                f"{property_type:<22}" for property_type in table["columns"]
+            ) + "\n"
+        if table["table"] == "field_table":
+            return ("The following data are from properties matching these "
+                    "criteria: \n"
+                    + "".join(f"- {label}\n" for label in table["filters"])
+                    + "        " + "   ".join(
+                        f"{DataSet._stat_names[DataSet.Stats[stat]]:>18}"
+                        for stat in table["stats"]) + "\n")
+        if table["table"] == "histogram":
+            symbol = currency_symbols.get(table["currency"], "")
+            return "".join(f"{name:<20}" for name in table["dimensions"]) + (
+                "".join(f"{symbol + label:>12}" for label in table["bins"])
+                + "\n")
+        if table["table"] == "cube":
+            return "".join(f"{name:<20}" for name in table["dimensions"]) + (
+                f"{'Listings':>10} " + " ".join(
+                    f"{DataSet._stat_names[DataSet.Stats[stat]]:<20}"
+                    for stat in table["stats"]) + "\n")
+        if table["table"] == "selection":
+            return ("The following data are from properties matching these "
+                    "criteria: \n"
+                    + "".join(f"- {label}\n"
+                              for labels in table["filters"].values()
+                              for label in labels)
+                    + f"{'Listings':>18} " + " ".join(
+                        f"{DataSet._stat_names[DataSet.Stats[stat]]:<20}"
+                        for stat in table["stats"]) + "\n")
+        return ""
+
+    def row(self, table: dict, row: tuple, index: int):
+        currency = table["currency"]
+        label, *prices = row
+        if table["table"] == "cross_table":
+            return f"{label:20}" + "".join(
+                format_price("N/A" if price is None else price, currency, 20)
+                for price in prices) + "\n"
+        if table["table"] == "field_table":
+            if prices[0] is None:
+                # The N/A columns of the location table have always been
+                # spaced more widely than those of the property type table.
+                if table["rows_category"] == DataSet.Categories.LOCATION.name:
+                    na_separator = "   "
+                else:
+                    na_separator = " "
+                na_string = "N/A"
+                return f"{label:<18} " + na_separator.join(
+                    f"{na_string:<18}" for price in prices) + "\n"
+            return f"{label:<18} " + " ".join(
+                format_price(price, currency, 18) for price in prices) + "\n"
+        if table["table"] == "histogram":
+            dimensions = len(table["dimensions"])
+            return "".join(f"{label:<20}" for label in row[:dimensions]) + (
+                "".join(f"{count:>12}" for count in row[dimensions:])
+                + "\n")
+        if table["table"] == "cube":
+            dimensions = len(table["dimensions"])
+            return "".join(f"{label:<20}" for label in row[:dimensions]) + (
+                f"{row[dimensions]:>10} " + " ".join(
+                    format_price("N/A" if price is None else price,
+                                 currency, 18)
+                    for price in row[dimensions + 1:]) + "\n")
+        if table["table"] == "selection":
+            return f"{label:>18} " + " ".join(
+                format_price("N/A" if price is None else price, currency, 18)
+                for price in prices) + "\n"
+        property_type, price = prices
+        return (f"{label:20}{property_type:22}"
+                f"{format_price(price, currency, 20)}\n")
+
+    def footer(self, table: dict):
+        if "intervals" not in table:
+            return ""
+        widest = max(((high - low) / 2 for row in table["intervals"]
+                      for low, high in filter(None, row)), default=0)
+        within = format_price(widest, table["currency"], 0)
+        return (f"Estimated from samples of up to {table['sample_size']} "
+                f"listings per cell, to within {within} at "
+                f"{table['confidence']:.0%} confidence\n")
+
+
+class CSVRenderer(TableRenderer):
+    """ Renders tables as CSV with a header line, leaving missing values
+    empty.
+    """
+
+    def __init__(self, stream_rows=False):
+        super().__init__(stream_rows)
+        self._line = io.StringIO()
+        self._writer = csv.writer(self._line)
+
+    def _format(self, values):
+        self._writer.writerow(values)
+        line = self._line.getvalue()
+        self._line.seek(0)
+        self._line.truncate()
+        return line
+
+    def header(self, table: dict):
+        return self._format(table["header"])
+
+    def row(self, table: dict, row: tuple, index: int):
+        return self._format(["" if value is None else value
+                             for value in row])
+
+
+class JSONRenderer(TableRenderer):
+    """ Renders tables as one JSON object holding the table dictionary,
+    with the rows written as they are rendered.
+    """
+
+    def header(self, table: dict):
+        fields = json.dumps({key: value for key, value in table.items()
+                             if key != "rows"})
+        return fields[:-1] + (', ' if len(fields) > 2 else '') + '"rows": ['
+
+    def row(self, table: dict, row: tuple, index: int):
+        return (", " if index else "") + json.dumps(row)
+
+    def footer(self, table: dict):
+        return "]}\n"
+
+
+renderers = {"text": TextRenderer, "csv": CSVRenderer, "json": JSONRenderer}
+
+
+def histogram_edges(low: float, high: float, bins: int, log=False):
+    """ Return the bins + 1 ascending edges of bins equal ranges from low
+    to high, equal on a logarithmic scale if log is True, in which case
+    the edges between low and high are rounded to three significant
+    figures.
+
+    Key Arguments:
+        low (float): the first edge
+        high (float): the last edge
+        bins (int): the number of bins between them
+        log (bool): space the edges evenly on a logarithmic scale,
+        which needs a positive low
+    """
+    if bins < 1 or high <= low:
+        raise ValueError("Need at least one bin and high above low")
+    if not log:
+        return [low + (high - low) * step / bins for step in range(bins + 1)]
+    if low <= 0:
+        raise ValueError("Logarithmic bins need a positive low edge")
+    ratio = high / low
+    return [low, *(float(f"{low * ratio ** (step / bins):.3g}")
+                   for step in range(1, bins)), high]
+
+
+def currency_options(base_curr: str):
+    """ Print out a table of options for converting base_curr to all
+    other string currencies.
+
+    Key Arguments:
+        base_curr (str): the home currency of the user
+    """
+    print(f"{base_curr:9}", end="")
+    for currency in conversions:
+        if currency == base_curr:
+            continue
+        else:
+            print(f"{currency:9}", end="")
+    print()
+
+    quantities = range(10, 100, 10)
+    converted_columns = [convert_values(quantities, base_curr, currency)
+                         for currency in conversions
+                         if currency != base_curr]
+    for row, i in enumerate(quantities):
+        print(f"{i:<9.2f}", end="")
+        for converted_column in converted_columns:
+            print(f"{converted_column[row]:<9.2f}", end="")
+        print()
+
+
+def manage_filters(dataset: DataSet, category: DataSet.Categories):
+    """ Print a menu-like list of all labels for a given category,
+    indicating which ones are currently active. Allow user to change a
+    label from active to inactive or inactive to active until user is
+    finished with making choices.
+
+    Key Arguments:
+        dataset (Dataset): an object of the class DataSet
+        category (Dataset.Categories): a member of the Enum Categories
+    """
+    making_choices = True
+    while making_choices:
+        print("The following labels are in the dataset:")
+        for num, label in enumerate(dataset.get_labels(category), 1):
+            label_status = "ACTIVE" if label in dataset.get_active_labels(
+                category) else "INACTIVE"
+            print(f"{num}. {label:<20} {label_status:<20}")
+
+        response = input("Please select an item to toggle or enter a blank"
+                         " line when you are\nfinished. ")
+        if response == '':
+            break
+        else:
+            index = int(response) - 1
+            try:
+                dataset.toggle_active_label(
+                    category, dataset.get_labels(category)[index])
+            except IndexError:
+                print("Please select a number from the list")
+
+
+def empty_dataset_message(load: BackgroundLoad):
+    """ Return the message shown when a table is asked for before any
+    listings have been loaded.
+    """
+    if load is not None and not load.done():
+        return "The data are still loading, please try again shortly"
+    return "Please Load a Dataset First"
+
+
+def report_load(load: BackgroundLoad):
+    """ Print the outcome of a finished background load. """
+    try:
+        print(str(load.result()) + " lines loaded")
+    except DataSet.LoadCancelled:
+        print("Loading was cancelled")
+    except Exception as error:
+        print(f"Loading failed: {error}")
+
+
+def follow_load(load: BackgroundLoad):
+    """ Ask the user whether to wait for a background load, cancel it,
+    or leave it running. While waiting, show its progress on one line;
+    Ctrl-C cancels. Return load, or None once it has finished.
+    """
+    response = input("The data are loading. Enter W to wait, C to cancel, "
+                     "or a blank line to go back. ").strip().lower()
+    if response not in ('w', 'c'):
+        return load
+    if response == 'c':
+        load.cancel()
+    try:
+        while not load.done():
+            print(f"\r{load.status()}", end='', flush=True)
+            concurrent.futures.wait([load.future], timeout=.2)
+    except KeyboardInterrupt:
+        load.cancel()
+        concurrent.futures.wait([load.future])
+    print()
+    report_load(load)
+    return None
+
+
+def print_menu():
+    """ Print out the nine choices and the numbers associated with
+    them.
+    """
+    print("Main Menu")
+    print("1 - Print Average Rent by Location and Property Type")
+    print("2 - Print Minimum Rent by Location and Property Type")
+    print("3 - Print Maximum Rent by Location and Property Type")
+    print("4 - Print Min/Avg/Max by Location")
+    print("5 - Print Min/Avg/Max by Property Type")
+    print("6 - Adjust Location Filters")
+    print("7 - Adjust Property Type Filters")
+    print("8 - Load Data")
+    print("9 - Quit")
+
+
+def menu(dataset: DataSet):
+    """ Print the currency table, then print out menu with the
+    copyright and header on the top. Ask user to select an option,
+    catch errors, and provide a unique polite message for each selection
+    until they enter 9 to indicate that they want to quit the menu.
+
+    Each command reads a session of dataset, refreshed before the
+    command runs, so a load finishing in the background never swaps
+    the listings out from under a table being printed.
+
+    Key arguments:
+        dataset (DataSet): an object of the class DataSet
+    """
+    print(f"Options for converting from {home_currency}: ")
+    currency_options(home_currency)
+    print(DataSet.copyright)
+    load = None
+    session = dataset.session()
+    show_menu = True
+    while show_menu:
+        if load is not None and load.done():
+            report_load(load)
+            load = None
+        print()
+        print(dataset.header)
+        if load is not None:
+            print(f"Loading: {load.status()}")
+        print_menu()
+        try:
+            response = int(input("What is your choice? "))
+        except ValueError:
+            print("Please enter in a number only")
+            continue
+        session.refresh()
+        if response == 1:
+            try:
+                session.display_cross_table(DataSet.Stats.AVG)
+            except DataSet.EmptyDatasetError:
+                print(empty_dataset_message(load))
+        elif response == 2:
+            try:
+                session.display_cross_table(DataSet.Stats.MIN)
+            except DataSet.EmptyDatasetError:
+                print(empty_dataset_message(load))
+        elif response == 3:
+            try:
+                session.display_cross_table(DataSet.Stats.MAX)
+            except DataSet.EmptyDatasetError:
+                print(empty_dataset_message(load))
+        elif response == 4:
+            try:
+                session.display_field_table(DataSet.Categories.LOCATION)
+            except DataSet.EmptyDatasetError:
+                print(empty_dataset_message(load))
+        elif response == 5:
+            try:
+                session.display_field_table(DataSet.Categories.PROPERTY_TYPE)
+            except DataSet.EmptyDatasetError:
+                print(empty_dataset_message(load))
+        elif response == 6:
+            try:
+                manage_filters(session, DataSet.Categories.LOCATION)
+            except DataSet.EmptyDatasetError:
+                print(empty_dataset_message(load))
+        elif response == 7:
+            try:
+                manage_filters(session, DataSet.Categories.PROPERTY_TYPE)
+            except DataSet.EmptyDatasetError:
+                print(empty_dataset_message(load))
+        elif response == 8:
+            if load is None:
+                load = dataset.load_file_in_background(lazy=True)
+                print("Loading in the background; the menu can be used "
+                      "meanwhile")
+            else:
+                load = follow_load(load)
+        elif response == 9:
+            if load is not None:
+                load.cancel()
+                concurrent.futures.wait([load.future])
+            print("Goodbye! Thank you for using this database")
+            break
+        else:
+            print("Please enter a number between 1 and 9")
+
+
+def greeting():
+    """ Obtain the user's name. """
+    my_name = input("\nPlease enter your name: ")
+    print("Hi ", my_name, ", welcome to Foothill's database project.",
+          sep='')
+
+
+def ask_home_currency():
+    """ Ask for user's home currency until user enters in a valid
+    currency.
+    """
+    global home_currency
+    invalid_currency = True
+    while invalid_currency:
+        home_currency = input("What is your home currency? ")
+        for currency in conversions:
+            if home_currency == currency:
+                invalid_currency = False
+            else:
+                continue
+
+
+def _query_filters(query: dict):
+    """ Return the filters of a batch query as a dictionary keyed by
+    DataSet.Categories, or None if the query has none.
+    """
+    filters = query.get("filters")
+    if filters is None:
+        return None
+    return {DataSet.Categories[name]: labels
+            for name, labels in filters.items()}
+
+
+def run_query(dataset: DataSet, query: dict):
+    """ Run one query against dataset and return its structured result.
+
+    A query is a dictionary with a "type" of "cross_table",
+    "field_table", "top_cells", "selection", "cube", "histogram",
+    "count_in_range", or "labels", plus the arguments of the matching
+    DataSet query method by name, with Stats and Categories given by
+    member name, for example:
+        {"type": "field_table", "rows": "LOCATION",
+         "stats": ["MIN", "MEDIAN"], "order_by": "AVG",
+         "filters": {"PROPERTY_TYPE": ["Private room"]},
+         "currency": "EUR"}
+    Cross and field tables also take "approximate" (true or false) and
+    a "confidence" level for the intervals of approximate values.
+
+    Key Arguments:
+        dataset (DataSet): a loaded object of the class DataSet
+        query (dict): the query to run
+    """
+    query_type = query.get("type")
+    order_by = query.get("order_by")
+    order_by = DataSet.Stats[order_by] if order_by else None
+    price_range = query.get("price_range")
+    if query_type == "cross_table":
+        return dataset.query_cross_table(
+            DataSet.Stats[query.get("stat", "AVG")], _query_filters(query),
+            order_by, query.get("descending", False), query.get("currency"),
+            price_range, query.get("approximate"),
+            query.get("confidence", .95))
+    if query_type == "field_table":
+        return dataset.query_field_table(
+            DataSet.Categories[query.get("rows", "LOCATION")],
+            tuple(DataSet.Stats[stat]
+                  for stat in query.get("stats", ["MIN", "AVG", "MAX"])),
+            _query_filters(query), order_by, query.get("descending", False),
+            query.get("currency"), price_range, query.get("approximate"),
+            query.get("confidence", .95))
+    if query_type == "top_cells":
+        return dataset.query_top_cells(
+            DataSet.Stats[query.get("stat", "AVG")], query.get("k", 10),
+            query.get("largest", True), query.get("currency"))
+    if query_type == "selection":
+        return dataset.query_selection(
+            tuple(DataSet.Stats[stat]
+                  for stat in query.get("stats", ["MIN", "AVG", "MAX"])),
+            _query_filters(query), query.get("currency"))
+    if query_type == "cube":
+        return dataset.query_cube(
+            query.get("group_by", []),
+            tuple(DataSet.Stats[stat]
+                  for stat in query.get("stats", ["MIN", "AVG", "MAX"])),
+            query.get("where"), order_by, query.get("descending", False),
+            query.get("currency"))
+    if query_type == "histogram":
+        edges = query.get("edges")
+        if edges is None:
+            edges = histogram_edges(query["low"], query["high"],
+                                    query.get("bins", 10),
+                                    query.get("log", False))
+        rows = query.get("rows")
+        return dataset.query_histogram(
+            edges, DataSet.Categories[rows] if rows else None,
+            _query_filters(query), query.get("currency"))
+    if query_type == "count_in_range":
+        return {"location": query["location"],
+                "property_type": query["property_type"],
+                "price_range": price_range,
+                "count": dataset.count_in_range(
+                    query["location"], query["property_type"],
+                    *(price_range or (None, None)), query.get("currency"))}
+    if query_type == "labels":
+        category = DataSet.Categories[query.get("category", "LOCATION")]
+        return {"category": category.name,
+                "labels": DataSet.sort_labels(dataset.get_labels(category)),
+                "active": DataSet.sort_labels(
+                    dataset.get_active_labels(category))}
+    raise ValueError(f"Unknown query type: {query_type}")
+
+
+def run_batch(dataset: DataSet, queries):
+    """ Yield a result dictionary for every query in queries, all run
+    against the same loaded dataset so that its aggregates are shared.
+    A query that fails yields {"error": message} instead of stopping
+    the batch.
+
+    Key Arguments:
+        dataset (DataSet): a loaded object of the class DataSet
+        queries (iterable): the query dictionaries to run
+    """
+    for query in queries:
+        try:
+            yield {"query": query, "result": run_query(dataset, query)}
+        except (KeyError, TypeError, ValueError, AttributeError,
+                DataSet.EmptyDatasetError) as error:
+            yield {"query": query, "error": repr(error)}
+
+
+def read_queries(file):
+    """ Yield the queries in an open file holding either one JSON list
+    of queries or one JSON query per line.
+    """
+    text = file.read()
+    if text.lstrip().startswith('['):
+        yield from json.loads(text)
+        return
+    for line in text.splitlines():
+        if line.strip():
+            yield json.loads(line)
+
+
+def query_from_parameters(query_type: str, parameters: dict):
+    """ Return the query for run_query asked for by an HTTP request to
+    /query_type with the parsed query string parameters. Filters are
+    given by category name, once per label (LOCATION=Bronx&LOCATION=
+    Queens); stats, group_by, and edges are comma separated; price_range
+    is "low,high" with either limit left empty; where is JSON.
+
+    Key Arguments:
+        query_type (str): the type of query, as in run_query
+        parameters (dict): maps names to lists of values, as returned
+        by urllib.parse.parse_qs
+    """
+    query = {"type": query_type}
+    for name, values in parameters.items():
+        value = values[-1]
+        if name in DataSet.Categories.__members__:
+            query.setdefault("filters", {})[name] = values
+        elif name in ("stats", "group_by"):
+            query[name] = value.split(',')
+        elif name in ("edges", "price_range"):
+            query[name] = [float(limit) if limit else None
+                           for limit in value.split(',')]
+        elif name in ("k", "bins"):
+            query[name] = int(value)
+        elif name in ("low", "high", "confidence"):
+            query[name] = float(value)
+        elif name in ("descending", "largest", "log", "approximate"):
+            query[name] = value.lower() in ("1", "true", "yes")
+        elif name == "where":
+            query[name] = json.loads(value)
+        else:
+            query[name] = value
+    return query
+
+
+class QueryCache:
+    """ A cache of encoded responses that drops the least recently used
+    entry beyond size entries and may be shared between threads.
+    """
+
+    def __init__(self, size=256):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ Return the response cached under key, or None. """
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return response
+
+    def put(self, key, response):
+        """ Cache response under key. """
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class QueryHandler(http.server.BaseHTTPRequestHandler):
+    """ Answers the requests of one HTTP/1.1 connection, which is kept
+    open between requests until the client closes it or it has been idle
+    for timeout seconds. GET /<type> runs the query of that type from
+    the query string, POST /query runs the JSON query (or list of
+    queries) in the body, GET /currencies lists the currencies, GET
+    /status describes the data, and POST /reload loads the file again in
+    the background.
+    """
+    protocol_version = "HTTP/1.1"
+    timeout = 30
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        endpoint = url.path.strip('/')
+        if endpoint == "currencies":
+            self._send(200, {"home_currency": home_currency or data_currency,
+                             "currencies": list(conversions),
+                             "symbols": currency_symbols})
+        elif endpoint == "status":
+            self._send(200, self.server.status())
+        else:
+            try:
+                query = query_from_parameters(
+                    endpoint, urllib.parse.parse_qs(url.query))
+            except ValueError as error:
+                self._send(400, {"error": repr(error)})
+                return
+            self._answer(query)
+
+    def do_POST(self):
+        endpoint = urllib.parse.urlsplit(self.path).path.strip('/')
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if endpoint == "reload":
+            self.server.reload()
+            self._send(202, self.server.status())
+        elif endpoint == "query":
+            try:
+                query = json.loads(body or b'null')
+            except ValueError as error:
+                self._send(400, {"error": repr(error)})
+                return
+            self._answer(query)
+        else:
+            self._send(404, {"error": f"Unknown endpoint: /{endpoint}"})
+
+    def _answer(self, query):
+        """ Send the result of query, or of each query in a list, from
+        the response cache when the same query has already been answered
+        from the current version of the data.
+        """
+        text = json.dumps(query, sort_keys=True)
+        response = self.server.cache.get((self.server.dataset.version, text))
+        if response is None:
+            with self.server.session() as dataset:
+                try:
+                    if isinstance(query, list):
+                        result = {"results": list(run_batch(dataset, query))}
+                    else:
+                        result = {"result": run_query(dataset, query)}
+                except (KeyError, ValueError, TypeError, AttributeError,
+                        DataSet.EmptyDatasetError) as error:
+                    self._send(400, {"error": repr(error)})
+                    return
+                response = json.dumps(result).encode()
+                self.server.cache.put((dataset.version, text), response)
+        self._send(200, response)
+
+    def _send(self, status: int, body):
+        """ Send body, a dictionary or encoded JSON, with status. """
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class QueryServer(http.server.ThreadingHTTPServer):
+    """ An HTTP server answering JSON queries against one DataSet, loaded
+    once and shared by every client. Every connection has a thread of its
+    own, so idle keep-alive connections do not hold up other clients,
+    but at most workers queries run at once, each on one of workers
+    sessions of the DataSet. Responses are cached by query until the
+    data change.
+
+    Key Arguments:
+        address (tuple): the (host, port) to listen on
+        dataset (DataSet): the loaded DataSet to query
+        workers (int): the most queries run at once
+        cache_size (int): the most responses cached
+        load_options (dict): the keyword arguments of load_file used by
+        /reload
+        quiet (bool): do not log requests
+    """
+
+    def __init__(self, address, dataset: DataSet, workers=8,
+                 cache_size=256, load_options: dict = None, quiet=False):
+        super().__init__(address, QueryHandler)
+        self.dataset = dataset
+        self.cache = QueryCache(cache_size)
+        self.load_options = load_options or {}
+        self.quiet = quiet
+        self.load = None
+        self._sessions = queue.SimpleQueue()
+        for _ in range(workers):
+            self._sessions.put(dataset.session())
+        self._load_lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def session(self):
+        """ Lend a session of the DataSet, moved to the newest version of
+        the data, for one query, waiting while all of them are in use.
+        """
+        session = self._sessions.get()
+        try:
+            session.refresh()
+            yield session
+        finally:
+            self._sessions.put(session)
+
+    def reload(self):
+        """ Start loading the file again in the background unless a load
+        is already running. Queries use the previous data until it ends.
+        """
+        with self._load_lock:
+            if self.load is None or self.load.done():
+                self.load = self.dataset.load_file_in_background(
+                    **self.load_options)
+
+    def status(self):
+        """ Return a dictionary describing the data and any load. """
+        status = {"version": self.dataset.version,
+                  "listings": len(self.dataset._data or ()),
+                  "cache_hits": self.cache.hits,
+                  "cache_misses": self.cache.misses}
+        if self.load is not None:
+            status["loading"] = not self.load.done()
+            status["load_progress"] = self.load.status()
+        return status
+
+
+def parse_arguments(argv=None):
+    """ Return the parsed command line arguments. """
+    parser = argparse.ArgumentParser(
+        description="Airbnb listings database. Without --batch or --serve, "
+                    "starts the interactive menu.")
+    parser.add_argument("--batch", metavar="QUERIES",
+                        help="run the JSON queries in this file ('-' for "
+                             "stdin) and exit")
+    parser.add_argument("--serve", metavar="PORT", type=int, default=None,
+                        help="answer JSON queries over HTTP on this port")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="the address the server listens on")
+    parser.add_argument("--threads", type=int, default=8,
+                        help="the most queries the server runs at once")
+    parser.add_argument("--cache-size", type=int, default=256,
+                        help="the most responses the server caches")
+    parser.add_argument("--data", default=None,
+                        help="the listings CSV file to load")
+    parser.add_argument("--output", default="-",
+                        help="where to write batch results as JSON lines")
+    parser.add_argument("--format", default="jsonl",
+                        choices=["jsonl", *renderers],
+                        help="write each table result as a JSON line or "
+                             "render it as text, CSV, or JSON")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used to load the listings")
+    parser.add_argument("--dimensions", default=None,
+                        help="comma separated columns of a data cube to "
+                             "build for \"cube\" queries, for example "
+                             "neighbourhood_group,neighbourhood,room_type")
+    parser.add_argument("--currency", default=None,
+                        help="the home currency of the batch or server "
+                             "results")
+    parser.add_argument("--database", default=None,
+                        help="keep the listings in this SQLite database "
+                             "file instead of in memory")
+    parser.add_argument("--approximate", action="store_true",
+                        help="estimate averages and quantiles from "
+                             "samples of each cell unless a query sets "
+                             "\"approximate\" to false")
+    parser.add_argument("--sample-size", type=int, default=None,
+                        help="prices sampled per cell while loading, for "
+                             "approximate queries")
+    parser.add_argument("--histogram-edges", default=None,
+                        help="comma separated bin edges of the histograms "
+                             "to count while loading, for \"histogram\" "
+                             "queries with these edges")
+    return parser.parse_args(argv)
+
+
+def load_options(arguments):
+    """ Set the home currency from the command line arguments and return
+    the keyword arguments of load_file they ask for.
+    """
+    global home_currency
+    if arguments.currency is not None:
+        home_currency = arguments.currency
+    dimensions = None
+    if arguments.dimensions:
+        dimensions = make_dimensions(arguments.dimensions.split(','))
+    edges = None
+    if arguments.histogram_edges:
+        edges = [float(edge) for edge in arguments.histogram_edges.split(',')]
+    return {"source": arguments.data, "workers": arguments.workers,
+            "dimensions": dimensions, "database": arguments.database,
+            "sample_size": arguments.sample_size, "histogram_edges": edges}
+
+
+def batch_main(arguments):
+    """ Load the listings once and write the result of every query in
+    the batch file as one JSON line, or rendered in the chosen format.
+    """
+    dataset = DataSet()
+    dataset.approximate = arguments.approximate
+    dataset.load_file(**load_options(arguments))
+    with contextlib.ExitStack() as stack:
+        if arguments.batch == '-':
+            queries_file = sys.stdin
+        else:
+            queries_file = stack.enter_context(open(arguments.batch))
+        if arguments.output == '-':
+            output = sys.stdout
+        else:
+            output = stack.enter_context(open(arguments.output, 'w'))
+        renderer = None
+        if arguments.format != "jsonl":
+            renderer = renderers[arguments.format]()
+        for result in run_batch(dataset, read_queries(queries_file)):
+            table = result.get("result", {})
+            if renderer is None or "table" not in table:
+                output.write(json.dumps(result) + "\n")
+            else:
+                renderer.render(table, output)
+
+
+def serve_main(arguments):
+    """ Load the listings once and answer queries over HTTP until
+    interrupted.
+    """
+    options = load_options(arguments)
+    dataset = DataSet()
+    dataset.approximate = arguments.approximate
+    dataset.load_file(**options)
+    with QueryServer((arguments.host, arguments.serve), dataset,
+                     arguments.threads, arguments.cache_size,
+                     options) as server:
+        host, port = server.server_address[:2]
+        print(f"Serving {len(dataset._data)} listings on "
+              f"http://{host}:{port}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv=None):
+    """ Greet user, ask user for their home currency, ask user to enter
+    header for the menu, print table of options for currency
+    conversions, print menu with header and copyright at the top, and
+    print a unique polite message to the user based on the user's choice
+    until user enters the number 9 to quit the menu. With --batch, run
+    a file of queries against one loaded DataSet instead, and with
+    --serve, answer queries over HTTP.
+    """
+    arguments = parse_arguments(argv)
+    if arguments.batch is not None:
+        batch_main(arguments)
+        return
+    if arguments.serve is not None:
+        serve_main(arguments)
+        return
+    if arguments.data is not None:
+        global filename
+        filename = arguments.data
+    greeting()
+    ask_home_currency()
+    DataSet.copyright = "\nCopyright Michelle Tham"
+    air_bnb = DataSet()
+    while True:
+        header = input("Please enter a header for the menu:\n")
+        try:
+            air_bnb.header = header
+            break
+        except ValueError:
+            continue
+    menu(air_bnb)
+
+
+if __name__ == "__main__":
+    main()
+
+"""
+Please enter your name: Michelle
+Hi Michelle, welcome to Foothill's database project.
+What is your home currency? AUD
+Please enter a header for the menu:
+Final Airbnb Database
+Options for converting from AUD: 
+AUD      USD      EUR      CAD      GBP      CHF      NZD      JPY      
+10.00    6.17     5.56     8.64     4.94     5.86     10.25    666.17   
+20.00    12.35    11.11    17.28    9.88     11.73    20.49    1332.35  
+30.00    18.52    16.67    25.93    14.81    17.59    30.74    1998.52  
+40.00    24.69    22.22    34.57    19.75    23.46    40.99    2664.69  
+50.00    30.86    27.78    43.21    24.69    29.32    51.23    3330.86  
+60.00    37.04    33.33    51.85    29.63    35.19    61.48    3997.04  
+70.00    43.21    38.89    60.49    34.57    41.05    71.73    4663.21  
+80.00    49.38    44.44    69.14    39.51    46.91    81.98    5329.38  
+90.00    55.56    50.00    77.78    44.44    52.78    92.22    5995.56  
+
+Copyright Michelle Tham
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 1
+Please Load a Dataset First
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 8
+48895 lines loaded
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 1
+                    Entire home/apt       Private room          Shared room           
+Bronx               $ 127.51              $ 66.79               $ 59.80               
+Brooklyn            $ 178.33              $ 76.50               $ 50.53               
+Manhattan           $ 249.24              $ 116.78              $ 88.98               
+Queens              $ 147.05              $ 71.76               $ 69.02               
+Staten Island       $ 173.85              $ 62.29               $ 57.44               
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 2
+                    Entire home/apt       Private room          Shared room           
+Bronx               $ 28.00               $ 0.00                $ 20.00               
+Brooklyn            $ 0.00                $ 0.00                $ 0.00                
+Manhattan           $ 0.00                $ 10.00               $ 10.00               
+Queens              $ 10.00               $ 10.00               $ 11.00               
+Staten Island       $ 48.00               $ 20.00               $ 13.00               
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 3
+                    Entire home/apt       Private room          Shared room           
+Bronx               $ 1000.00             $ 2500.00             $ 800.00              
+Brooklyn            $ 10000.00            $ 7500.00             $ 725.00              
+Manhattan           $ 10000.00            $ 9999.00             $ 1000.00             
+Queens              $ 2600.00             $ 10000.00            $ 1800.00             
+Staten Island       $ 5000.00             $ 300.00              $ 150.00              
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 4
+The following data are from properties matching these criteria: 
+- Entire home/apt
+- Private room
+- Shared room
+                   Minimum              Average              Maximum
+Bronx              $ 0.00               $ 87.50              $ 2500.00           
+Brooklyn           $ 0.00               $ 124.38             $ 10000.00          
+Manhattan          $ 0.00               $ 196.88             $ 10000.00          
+Queens             $ 10.00              $ 99.52              $ 10000.00          
+Staten Island      $ 13.00              $ 114.81             $ 5000.00           
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 5
+The following data are from properties matching these criteria: 
+- Bronx
+- Brooklyn
+- Manhattan
+- Queens
+- Staten Island
+                   Minimum              Average              Maximum
+Entire home/apt    $ 0.00               $ 211.79             $ 10000.00          
+Private room       $ 0.00               $ 89.78              $ 10000.00          
+Shared room        $ 0.00               $ 70.13              $ 1800.00           
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 6
+The following labels are in the dataset:
+1. Queens               ACTIVE              
+2. Brooklyn             ACTIVE              
+3. Staten Island        ACTIVE              
+4. Manhattan            ACTIVE              
+5. Bronx                ACTIVE              
+Please select an item to toggle or enter a blank line when you are
+finished. 3
+The following labels are in the dataset:
+1. Queens               ACTIVE              
+2. Brooklyn             ACTIVE              
+3. Staten Island        INACTIVE            
+4. Manhattan            ACTIVE              
+5. Bronx                ACTIVE              
+Please select an item to toggle or enter a blank line when you are
+finished. 1
+The following labels are in the dataset:
+1. Queens               INACTIVE            
+2. Brooklyn             ACTIVE              
+3. Staten Island        INACTIVE            
+4. Manhattan            ACTIVE              
+5. Bronx                ACTIVE              
+Please select an item to toggle or enter a blank line when you are
+finished. 
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 5
+The following data are from properties matching these criteria: 
+- Bronx
+- Brooklyn
+- Manhattan
+                   Minimum              Average              Maximum
+Entire home/apt    $ 0.00               $ 217.95             $ 10000.00          
+Private room       $ 0.00               $ 93.29              $ 9999.00           
+Shared room        $ 0.00               $ 70.48              $ 1000.00           
+
+Final Airbnb Database
+Main Menu
+1 - Print Average Rent by Location and Property Type
+2 - Print Minimum Rent by Location and Property Type
+3 - Print Maximum Rent by Location and Property Type
+4 - Print Min/Avg/Max by Location
+5 - Print Min/Avg/Max by Property Type
+6 - Adjust Location Filters
+7 - Adjust Property Type Filters
+8 - Load Data
+9 - Quit
+What is your choice? 
+"""
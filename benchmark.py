@@ -0,0 +1,238 @@
+""" This program benchmarks the DataSet operations of assignment_eleven
+against synthetic listing files. It writes deterministic CSV files
+shaped like AB_NYC_2019.csv at the requested sizes, times loading,
+the cross and field tables, and toggling filters on each of them,
+and saves the throughput and peak memory of every operation as JSON so
+that results can be compared across commits.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import assignment_eleven as ae
+
+header = ["id", "neighbourhood_group", "room_type", "price", "name",
+          "host_id", "neighbourhood", "minimum_nights", "number_of_reviews",
+          "availability_365"]
+boroughs = ["Bronx", "Brooklyn", "Manhattan", "Queens", "Staten Island"]
+room_types = ["Entire home/apt", "Private room", "Shared room"]
+listing_names = ["Cozy, sunny room", "Loft \"Deluxe\"", "Quiet studio",
+                 "Nice place\nnear the park", "Spacious apartment"]
+
+
+def make_labels(known: list, count: int, prefix: str):
+    """ Return count labels, starting with the known ones and going on
+    with numbered labels built from prefix.
+    """
+    return (known + [f"{prefix} {number}"
+                     for number in range(len(known) + 1, count + 1)])[:count]
+
+
+def generate_listings(path, rows: int, locations=5, property_types=3,
+                      neighbourhoods=40, seed=2019):
+    """ Write a CSV file of rows synthetic listings shaped like
+    AB_NYC_2019.csv. The same arguments always produce the same file.
+    Prices follow a log-normal distribution with a few $0 and $10,000
+    placeholders, and some listing names hold quoted commas, quotes,
+    and newlines as real exports do.
+
+    Key Arguments:
+        path (str or PathLike): the file to write
+        rows (int): the number of listings to write
+        locations (int): the number of distinct boroughs
+        property_types (int): the number of distinct room types
+        neighbourhoods (int): the number of distinct neighbourhoods
+        seed (int): the seed of the random number generator
+    """
+    generator = random.Random(seed)
+    location_labels = make_labels(boroughs, locations, "Borough")
+    property_labels = make_labels(room_types, property_types, "Room type")
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        for listing in range(rows):
+            if generator.random() < .001:
+                price = generator.choice((0, 10000))
+            else:
+                price = round(generator.lognormvariate(4.6, .7))
+            writer.writerow([
+                2539 + listing,
+                generator.choice(location_labels),
+                generator.choice(property_labels),
+                price,
+                generator.choice(listing_names),
+                generator.randrange(1, 300000),
+                f"Neighbourhood {generator.randrange(neighbourhoods)}",
+                generator.randrange(1, 31),
+                generator.randrange(0, 400),
+                generator.randrange(0, 366)])
+
+
+def measure(operation, memory: bool):
+    """ Run operation and return its wall time in seconds and, if memory
+    is True, its peak traced allocation in bytes. Output printed by the
+    operation is discarded.
+    """
+    sink = io.StringIO()
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        operation()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def dataset_operations(path, workers: int):
+    """ Return a list of (name, setup, operation) tuples covering the
+    DataSet operations benchmarked on the file at path. setup returns
+    the DataSet the operation runs on and is not timed.
+    """
+    def loaded():
+        dataset = ae.DataSet()
+        dataset.load_file(path, snapshot=False)
+        return dataset
+
+    def toggled(dataset):
+        location = ae.DataSet.Categories.LOCATION
+        label = dataset.get_labels(location)[0]
+        dataset.toggle_active_label(location, label)
+        dataset.toggle_active_label(location, label)
+        dataset.display_field_table(ae.DataSet.Categories.PROPERTY_TYPE)
+
+    def snapshot_load(dataset):
+        dataset.load_file(path)
+
+    def lazy_finished(dataset):
+        dataset.load_file(path, snapshot=False, lazy=True)
+        dataset.finish_load()
+
+    def warm_snapshot():
+        ae.DataSet().load_file(path)
+        return ae.DataSet()
+
+    return [
+        ("load_file", ae.DataSet,
+         lambda dataset: dataset.load_file(path, snapshot=False)),
+        ("load_file_lazy", ae.DataSet,
+         lambda dataset: dataset.load_file(path, snapshot=False, lazy=True)),
+        ("load_file_lazy_finished", ae.DataSet, lazy_finished),
+        ("load_file_streaming", ae.DataSet,
+         lambda dataset: dataset.load_file(path, streaming=True)),
+        ("load_file_parallel", ae.DataSet,
+         lambda dataset: dataset.load_file(path, workers=workers,
+                                           snapshot=False)),
+        ("load_file_snapshot", warm_snapshot, snapshot_load),
+        ("display_cross_table", loaded,
+         lambda dataset: dataset.display_cross_table(ae.DataSet.Stats.AVG)),
+        ("display_cross_table_median", loaded,
+         lambda dataset: dataset.display_cross_table(
+             ae.DataSet.Stats.MEDIAN)),
+        ("display_field_table", loaded,
+         lambda dataset: dataset.display_field_table(
+             ae.DataSet.Categories.LOCATION)),
+        ("toggle_active_label", loaded, toggled),
+    ]
+
+
+def run_benchmarks(sizes: list, directory, locations=5, property_types=3,
+                   workers=4, repeat=3, memory=True):
+    """ Generate a listing file for every size in sizes and return a
+    list of result dictionaries, one per size and operation, with the
+    best time of repeat runs, the rows processed per second, and the
+    peak traced memory.
+
+    Key Arguments:
+        sizes (list): the numbers of listings to benchmark with
+        directory (str or PathLike): where the listing files are written
+        locations (int): the number of distinct boroughs
+        property_types (int): the number of distinct room types
+        workers (int): the number of processes for the parallel load
+        repeat (int): the number of timed runs of each operation
+        memory (bool): also measure peak memory in an extra run
+    """
+    results = []
+    for rows in sizes:
+        path = os.path.join(directory, f"listings_{rows}.csv")
+        generate_listings(path, rows, locations, property_types)
+        for name, setup, operation in dataset_operations(path, workers):
+            timings = []
+            for _ in range(repeat):
+                dataset = setup()
+                timings.append(measure(lambda: operation(dataset), False)[0])
+            peak = None
+            if memory:
+                dataset = setup()
+                peak = measure(lambda: operation(dataset), True)[1]
+            best = min(timings)
+            results.append({
+                "operation": name,
+                "rows": rows,
+                "locations": locations,
+                "property_types": property_types,
+                "seconds": best,
+                "rows_per_second": rows / best if best else None,
+                "peak_memory_bytes": peak,
+            })
+            print(f"{name:28} {rows:>10} rows {best:>10.4f} s")
+    return results
+
+
+def current_commit():
+    """ Return the git commit of the working tree, or None. """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+            check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """ Parse the command line, run the benchmarks, and save them. """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[10000, 100000],
+                        help="listing counts to benchmark, e.g. 10000 "
+                             "1000000 10000000")
+    parser.add_argument("--locations", type=int, default=5)
+    parser.add_argument("--property-types", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the extra run that measures memory")
+    parser.add_argument("--directory",
+                        help="where to write the listing files (a "
+                             "temporary directory by default)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        results = run_benchmarks(
+            arguments.rows, arguments.directory or temporary_directory,
+            arguments.locations, arguments.property_types,
+            arguments.workers, arguments.repeat, not arguments.no_memory)
+    with open(arguments.output, 'w') as file:
+        json.dump({"commit": current_commit(),
+                   "python": platform.python_version(),
+                   "platform": platform.platform(),
+                   "results": results}, file, indent=2)
+    print(f"Results saved to {arguments.output}")
+
+
+if __name__ == "__main__":
+    main()